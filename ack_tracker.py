@@ -0,0 +1,214 @@
+# Command acknowledgement tracking for the drone link:
+# Every outgoing flight command is tagged with a sequence number. The firmware
+# echoes it back in an ack, which lets us retry lost commands and measure the
+# real round-trip latency of each command type.
+import itertools
+import math
+import threading
+import time
+
+
+class LatencyHistogram:
+    """Fixed-size histogram with logarithmic buckets.
+
+    Recording is O(1) and memory does not grow with the number of samples.
+    Bucket edges grow by 5%, so percentiles are accurate to about 5% between
+    min_ms and roughly 20 seconds.
+    """
+    def __init__(self, min_ms=0.05, growth=1.05, buckets=300):
+        self.min_ms = min_ms
+        self.log_growth = math.log(growth)
+        self.growth = growth
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms):
+        if latency_ms <= self.min_ms:
+            index = 0
+        else:
+            index = min(len(self.counts) - 1, int(math.log(latency_ms / self.min_ms) / self.log_growth) + 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, percent):
+        """Upper edge of the bucket holding the given percentile, in ms"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.max_ms, self.min_ms * self.growth ** index)
+        return self.max_ms
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total_ms / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max_ms,
+        }
+
+
+class AckTracker:
+    """Matches acknowledgements to sent commands and decides when to retry.
+
+    Until the firmware has acknowledged at least one command it is assumed
+    not to support acks, and unacknowledged commands are forgotten instead of
+    retried. Latency is only sampled for commands acknowledged on their first
+    transmission, because an ack after a retry cannot be attributed to a
+    particular attempt.
+    """
+    # A newer setpoint makes an unacknowledged older one of the same kind pointless to retry
+    SUPERSEDING_ACTIONS = ("move", "altitude")
+    # After a stop or land, resending an unacknowledged flight command would undo it
+    CANCELLING_ACTIONS = ("stop", "land")
+    CANCELLED_ACTIONS = ("takeoff", "move", "altitude")
+
+    def __init__(self, timeout=0.5, max_retries=2):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.acks_supported = False
+        self.lock = threading.Lock()
+        self.sequence = itertools.cycle(range(1, 0x10000))  # Fits the binary frame header
+        self.pending = {}  # seq -> [command, last_sent, attempts]
+        self.histograms = {}
+        self.stats = {"sent": 0, "acked": 0, "retried": 0, "failed": 0, "unacked": 0, "cancelled": 0}
+
+    def tag(self, command):
+        """Return a copy of a flight command carrying a new sequence number"""
+        if command.get("type") != "command" or "seq" in command:
+            return command
+        return dict(command, seq=next(self.sequence))
+
+    def sent(self, command, now=None):
+        """Record that a tagged command (or a retry of it) went out.
+
+        Returns the sequence numbers of pending commands it made stale: older
+        setpoints of the same kind, or every takeoff, move and altitude
+        command for a stop or land. Those are no longer retried.
+        """
+        seq = command.get("seq")
+        if seq is None:
+            return []
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            entry = self.pending.get(seq)
+            if entry is not None and entry[0] is command:
+                entry[1] = now
+                return []
+
+            action = command.get("action")
+            stale = []
+            if action in self.SUPERSEDING_ACTIONS:
+                stale = [s for s, (c, _, _) in self.pending.items() if c.get("action") == action]
+            elif action in self.CANCELLING_ACTIONS:
+                stale = [s for s, (c, _, _) in self.pending.items() if c.get("action") in self.CANCELLED_ACTIONS]
+                self.stats["cancelled"] += len(stale)
+            for s in stale:
+                del self.pending[s]
+            self.pending[seq] = [command, now, 1]
+            self.stats["sent"] += 1
+            return stale
+
+    def awaiting(self, command):
+        """True while this very command is still waiting for its ack"""
+        with self.lock:
+            entry = self.pending.get(command.get("seq"))
+            return entry is not None and entry[0] is command
+
+    def acknowledge(self, seq, now=None):
+        """Match an ack. Returns the command it acknowledged, or None"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            self.acks_supported = True
+            entry = self.pending.pop(seq, None)
+            if entry is None:
+                return None
+            command, last_sent, attempts = entry
+            self.stats["acked"] += 1
+            if attempts == 1:
+                action = command.get("action", "unknown")
+                histogram = self.histograms.get(action)
+                if histogram is None:
+                    histogram = self.histograms[action] = LatencyHistogram()
+                histogram.record((now - last_sent) * 1000)
+            return command
+
+    def forget(self, command):
+        """Stop waiting for the ack of a command that could not be written"""
+        with self.lock:
+            self.pending.pop(command.get("seq"), None)
+
+    def check(self, seq, now=None):
+        """Decide what to do with one command whose ack is overdue.
+
+        Returns the command to resend, or None if it was acknowledged or has
+        been given up on.
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            entry = self.pending.get(seq)
+            if entry is None or now - entry[1] < self.timeout:
+                return None
+            command, _, attempts = entry
+            if self.acks_supported and attempts <= self.max_retries:
+                # The retry may wait in a queue; restart the clock so it is not handed out twice
+                entry[1] = now
+                entry[2] += 1
+                self.stats["retried"] += 1
+                return command
+            del self.pending[seq]
+            self.stats["failed" if self.acks_supported else "unacked"] += 1
+            return None
+
+    def expired(self, now=None):
+        """Return every overdue command that should be resent"""
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            overdue = [seq for seq, entry in self.pending.items() if now - entry[1] >= self.timeout]
+        retries = []
+        for seq in overdue:
+            command = self.check(seq, now)
+            if command is not None:
+                retries.append(command)
+        return retries
+
+    def next_deadline(self):
+        """time.monotonic() value at which the oldest pending ack is overdue, or None"""
+        with self.lock:
+            if not self.pending:
+                return None
+            return min(entry[1] for entry in self.pending.values()) + self.timeout
+
+    def latency_stats(self):
+        """Per command type latency summary in milliseconds"""
+        with self.lock:
+            return {action: histogram.summary() for action, histogram in self.histograms.items()}
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.stats)
+            stats["pending"] = len(self.pending)
+            stats["acks_supported"] = self.acks_supported
+        return stats
+
+    def format_report(self):
+        """Human readable latency table for the 'latency' command"""
+        stats = self.get_stats()
+        lines = [f"Commands: {stats['sent']} sent, {stats['acked']} acked, {stats['retried']} retried, "
+                 f"{stats['failed']} failed, {stats['cancelled']} cancelled by stop/land, "
+                 f"{stats['pending']} pending"]
+        if not stats["acks_supported"]:
+            lines.append("No acknowledgements received yet (firmware may not support acks)")
+        for action, summary in sorted(self.latency_stats().items()):
+            lines.append(f"{action}: n={summary['count']} p50={summary['p50']:.1f}ms "
+                         f"p95={summary['p95']:.1f}ms p99={summary['p99']:.1f}ms max={summary['max']:.1f}ms")
+        return "\n".join(lines)
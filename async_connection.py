@@ -0,0 +1,281 @@
+# asyncio version of the drone link:
+# AsyncDroneConnection speaks the same protocol as DroneConnection but runs on an
+# event loop instead of reader/writer threads, so one loop can drive many links.
+# The serial file descriptor is watched with loop.add_reader(), which needs a
+# selector event loop on a POSIX system.
+import asyncio
+import time
+
+import serial
+
+from ack_tracker import AckTracker
+from command_scheduler import EMERGENCY_ACTIONS
+from telemetry_buffer import TelemetryRingBuffer, EMPTY_TELEMETRY, merge_telemetry
+from protocol import JsonCodec, BinaryCodec, FrameDecoder, protocol_request, is_protocol_ack
+from protocol import takeoff_command, land_command, move_command, altitude_command, stop_command, status_request
+
+
+class AsyncDroneConnection:
+    """Non-blocking drone link for asyncio applications"""
+    def __init__(self, protocol="binary", ack_timeout=0.5, max_retries=2, telemetry_queue_size=64, write_limit=4096,
+                 history_size=32768):
+        self.serial_port = None
+        self.port_name = None
+        self.connected = False
+        self.baudrate = 115200
+        self.preferred_protocol = protocol
+        self.codec = JsonCodec()
+        self.decoder = FrameDecoder()
+        self.ack_tracker = AckTracker(ack_timeout, max_retries)
+        self.telemetry_queue_size = telemetry_queue_size
+        self.write_limit = write_limit  # Bytes buffered before send() waits for the port
+        self.telemetry = EMPTY_TELEMETRY
+        self.telemetry_history = TelemetryRingBuffer(history_size)
+        self._loop = None
+        self._write_buffer = bytearray()
+        self._writable = None
+        self._pending_acks = {}
+        self._subscribers = []
+        self._batch_tasks = set()  # Tasks running send_batch(), cancelled by a stop or land
+
+    async def connect(self, port, baudrate=115200):
+        """Open the port and start watching it on the running event loop"""
+        try:
+            if self.connected:
+                await self.disconnect()
+
+            self._loop = asyncio.get_running_loop()
+            # timeout=0 and write_timeout=0 make pyserial fully non-blocking
+            self.serial_port = serial.Serial(port, baudrate, timeout=0, write_timeout=0)
+            self.port_name = port
+            self.baudrate = baudrate
+            self.codec = JsonCodec()
+            self.decoder = FrameDecoder()
+            self._write_buffer.clear()
+            self._writable = asyncio.Event()
+            self._writable.set()
+            self.connected = True
+            self._loop.add_reader(self.serial_port.fileno(), self._on_readable)
+
+            if self.preferred_protocol == "binary":
+                await self.send(protocol_request(), wait_ack=False)
+            await self.send(status_request(), wait_ack=False)
+
+            return True, "Connected to drone on " + port
+        except serial.SerialException as e:
+            return False, f"Error connecting to port {port}: {str(e)}"
+        except Exception as e:
+            return False, f"Unexpected error: {str(e)}"
+
+    async def disconnect(self):
+        """Stop watching the port and close it"""
+        if not self.connected:
+            return False, "Not connected"
+        self._close(ConnectionError("Disconnected from drone"))
+        return True, "Disconnected from drone"
+
+    async def send(self, command, wait_ack=True):
+        """Write a command to the drone.
+
+        Flight commands are tagged with a sequence number and resent if the
+        ack is late. Returns a future that resolves to the drone's
+        acknowledgement (or raises asyncio.TimeoutError once the retries are
+        used up, and is cancelled if a newer setpoint or a stop or land makes
+        the command stale), or None if wait_ack is False or the command is not
+        acknowledged. Waits first if the port is not keeping up with writes.
+        """
+        if not self.connected:
+            raise ConnectionError("Not connected")
+
+        # Stop and land also end a plan in progress, including its pending pauses
+        if command.get("action") in EMERGENCY_ACTIONS:
+            current = asyncio.current_task()
+            for task in self._batch_tasks:
+                if task is not current:
+                    task.cancel()
+
+        await self._writable.wait()
+
+        ack = None
+        if wait_ack:
+            command = self.ack_tracker.tag(command)
+        seq = command.get("seq")
+        if seq is not None:
+            ack = self._loop.create_future()
+            # Callers may ignore the ack; don't log its timeout as an unretrieved exception
+            ack.add_done_callback(lambda future: future.cancelled() or future.exception())
+            self._pending_acks[seq] = ack
+
+        self._write_command(command)
+        return ack
+
+    async def send_batch(self, commands):
+        """Send a plan of commands in order. Pause steps wait here instead of being sent.
+
+        A stop or land sent while the plan runs cancels the rest of it.
+        """
+        task = asyncio.current_task()
+        self._batch_tasks.add(task)
+        try:
+            for command in commands:
+                if command.get("type") == "pause":
+                    await asyncio.sleep(command["seconds"])
+                elif not self.connected:
+                    return
+                else:
+                    await self.send(command)
+        finally:
+            self._batch_tasks.discard(task)
+
+    async def take_off(self, target_altitude=10):
+        """Command the drone to take off"""
+        return await self.send(takeoff_command(target_altitude))
+
+    async def land(self):
+        """Command the drone to land"""
+        return await self.send(land_command())
+
+    async def move(self, direction, speed):
+        """Command the drone to move in a direction"""
+        return await self.send(move_command(direction, speed))
+
+    async def change_altitude(self, target_altitude):
+        """Command the drone to change altitude"""
+        return await self.send(altitude_command(target_altitude))
+
+    async def stop(self):
+        """Command the drone to stop moving"""
+        return await self.send(stop_command())
+
+    def get_telemetry(self):
+        """Get the latest telemetry frame as a read-only snapshot"""
+        return self.telemetry
+
+    def get_latency_stats(self):
+        """Per command type round-trip latency percentiles in milliseconds"""
+        return self.ack_tracker.latency_stats()
+
+    async def telemetry_frames(self):
+        """Async iterator over telemetry frames as they arrive.
+
+        Each iterator gets its own bounded queue; if a consumer falls behind,
+        its oldest frames are dropped. Iteration ends when the link closes.
+        """
+        queue = asyncio.Queue(self.telemetry_queue_size)
+        self._subscribers.append(queue)
+        try:
+            while True:
+                frame = await queue.get()
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            if queue in self._subscribers:
+                self._subscribers.remove(queue)
+
+    def _on_readable(self):
+        """Event loop callback: the port has bytes waiting"""
+        try:
+            data = self.serial_port.read(self.serial_port.in_waiting or 1)
+        except (serial.SerialException, OSError) as e:
+            self._close(ConnectionError(f"Error reading response: {str(e)}"))
+            return
+
+        for response in self.decoder.decode(data):
+            self._process_response(response)
+
+    def _process_response(self, response):
+        """Process a decoded response from the drone"""
+        kind = response.get("type")
+        if kind == "telemetry":
+            self.telemetry = merge_telemetry(self.telemetry, response.get("data", {}))
+            self.telemetry_history.append(time.time(), self.telemetry)
+            for queue in self._subscribers:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(self.telemetry)
+        elif kind == "ack":
+            self.ack_tracker.acknowledge(response.get("seq"))
+            ack = self._pending_acks.pop(response.get("seq"), None)
+            if ack is not None and not ack.done():
+                ack.set_result(response)
+        elif is_protocol_ack(response):
+            self.codec = BinaryCodec()
+
+    def _write_command(self, command):
+        codec = JsonCodec() if command.get("type") == "protocol_request" else self.codec
+        try:
+            data = codec.encode(command)
+        except ValueError:
+            data = JsonCodec().encode(command)
+        self._write_buffer += data
+        self._flush()
+
+        seq = command.get("seq")
+        if seq is not None:
+            # A stop or land cancels unacknowledged flight commands; their acks are no longer awaited
+            for stale in self.ack_tracker.sent(command):
+                ack = self._pending_acks.pop(stale, None)
+                if ack is not None:
+                    ack.cancel()
+            self._loop.call_later(self.ack_tracker.timeout, self._check_ack, seq)
+
+    def _flush(self):
+        """Write as much of the buffer as the port accepts without blocking"""
+        try:
+            written = self.serial_port.write(self._write_buffer) or 0
+        except serial.SerialTimeoutException:
+            written = 0
+        except (serial.SerialException, OSError) as e:
+            self._close(ConnectionError(f"Error sending command: {str(e)}"))
+            return
+        del self._write_buffer[:written]
+
+        fd = self.serial_port.fileno()
+        if self._write_buffer:
+            self._loop.add_writer(fd, self._flush)
+        else:
+            self._loop.remove_writer(fd)
+
+        if len(self._write_buffer) > self.write_limit:
+            self._writable.clear()
+        else:
+            self._writable.set()
+
+    def _check_ack(self, seq):
+        """Timer callback: resend a command whose ack is overdue, or give up on it"""
+        if seq not in self._pending_acks or not self.connected:
+            return
+        retry = self.ack_tracker.check(seq)
+        if retry is not None:
+            self._write_command(retry)
+        elif seq in self.ack_tracker.pending:
+            # The timer fired a hair early, look again shortly
+            self._loop.call_later(self.ack_tracker.timeout / 10, self._check_ack, seq)
+        else:
+            ack = self._pending_acks.pop(seq)
+            if not ack.done():
+                ack.set_exception(asyncio.TimeoutError(f"No acknowledgement for command {seq}"))
+
+    def _close(self, reason):
+        if self.serial_port:
+            fd = self.serial_port.fileno()
+            self._loop.remove_reader(fd)
+            self._loop.remove_writer(fd)
+            try:
+                self.serial_port.close()
+            except Exception:
+                pass
+        self.connected = False
+        self._writable.set()
+
+        for ack in self._pending_acks.values():
+            if not ack.done():
+                ack.set_exception(reason)
+        self._pending_acks.clear()
+
+        # Wake every telemetry iterator so it can finish
+        for queue in self._subscribers:
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(None)
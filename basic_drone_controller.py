@@ -5,130 +5,11 @@ import tkinter as tk
 import threading
 import time
 from tkinter import scrolledtext, messagebox
+from command_parser import parse_command, parse_cache_report
+from output_log import OutputLog
+from simulation import DroneSimulator
+
 
-# class for drone simulator:
-class DroneSimulator:
-    def __init__(self):
-        self.altitude = 0
-        self.is_flying = False
-        self.default_altitude = 10  # meters
-        self.max_altitude = 120  # meters
-        self.ascent_rate = 1  # meters per second
-        self.descent_rate = 0.7  # meters per second
-        self.is_moving = False
-        self.direction = None
-        self.speed = 0  # meters per second
-        
-    def take_off(self):
-        """Command the drone to take off to default altitude"""
-        if not self.is_flying:
-            self.is_flying = True
-            return self._change_altitude(self.default_altitude)
-        else:
-            return "Drone is already flying!"
-    
-    def land(self):
-        """Command the drone to land"""
-        if self.is_flying:
-            self.is_flying = False
-            return self._change_altitude(0)
-        else:
-            return "Drone is already on the ground!"
-    
-    def ascend(self, target_altitude=None):
-        """Command the drone to ascend"""
-        if not self.is_flying:
-            return "Drone needs to take off first!"
-        
-        if target_altitude is None:
-            target_altitude = self.altitude + 5
-        
-        if target_altitude > self.max_altitude:
-            target_altitude = self.max_altitude
-            
-        return self._change_altitude(target_altitude)
-    
-    def descend(self, target_altitude=None):
-        """Command the drone to descend"""
-        if not self.is_flying:
-            return "Drone is not flying!"
-        
-        if target_altitude is None:
-            target_altitude = max(0, self.altitude - 5)
-            
-        return self._change_altitude(target_altitude)
-    
-    def _change_altitude(self, target_altitude):
-        """Simulate changing altitude with a progress report"""
-        if target_altitude == self.altitude:
-            return f"Already at {self.altitude}m altitude."
-        
-        start_altitude = self.altitude
-        message = []
-        
-        if target_altitude > start_altitude:
-            message.append(f"Ascending from {start_altitude}m to {target_altitude}m...")
-            rate = self.ascent_rate
-        else:
-            message.append(f"Descending from {start_altitude}m to {target_altitude}m...")
-            rate = self.descent_rate
-        
-        # Calculate time needed for altitude change
-        time_needed = abs(target_altitude - start_altitude) / rate
-        
-        # This would be where we'd actually send commands to a real drone
-        # For simulation, we'll just update the altitude
-        self.altitude = target_altitude
-        
-        if target_altitude == 0:
-            message.append(f"Landed safely after {time_needed:.1f} seconds.")
-        else:
-            message.append(f"Reached target altitude of {target_altitude}m in {time_needed:.1f} seconds.")
-        
-        return "\n".join(message)
-    
-    def move(self, direction, speed=5):
-        """Command the drone to move in a specific direction"""
-        if not self.is_flying:
-            return "Drone needs to take off first!"
-        
-        self.direction = direction
-        self.speed = speed
-        self.is_moving = True
-        
-        return f"Moving {direction} at {speed} m/s"
-    
-    def stop(self):
-        """Command the drone to stop moving"""
-        if not self.is_flying:
-            return "Drone is not flying!"
-        
-        if not self.is_moving:
-            return "Drone is already stationary!"
-        
-        self.is_moving = False
-        previous_direction = self.direction
-        self.direction = None
-        self.speed = 0
-        
-        return f"Stopped moving {previous_direction}"
-    
-    def get_status(self):
-        """Get the current status of the drone"""
-        status = []
-        
-        if self.is_flying:
-            status.append(f"Status: Flying at {self.altitude}m altitude")
-        else:
-            status.append("Status: Landed")
-            
-        if self.is_moving and self.direction:
-            status.append(f"Movement: {self.direction} at {self.speed} m/s")
-        else:
-            status.append("Movement: Stationary")
-            
-        return "\n".join(status)
-    
 # DroneControlApp:
 class DroneControlApp:
     def __init__(self, root):
@@ -139,6 +20,19 @@ class DroneControlApp:
         
         self.drone = DroneSimulator()
         self.command_history = []
+        # Parsed command name -> handler
+        self.command_handlers = {
+            "help": lambda command: self.show_help(),
+            "takeoff": lambda command: self.update_output(self.drone.take_off()),
+            "land": lambda command: self.update_output(self.drone.land()),
+            "ascend": lambda command: self.update_output(self.drone.ascend(command.altitude)),
+            "descend": lambda command: self.update_output(self.drone.descend(command.altitude)),
+            "move": lambda command: self.update_output(self.drone.move(command.direction, command.speed)),
+            "stop": lambda command: self.update_output(self.drone.stop()),
+            "status": lambda command: self.update_output(self.drone.get_status() + "\n" + parse_cache_report()),
+            "search": lambda command: self.output_log.show_search(command.args[0]),
+            "exit": lambda command: self.root.quit(),
+        }
         
         self._setup_ui()
         
@@ -165,6 +59,7 @@ class DroneControlApp:
         self.output_display = scrolledtext.ScrolledText(self.middle_frame, wrap=tk.WORD, height=20)
         self.output_display.pack(fill=tk.BOTH, expand=True)
         self.output_display.config(state=tk.DISABLED)
+        self.output_log = OutputLog(self.root, self.output_display)
         
         # Quick command buttons
         tk.Label(self.bottom_frame, text="Quick Commands:").pack(side=tk.LEFT)
@@ -189,10 +84,7 @@ class DroneControlApp:
         self.update_output("Drone Control System initialized. Type 'help' for available commands.")
     
     def update_output(self, message):
-        self.output_display.config(state=tk.NORMAL)
-        self.output_display.insert(tk.END, message + "\n\n")
-        self.output_display.see(tk.END)
-        self.output_display.config(state=tk.DISABLED)
+        self.output_log.write(message)
     
     def process_command(self, event=None):
         command = self.command_entry.get().strip().lower()
@@ -206,70 +98,14 @@ class DroneControlApp:
         self.command_history.append(command)
         
         # Process commands
-        if command in ("help", "commands"):
-            self.show_help()
-        
-        elif command in ("take off", "takeoff"):
-            response = self.drone.take_off()
-            self.update_output(response)
-        
-        elif command == "land":
-            response = self.drone.land()
-            self.update_output(response)
-        
-        elif command in ("up", "ascend"):
-            response = self.drone.ascend()
-            self.update_output(response)
-        
-        elif command in ("down", "descend"):
-            response = self.drone.descend()
-            self.update_output(response)
-        
-        elif command.startswith("ascend to "):
-            try:
-                altitude = float(command.split("to ")[1])
-                response = self.drone.ascend(altitude)
-                self.update_output(response)
-            except (ValueError, IndexError):
-                self.update_output("Invalid altitude. Please specify a number.")
-        
-        elif command.startswith("descend to "):
-            try:
-                altitude = float(command.split("to ")[1])
-                response = self.drone.descend(altitude)
-                self.update_output(response)
-            except (ValueError, IndexError):
-                self.update_output("Invalid altitude. Please specify a number.")
-        
-        elif command in ("forward", "backward", "left", "right"):
-            response = self.drone.move(command)
-            self.update_output(response)
-        
-        elif command.startswith(("go forward", "go backward", "go left", "go right")):
-            parts = command.split()
-            direction = parts[1]
-            speed = 5  # default speed
-            
-            if len(parts) > 2 and parts[2] == "at" and len(parts) > 3:
-                try:
-                    speed = float(parts[3])
-                except ValueError:
-                    self.update_output("Invalid speed. Using default 5 m/s.")
-            
-            response = self.drone.move(direction, speed)
-            self.update_output(response)
-        
-        elif command == "stop":
-            response = self.drone.stop()
-            self.update_output(response)
-        
-        elif command in ("status", "info"):
-            response = self.drone.get_status()
-            self.update_output(response)
-        
-        elif command in ("exit", "quit"):
-            self.root.quit()
-        
+        parsed = parse_command(command)
+        if parsed.warning:
+            self.update_output(parsed.warning)
+        handler = self.command_handlers.get(parsed.name)
+        if handler is not None:
+            handler(parsed)
+        elif parsed.error:
+            self.update_output(parsed.error)
         else:
             self.update_output(f"Unknown command: '{command}'. Type 'help' for available commands.")
     
@@ -286,6 +122,7 @@ Available Commands:
 - go [direction] at [speed]: Move with specific speed
 - stop: Stop moving
 - status/info: Show drone status
+- search [text]: Find earlier output, including lines no longer shown
 - help/commands: Show this help
 - exit/quit: Exit the program
         """
@@ -296,6 +133,7 @@ def main():
     root = tk.Tk()
     app = DroneControlApp(root)
     root.mainloop()
+    app.output_log.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,368 @@
+# Hot path benchmark suite:
+# Times the paths every prompt, command and telemetry frame goes through and
+# writes the numbers as JSON, so two runs (or a run and a saved baseline) can
+# be compared:
+#   parse           parse_plan() over the basic_commands.txt vocabulary
+#   execute_command the whole prompt handler of the connector app
+#   send            DroneConnection._send_raw_command() encode and write
+#   receive         FrameDecoder decode and _process_response() of telemetry
+#   roundtrip       commands acked by drone_emulator.py over a PTY
+#   simulator_step  DroneSimulator.step() with and without physics
+#   animate         one animation frame of the connector app
+# The two Tk benchmarks start Xvfb when there is no display (and are skipped
+# without it); everything else runs headless.
+#
+# Run from the repository root:
+#   python benchmarks/benchmark_suite.py --output results.json
+#   python benchmarks/benchmark_suite.py --baseline results.json
+# With --baseline, any throughput more than --tolerance below the baseline is
+# reported and the exit status is 1.
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from command_parser import parse_plan
+from connector import DroneConnection
+from drone_emulator import DroneEmulator
+from protocol import (BinaryCodec, FrameDecoder, JsonCodec, altitude_command, move_command, stop_command,
+                      takeoff_command)
+from simulation import DroneSimulator
+
+REPEAT = 5  # Timing runs per measurement; the fastest one counts
+TOLERANCE = 0.25  # Fraction of a baseline throughput that may be lost before it counts as a regression
+
+
+def vocabulary(path=os.path.join(ROOT, "basic_commands.txt")):
+    """Prompts for every command listed in basic_commands.txt"""
+    prompts = []
+    with open(path, encoding="utf-8") as commands:
+        for line in commands:
+            if line.startswith("#") or ":" not in line:
+                continue
+            names = line.split(":", 1)[0].replace("/", ",").split(",")
+            prompts.extend(name.strip().replace("[number]", "25") for name in names if name.strip())
+    return prompts
+
+
+def measure(function, number, repeat=REPEAT, setup="pass"):
+    """Best of `repeat` runs of `number` calls, as rates. setup runs before each run"""
+    seconds = min(timeit.Timer(function, setup).repeat(repeat, number)) / number
+    return {"per_second": round(1 / seconds, 1), "ns_per_call": round(seconds * 1e9, 1)}
+
+
+class NullPort:
+    """Serial port stand-in that accepts and discards every write"""
+    def write(self, data):
+        return len(data)
+
+    def flush(self):
+        pass
+
+
+def telemetry_message(step):
+    return {"type": "telemetry", "data": {
+        "altitude": 10 + step % 7, "x_position": step * 0.1, "y_position": 0.0, "battery": 90,
+        "attitude": {"roll": 0.5, "pitch": -0.5, "yaw": step % 360}}}
+
+
+def bench_parse(quick):
+    prompts = vocabulary()
+    number = 200 if quick else 2000
+    result = measure(lambda: [parse_plan(prompt) for prompt in prompts], number)
+    return {"prompts": len(prompts), "per_second": round(result["per_second"] * len(prompts), 1),
+            "ns_per_prompt": round(result["ns_per_call"] / len(prompts), 1)}
+
+
+def bench_send(quick):
+    number = 2000 if quick else 20000
+    commands = [takeoff_command(12), move_command("forward", 5), altitude_command(20), stop_command()]
+    results = {}
+    for name, codec in (("json", JsonCodec()), ("binary", BinaryCodec())):
+        connection = DroneConnection()
+        connection.serial_port = NullPort()
+        connection.connected = True
+        connection.codec = codec
+        tagged = [dict(command, seq=seq) for seq, command in enumerate(commands, 1)]
+        send_all = lambda: [connection._send_raw_command(command) for command in tagged]
+        send_all()
+        size = connection.bandwidth.stats["bytes"] / len(tagged)
+        result = measure(send_all, number)
+        results[name] = {"per_second": round(result["per_second"] * len(tagged), 1),
+                         "bytes_per_command": round(size, 1)}
+    return results
+
+
+def bench_receive(quick):
+    frames = 200 if quick else 2000
+    results = {}
+    for name, codec in (("json", JsonCodec()), ("binary", BinaryCodec())):
+        stream = b"".join(codec.encode(telemetry_message(step)) for step in range(frames))
+        decoded = list(FrameDecoder().decode(stream))
+        connection = DroneConnection()
+        decode = measure(lambda: sum(1 for _ in FrameDecoder().decode(stream)), 5 if quick else 20)
+        process = measure(lambda: [connection._process_response(message) for message in decoded],
+                          5 if quick else 20)
+        results[name] = {
+            "bytes_per_frame": round(len(stream) / frames, 1),
+            "decode_per_second": round(decode["per_second"] * frames, 1),
+            "process_per_second": round(process["per_second"] * frames, 1),
+        }
+    return results
+
+
+def bench_roundtrip(quick, rate=1000.0):
+    """Sequential command round trips to the emulator while it streams telemetry at `rate` Hz"""
+    count = 100 if quick else 1000
+    commands = [move_command("forward", 3), altitude_command(15), move_command("left", 2), stop_command()]
+    results = {}
+    for name, binary in (("json", False), ("binary", True)):
+        with DroneEmulator(rate, binary=binary) as emulator:
+            connection = DroneConnection(protocol="binary" if binary else "json")
+            connection.command_interval = 0  # Only the acks and the link's byte budget pace the commands
+            connected, message = connection.connect(emulator.port)
+            if not connected:
+                return {"skipped": message}
+            try:
+                connection.take_off(12)
+                if not _wait_for(lambda: connection.ack_tracker.stats["acked"] >= 1, 2.0):
+                    return {"skipped": "The emulator did not acknowledge takeoff"}
+                frames_before = connection.decoder.frames_decoded
+                start = time.perf_counter()
+                for number in range(count):
+                    connection.send_command(commands[number % len(commands)])
+                    if not _wait_for(lambda: connection.ack_tracker.stats["acked"] >= number + 2, 2.0):
+                        break
+                elapsed = time.perf_counter() - start
+                acked = connection.ack_tracker.stats["acked"] - 1
+                latency = connection.get_latency_stats()
+                samples = [stats for action, stats in latency.items() if action != "takeoff"]
+                results[name] = {
+                    "commands": acked,
+                    "per_second": round(acked / elapsed, 1),
+                    "latency_ms": {key: round(max(stats[key] for stats in samples), 3)
+                                   for key in ("p50", "p95", "p99", "max")} if samples else None,
+                    "frames_per_second": round((connection.decoder.frames_decoded - frames_before) / elapsed, 1),
+                    "bad_frames": connection.decoder.bad_frames,
+                    "throttled": connection.bandwidth.stats["throttled"],  # Frames held back by the link budget
+                }
+            finally:
+                connection.disconnect()
+    return results
+
+
+def _wait_for(condition, timeout):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        if time.perf_counter() > deadline:
+            return False
+        time.sleep(0.0001)
+    return True
+
+
+def airborne_drone(physics):
+    """A drone flying forward at altitude that stays airborne however long it is stepped"""
+    drone = DroneSimulator(physics=physics)
+    # A flat battery lands the drone, after which step() returns at once
+    drone.hover_drain = drone.speed_drain = 0
+    drone.take_off()
+    drone.move("forward", 5)
+    drone.run(15)  # Climbed and up to speed
+    return drone
+
+
+def bench_simulator_step(quick):
+    number = 20000 if quick else 200000
+    results = {}
+    for name, physics in (("kinematic", False), ("physics", True)):
+        flight = {}
+
+        def setup():
+            flight["drone"] = airborne_drone(physics)
+
+        results[name] = measure(lambda: flight["drone"].step(0.02), number, setup=setup)
+        if not flight["drone"].is_flying:
+            raise RuntimeError(f"{name} drone landed during the benchmark")
+    return results
+
+
+def open_display():
+    """Make sure Tk has a display, starting Xvfb if needed. Returns (Xvfb process or None, error)"""
+    import tkinter as tk
+    if not os.environ.get("DISPLAY"):
+        if not shutil.which("Xvfb"):
+            return None, "no display and Xvfb is not installed"
+        display = f":{90 + os.getpid() % 100}"
+        server = subprocess.Popen(["Xvfb", display, "-nolisten", "tcp", "-screen", "0", "1280x1024x24"],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        os.environ["DISPLAY"] = display
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                tk.Tk().destroy()
+                return server, None
+            except tk.TclError as e:
+                if server.poll() is not None or time.monotonic() > deadline:
+                    server.terminate()
+                    return None, f"Xvfb did not start: {str(e)}"
+                time.sleep(0.1)
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        return None, str(e)
+    return None, None
+
+
+def bench_tk(quick):
+    """execute_command and animate on a real (possibly virtual) display"""
+    server, error = open_display()
+    if error:
+        skipped = {"skipped": error}
+        return skipped, skipped
+    import tkinter as tk
+    from connector import DroneControlApp
+    root = tk.Tk()
+    app = DroneControlApp(root)
+    root.update()
+    try:
+        prompts = vocabulary()
+        number = 20 if quick else 200
+
+        def run_prompts():
+            for prompt in prompts:
+                app.execute_command(prompt)
+            app.output_log.flush()
+
+        result = measure(run_prompts, number)
+        execute = {"prompts": len(prompts), "per_second": round(result["per_second"] * len(prompts), 1),
+                   "ns_per_prompt": round(result["ns_per_call"] / len(prompts), 1)}
+
+        # A flying, moving drone: every frame moves the items and spins the propellers
+        app.drone.take_off()
+        app.drone.move("forward", 5)
+        frames = 200 if quick else 2000
+        draw_only = measure(app.animate, frames)
+
+        def frame():
+            app.animate()
+            root.update_idletasks()
+
+        with_redraw = measure(frame, frames)
+        animate = {"per_second": draw_only["per_second"], "ns_per_frame": draw_only["ns_per_call"],
+                   "with_redraw_per_second": with_redraw["per_second"],
+                   "with_redraw_ns_per_frame": with_redraw["ns_per_call"]}
+        return execute, animate
+    finally:
+        app.output_log.close()
+        app.port_scanner.close()
+        app.fleet.close()
+        root.destroy()
+        if server is not None:
+            server.terminate()
+
+
+def run(selected, quick):
+    benchmarks = {
+        "parse": bench_parse,
+        "send": bench_send,
+        "receive": bench_receive,
+        "roundtrip": bench_roundtrip,
+        "simulator_step": bench_simulator_step,
+    }
+    results = {}
+    for name, function in benchmarks.items():
+        if name in selected:
+            print(f"Running {name}...", file=sys.stderr)
+            results[name] = function(quick)
+    if "execute_command" in selected or "animate" in selected:
+        print("Running execute_command and animate...", file=sys.stderr)
+        execute, animate = bench_tk(quick)
+        for name, result in (("execute_command", execute), ("animate", animate)):
+            if name in selected:
+                results[name] = result
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def throughputs(results, prefix=""):
+    """Flatten every *per_second figure of a result tree to {dotted path: value}"""
+    found = {}
+    for key, value in results.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            found.update(throughputs(value, path + "."))
+        elif key.endswith("per_second") and isinstance(value, (int, float)):
+            found[path] = value
+    return found
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing every throughput that fell more than `tolerance` below the baseline"""
+    current = throughputs(results)
+    regressions = []
+    for path, before in throughputs(baseline).items():
+        after = current.get(path)
+        if after is not None and before > 0 and after < before * (1 - tolerance):
+            regressions.append(f"{path}: {after:.1f}/s, baseline {before:.1f}/s ({after / before - 1:+.0%})")
+    return regressions
+
+
+ALL_BENCHMARKS = ("parse", "execute_command", "send", "receive", "roundtrip", "simulator_step", "animate")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the command, link and render hot paths")
+    parser.add_argument("--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("--only", nargs="+", choices=ALL_BENCHMARKS, help="run only these benchmarks")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations, for a smoke test")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE,
+                        help="fraction of a baseline throughput that may be lost (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": args.quick,
+        },
+        "results": run(args.only or ALL_BENCHMARKS, args.quick),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            output.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(report["results"], baseline.get("results", {}), args.tolerance)
+        for line in regressions:
+            print(f"Regression: {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against the baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+# Parse cost benchmark:
+# Times parse_command() on typical prompts and prints the cost per command,
+# both for a full parse and for a repeated prompt served from the cache.
+# Run from the repository root: python benchmarks/parse_benchmark.py
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from command_parser import parse_command, _parse_normalized
+
+PROMPTS = [
+    "take off",
+    "land",
+    "ascend",
+    "ascend to 25",
+    "descend to 3.5",
+    "forward",
+    "go left at 7",
+    "go right at fast",
+    "stop",
+    "status",
+    "telemetry 30",
+    "fleet add drone1 /dev/ttyUSB0",
+    "do a barrel roll",
+]
+
+
+def main(number=100000):
+    parse_uncached = _parse_normalized.__wrapped__
+    print(f"{'prompt':32} {'result':10} {'ns/parse':>9} {'ns/cached':>10}")
+    for prompt in PROMPTS:
+        normalized = " ".join(prompt.lower().split())
+        parse_seconds = timeit.timeit(lambda: parse_uncached(normalized), number=number)
+        cached_seconds = timeit.timeit(lambda: parse_command(prompt), number=number)
+        print(f"{prompt:32} {parse_command(prompt).name:10} {parse_seconds / number * 1e9:9.0f} "
+              f"{cached_seconds / number * 1e9:10.0f}")
+
+
+if __name__ == "__main__":
+    main()
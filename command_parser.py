@@ -0,0 +1,242 @@
+# Command grammar shared by the control apps:
+# parse_command() turns a prompt into a Command. The first word picks a
+# parser from a dispatch table and any arguments are read with precompiled
+# patterns, so parsing costs one dict lookup however many verbs there are.
+# The apps then run the Command from their own table of handlers.
+# Commands are immutable, so parses are cached by normalised prompt text and
+# repeated prompts (buttons, scripts, replays) skip parsing altogether.
+import functools
+import math
+import re
+from typing import NamedTuple, Optional, Tuple
+
+DIRECTION_WORDS = ("forward", "backward", "left", "right")
+DEFAULT_SPEED = 5  # m/s when a move gives no speed
+PARSE_CACHE_SIZE = 256  # Distinct prompts remembered
+
+ALTITUDE_ARGS = re.compile(r"to\s+(.+)")
+PLAN_SEPARATOR = re.compile(r"\s*(?:[,;]|\bthen\b|\band\b)\s*")
+PLAN_STEPS = ("takeoff", "land", "ascend", "descend", "move", "stop", "wait")  # Allowed in compound prompts
+GO_ARGS = re.compile(r"(forward|backward|left|right)(?:\s+at\s+(\S+))?(?:\s|$)")
+
+
+class Command(NamedTuple):
+    """A parsed prompt (immutable and hashable).
+
+    name is the canonical verb ("takeoff", "ascend", "move", ...), or
+    "unknown" when nothing matched and "invalid" when the verb matched but
+    its arguments did not (error says why). warning is set when the command
+    still runs but part of it was ignored.
+    """
+    name: str
+    text: str
+    altitude: Optional[float] = None
+    direction: Optional[str] = None
+    speed: Optional[float] = None
+    seconds: Optional[float] = None
+    args: Tuple[str, ...] = ()
+    error: Optional[str] = None
+    warning: Optional[str] = None
+
+
+def _quantity(value):
+    """Parse a finite number that is 0 or more, or raise ValueError"""
+    number = float(value)
+    if not math.isfinite(number) or number < 0:
+        raise ValueError(f"Not a usable quantity: {value}")
+    return number
+
+
+def _bare(name):
+    """Parser for a verb that takes no arguments"""
+    def parse(text, rest):
+        return None if rest else Command(name, text)
+    return parse
+
+
+def _take(text, rest):
+    return Command("takeoff", text) if rest == "off" else None
+
+
+def _altitude(name):
+    """Parser for up/down style verbs: bare, or 'to <altitude>'"""
+    def parse(text, rest):
+        if not rest:
+            return Command(name, text)
+        match = ALTITUDE_ARGS.fullmatch(rest)
+        if match is None:
+            return None
+        try:
+            return Command(name, text, altitude=_quantity(match.group(1)))
+        except ValueError:
+            return Command("invalid", text, error="Invalid altitude. Please specify a number of meters, 0 or more.")
+    return parse
+
+
+def _direction(text, rest):
+    return None if rest else Command("move", text, direction=text, speed=DEFAULT_SPEED)
+
+
+def _go(text, rest):
+    match = GO_ARGS.match(rest)
+    if match is None:
+        return None
+    direction, speed = match.groups()
+    if speed is None:
+        return Command("move", text, direction=direction, speed=DEFAULT_SPEED)
+    try:
+        speed = float(speed)
+    except ValueError:
+        return Command("move", text, direction=direction, speed=DEFAULT_SPEED,
+                       warning=f"Invalid speed. Using default {DEFAULT_SPEED} m/s.")
+    if not math.isfinite(speed) or speed < 0:
+        return Command("invalid", text, error="Invalid speed. Please specify a number of m/s, 0 or more.")
+    return Command("move", text, direction=direction, speed=speed)
+
+
+def _telemetry(text, rest):
+    try:
+        seconds = _quantity(rest.split()[0]) if rest else 10
+    except ValueError:
+        seconds = 10
+    return Command("telemetry", text, seconds=seconds)
+
+
+def _fleet(text, rest):
+    # The subcommand and drone ID ignore case; a port name (fleet add <id> <port>) keeps it
+    args = rest.split()
+    return Command("fleet", text, args=tuple(arg.lower() for arg in args[:2]) + tuple(args[2:]))
+
+
+def _wait(text, rest):
+    try:
+        return Command("wait", text, seconds=_quantity(rest))
+    except ValueError:
+        return Command("invalid", text, error="Invalid duration. Please specify a number of seconds, 0 or more.")
+
+
+def _run(text, rest):
+    return Command("run", text, args=(rest,)) if rest else None
+
+
+def _search(text, rest):
+    return Command("search", text, args=(rest,)) if rest else None
+
+
+def _perf(text, rest):
+    return Command("perf", text, args=tuple(rest.split()))
+
+
+def _record(text, rest):
+    return Command("record", text, args=tuple(rest.split()))
+
+
+def _replay(text, rest):
+    return Command("replay", text, args=tuple(rest.split())) if rest else None
+
+
+# First word -> parser for the rest of the prompt
+PARSERS = {
+    "help": _bare("help"),
+    "commands": _bare("help"),
+    "take": _take,
+    "takeoff": _bare("takeoff"),
+    "land": _bare("land"),
+    "up": _bare("ascend"),
+    "ascend": _altitude("ascend"),
+    "down": _bare("descend"),
+    "descend": _altitude("descend"),
+    "go": _go,
+    "stop": _bare("stop"),
+    "status": _bare("status"),
+    "info": _bare("status"),
+    "telemetry": _telemetry,
+    "latency": _bare("latency"),
+    "perf": _perf,
+    "fleet": _fleet,
+    "wait": _wait,
+    "run": _run,
+    "search": _search,
+    "record": _record,
+    "replay": _replay,
+    "reset": _bare("reset"),
+    "yes": _bare("confirm"),
+    "exit": _bare("exit"),
+    "quit": _bare("exit"),
+}
+PARSERS.update((word, _direction) for word in DIRECTION_WORDS)
+RAW_ARGUMENT_VERBS = ("run", "record", "replay", "fleet")  # Verbs whose argument (a file or port name) keeps its case
+
+
+def parse_command(text):
+    """Parse one prompt into a Command"""
+    text = " ".join(text.split())
+    verb, _, rest = text.partition(" ")
+    verb = verb.lower()
+    if verb in RAW_ARGUMENT_VERBS:
+        return _parse_normalized(f"{verb} {rest}" if rest else verb)
+    return _parse_normalized(text.lower())
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_normalized(text):
+    verb, _, rest = text.partition(" ")
+    parser = PARSERS.get(verb)
+    command = parser(text, rest) if parser else None
+    return command or Command("unknown", text)
+
+
+def parse_plan(text):
+    """Parse a prompt into a tuple of Commands.
+
+    A prompt that is a command on its own gives a single step. Otherwise it
+    is split on commas, semicolons, 'then' and 'and', so "take off, ascend
+    to 30 then go forward at 4 and stop" gives four steps. Only prompts that
+    start with a flight step are split; "search takeoff, land" stays whole.
+    """
+    text = " ".join(text.split())
+    if text.partition(" ")[0].lower() in RAW_ARGUMENT_VERBS or not PLAN_SEPARATOR.search(text):
+        return (parse_command(text),)
+    plan = _parse_compound(text.lower())
+    if plan[0].name not in PLAN_STEPS and plan[0].name != "invalid":
+        return (parse_command(text),)
+    return plan
+
+
+@functools.lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_compound(text):
+    parts = [part for part in PLAN_SEPARATOR.split(text) if part]
+    return tuple(parse_command(part) for part in parts) or (Command("unknown", text),)
+
+
+def validate_plan(plan, flying=False):
+    """Check a whole plan before any of it runs.
+
+    Every step must be a flight step that makes sense after the ones
+    before it, starting from the given flying state. Returns an error
+    message, or None if the plan is good.
+    """
+    for number, command in enumerate(plan, 1):
+        problem = None
+        if command.name not in PLAN_STEPS:
+            problem = command.error or ("unknown command" if command.name == "unknown" else "not a flight step")
+        elif command.name == "takeoff":
+            problem = "drone is already flying" if flying else None
+            flying = True
+        elif command.name == "land":
+            problem = None if flying else "drone is not flying"
+            flying = False
+        elif command.name != "wait" and not flying:
+            problem = "drone needs to take off first"
+        if problem:
+            return f"Step {number} '{command.text}': {problem}"
+    return None
+
+
+def parse_cache_report():
+    """One line of parse cache statistics for the status output"""
+    info = _parse_normalized.cache_info()
+    lookups = info.hits + info.misses
+    rate = info.hits / lookups * 100 if lookups else 0
+    return (f"Parser cache: {info.hits} hits, {info.misses} misses ({rate:.0f}% hit rate), "
+            f"{info.currsize}/{info.maxsize} prompts")
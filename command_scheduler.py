@@ -0,0 +1,241 @@
+# Command scheduler for the drone link:
+# Outgoing commands are sorted into priority lanes so that an emergency stop or
+# landing never waits behind a backlog of movement setpoints. Multi-step plans
+# get their own lane that keeps its order and is never coalesced.
+# Setpoints (moves and altitude targets) replace an older pending setpoint of
+# the same kind, so a burst of button presses only sends the newest one, and
+# a TokenBucket keeps the writer within the serial link's bandwidth.
+import threading
+import time
+from collections import deque
+
+# Priority classes, lowest number is sent first
+PRIORITY_EMERGENCY = 0  # stop, land
+PRIORITY_CONTROL = 1    # takeoff, altitude changes, status requests
+PRIORITY_PLAN = 2       # steps of a compound command, sent strictly in order
+PRIORITY_SETPOINT = 3   # velocity setpoints
+
+EMERGENCY_ACTIONS = ("stop", "land")
+SETPOINT_ACTIONS = ("move",)
+COALESCED_ACTIONS = ("stop", "land", "move", "altitude")  # Only the newest pending one matters
+
+
+def command_priority(command):
+    """Return the priority class of a command dictionary"""
+    action = command.get("action")
+    if action in EMERGENCY_ACTIONS:
+        return PRIORITY_EMERGENCY
+    if action in SETPOINT_ACTIONS:
+        return PRIORITY_SETPOINT
+    return PRIORITY_CONTROL
+
+
+def pause_command(seconds):
+    """Plan step that holds the rest of the plan back; it is never sent to the drone"""
+    return {"type": "pause", "seconds": seconds}
+
+
+class CommandScheduler:
+    """Bounded, thread-safe priority queue of commands waiting to be sent.
+
+    Producers (the UI thread) call push(); the link's writer thread blocks in
+    get(). The lock is only held for constant-time deque operations.
+    """
+    def __init__(self, max_depth=32):
+        self.max_depth = max_depth
+        self.lanes = (deque(), deque(), deque(), deque())
+        self.condition = threading.Condition()
+        self.closed = False
+        self.stats = {
+            "queued": 0,
+            "sent": 0,
+            "coalesced": 0,
+            "preempted": 0,
+            "rejected": 0,
+        }
+
+    def __len__(self):
+        return sum(len(lane) for lane in self.lanes)
+
+    def push(self, command):
+        """Queue a command. Returns False if the queue is full (backpressure)"""
+        priority = command_priority(command)
+        action = command.get("action")
+        lane = self.lanes[priority]
+
+        with self.condition:
+            if priority == PRIORITY_EMERGENCY:
+                # Stop and land make every pending setpoint and plan step stale
+                self._drop_lane(PRIORITY_SETPOINT)
+                self._drop_lane(PRIORITY_PLAN)
+                if action == "land":
+                    self._drop_lane(PRIORITY_CONTROL, keep=lambda c: c.get("action") not in ("takeoff", "altitude"))
+
+            # Coalesce with the newest pending command of the same kind
+            if lane and action in COALESCED_ACTIONS and lane[-1].get("action") == action:
+                lane[-1] = command
+                self.stats["coalesced"] += 1
+                self.condition.notify()
+                return True
+
+            if len(self) >= self.max_depth:
+                if priority != PRIORITY_EMERGENCY or not self._evict_lowest():
+                    self.stats["rejected"] += 1
+                    return False
+
+            lane.append(command)
+            self.stats["queued"] += 1
+            self.condition.notify()
+            return True
+
+    def push_retry(self, command):
+        """Queue a resend of an unacknowledged command at the front of its lane.
+
+        A retry is older than anything queued, so it neither preempts nor
+        coalesces, and it is accepted even when the queue is full. It still
+        waits for the command spacing and the link's byte budget.
+        """
+        with self.condition:
+            self.lanes[command_priority(command)].appendleft(command)
+            self.condition.notify()
+
+    def push_batch(self, commands):
+        """Queue a whole plan in order, or nothing if it does not fit.
+
+        Plan steps are neither coalesced nor reordered by priority, but a
+        later stop or land pushed on its own still cancels what is left.
+        """
+        with self.condition:
+            if len(self) + len(commands) > self.max_depth:
+                self.stats["rejected"] += len(commands)
+                return False
+            self.lanes[PRIORITY_PLAN].extend(commands)
+            self.stats["queued"] += len(commands)
+            self.condition.notify()
+            return True
+
+    def get(self, ready_at=0, timeout=None):
+        """Wait for the next command to send.
+
+        Normal commands are held until time.monotonic() reaches ready_at;
+        emergency commands are returned immediately. Returns None if the
+        scheduler is closed or the timeout expires.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.condition:
+            while not self.closed:
+                if self.lanes[PRIORITY_EMERGENCY]:
+                    return self._pop(PRIORITY_EMERGENCY)
+
+                now = time.monotonic()
+                pending = any(self.lanes)
+                if pending and now >= ready_at:
+                    for priority in (PRIORITY_CONTROL, PRIORITY_PLAN, PRIORITY_SETPOINT):
+                        if self.lanes[priority]:
+                            return self._pop(priority)
+
+                wait = ready_at - now if pending else None
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self.condition.wait(wait)
+        return None
+
+    def close(self):
+        """Wake any waiting consumer and make get() return None"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def reopen(self):
+        with self.condition:
+            self.closed = False
+
+    def clear(self):
+        with self.condition:
+            for lane in self.lanes:
+                lane.clear()
+
+    def get_stats(self):
+        """Return a copy of the counters plus the current depth of each lane"""
+        with self.condition:
+            stats = dict(self.stats)
+            stats["depth"] = len(self)
+            stats["max_depth"] = self.max_depth
+            stats["emergency"] = len(self.lanes[PRIORITY_EMERGENCY])
+            stats["control"] = len(self.lanes[PRIORITY_CONTROL])
+            stats["plan"] = len(self.lanes[PRIORITY_PLAN])
+            stats["setpoint"] = len(self.lanes[PRIORITY_SETPOINT])
+        return stats
+
+    def format_report(self):
+        """One line summary of the queue counters for the UI"""
+        stats = self.get_stats()
+        return (f"Queue: {stats['depth']}/{stats['max_depth']} pending, {stats['sent']} sent, "
+                f"{stats['coalesced']} merged, {stats['preempted'] + stats['rejected']} dropped "
+                f"({stats['preempted']} preempted, {stats['rejected']} rejected)")
+
+    def _pop(self, priority):
+        self.stats["sent"] += 1
+        return self.lanes[priority].popleft()
+
+    def _drop_lane(self, priority, keep=None):
+        lane = self.lanes[priority]
+        before = len(lane)
+        if keep is None:
+            lane.clear()
+        else:
+            kept = [command for command in lane if keep(command)]
+            lane.clear()
+            lane.extend(kept)
+        self.stats["preempted"] += before - len(lane)
+
+    def _evict_lowest(self):
+        """Make room for an emergency command by dropping the newest low-priority one"""
+        for priority in (PRIORITY_SETPOINT, PRIORITY_CONTROL):
+            if self.lanes[priority]:
+                self.lanes[priority].pop()
+                self.stats["preempted"] += 1
+                return True
+        return False
+
+
+class TokenBucket:
+    """Byte budget for a link that refills at `rate` bytes per second.
+
+    The writer spends the size of every frame it sends, so the balance can
+    go negative; ready_at() is when it is back to zero and the next frame
+    may go out. Used by a single writer thread, so it has no lock.
+    """
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.stats = {"bytes": 0, "throttled": 0}
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def spend(self, size, now=None):
+        """Record a frame of `size` bytes that was just written"""
+        self._refill(time.monotonic() if now is None else now)
+        self.tokens -= size
+        self.stats["bytes"] += size
+        if self.tokens < 0:
+            self.stats["throttled"] += 1
+
+    def ready_at(self, now=None):
+        """Monotonic time at which the budget is no longer overdrawn"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        return now if self.tokens >= 0 else now - self.tokens / self.rate
+
+
+def link_bucket(baudrate, burst_seconds=0.1):
+    """TokenBucket for a serial link: 10 bits per byte on the wire (8N1)"""
+    rate = baudrate / 10
+    return TokenBucket(rate, max(64, rate * burst_seconds))
@@ -3,31 +3,52 @@ import tkinter as tk
 import threading
 import time
 import math
+import os
+import sys
 import serial
 import serial.tools.list_ports
-import json
-import struct
 from tkinter import scrolledtext, messagebox, Canvas, ttk
+from collections import deque
+from command_scheduler import CommandScheduler, pause_command, link_bucket
+from ack_tracker import AckTracker
+from fleet import FleetManager
+from mission_runner import MissionRunner, SIMULATOR_ACTIONS
+from command_parser import parse_plan, validate_plan, parse_cache_report, PARSERS
+from output_log import OutputLog
+from port_scanner import PortScanner, when_done, REFRESH_INTERVAL
+from flight_recorder import FlightRecorder, FlightLog, FlightReplay
+from renderer import DroneRenderer, FrameScheduler
+from intent_classifier import IntentClassifier
+from instrumentation import Instrumentation, SamplingProfiler
+from simulation import DroneSimulator
+from telemetry_buffer import TelemetryRingBuffer, EMPTY_TELEMETRY, merge_telemetry
+from protocol import JsonCodec, BinaryCodec, FrameDecoder, decode_frame, protocol_request, is_protocol_ack
+from protocol import takeoff_command, land_command, move_command, altitude_command, stop_command, status_request
 
 class DroneConnection:
     """Class to handle communication with a physical drone via USB"""
-    def __init__(self):
+    def __init__(self, max_queue_depth=32, protocol="binary", ack_timeout=0.5, max_retries=2,
+                 history_size=32768):
         self.serial_port = None
         self.connected = False
         self.available_ports = []
         self.baudrate = 115200  # Default baudrate
-        self.connection_thread = None
+        self.read_timeout = 1  # Seconds a blocking read may wait before rechecking stop_thread
+        self.reader_thread = None
+        self.writer_thread = None
         self.stop_thread = False
         self.last_command_time = 0
         self.command_interval = 0.05  # Minimum seconds between commands
-        self.command_queue = []
-        self.telemetry = {
-            "altitude": 0,
-            "x_position": 0,
-            "y_position": 0,
-            "battery": 100,
-            "attitude": {"roll": 0, "pitch": 0, "yaw": 0}
-        }
+        self.command_queue = CommandScheduler(max_queue_depth)
+        self.bandwidth = link_bucket(self.baudrate)  # Keeps the writer within the link's byte rate
+        self.preferred_protocol = protocol  # "binary" to negotiate, "json" to never switch
+        self.codec = JsonCodec()
+        self.decoder = FrameDecoder()
+        self.ack_tracker = AckTracker(ack_timeout, max_retries)
+        # Replaced (never mutated) by the reader thread, see merge_telemetry()
+        self.telemetry = EMPTY_TELEMETRY
+        self.telemetry_history = TelemetryRingBuffer(history_size)
+        self.recorder = None  # FlightRecorder that also gets every telemetry frame
     
     def scan_ports(self):
         """Scan for available serial ports"""
@@ -40,18 +61,30 @@ class DroneConnection:
             if self.connected:
                 self.disconnect()
                 
-            self.serial_port = serial.Serial(port, baudrate, timeout=1)
+            self.serial_port = serial.Serial(port, baudrate, timeout=self.read_timeout)
             self.baudrate = baudrate
+            self.bandwidth = link_bucket(baudrate)
             self.connected = True
             self.stop_thread = False
-            
-            # Start the communication thread
-            self.connection_thread = threading.Thread(target=self._communication_loop)
-            self.connection_thread.daemon = True
-            self.connection_thread.start()
-            
+            self.command_queue.reopen()
+            self.codec = JsonCodec()  # Every firmware starts in JSON mode
+            self.decoder = FrameDecoder()
+
+            # Start the reader and writer threads
+            self.reader_thread = threading.Thread(target=self._reader_loop)
+            self.reader_thread.daemon = True
+            self.reader_thread.start()
+
+            self.writer_thread = threading.Thread(target=self._writer_loop)
+            self.writer_thread.daemon = True
+            self.writer_thread.start()
+
+            # Offer binary framing; old firmware ignores this and we stay on JSON
+            if self.preferred_protocol == "binary":
+                self.send_command(protocol_request())
+
             # Send connection status request
-            self.send_command({"type": "status_request"})
+            self.send_command(status_request())
             
             return True, "Connected to drone on " + port
         except serial.SerialException as e:
@@ -63,10 +96,20 @@ class DroneConnection:
         """Disconnect from the serial port"""
         if self.connected:
             self.stop_thread = True
-            # Wait for the thread to finish
-            if self.connection_thread and self.connection_thread.is_alive():
-                self.connection_thread.join(timeout=1.0)
-            
+            self.command_queue.close()
+
+            # Interrupt a blocking read so the reader notices stop_thread
+            if self.serial_port and hasattr(self.serial_port, "cancel_read"):
+                try:
+                    self.serial_port.cancel_read()
+                except Exception:
+                    pass
+
+            # Wait for the threads to finish
+            for thread in (self.reader_thread, self.writer_thread):
+                if thread and thread.is_alive() and thread is not threading.current_thread():
+                    thread.join(timeout=1.0)
+
             if self.serial_port:
                 try:
                     self.serial_port.close()
@@ -77,304 +120,210 @@ class DroneConnection:
             return True, "Disconnected from drone"
         return False, "Not connected"
     
-    def _communication_loop(self):
-        """Background thread to handle serial communication"""
+    def _reader_loop(self):
+        """Background thread that blocks on the serial port until data arrives"""
         while not self.stop_thread:
             try:
-                # Check if there are commands to send
-                if self.command_queue and time.time() - self.last_command_time >= self.command_interval:
-                    command = self.command_queue.pop(0)
-                    self._send_raw_command(command)
-                    self.last_command_time = time.time()
-                
-                # Check if there's data to read
-                if self.serial_port and self.serial_port.in_waiting > 0:
-                    data = self._read_response()
-                    if data:
-                        self._process_response(data)
-                        
-                time.sleep(0.01)  # Small delay to prevent CPU hogging
+                for response in self._read_responses():
+                    self._process_response(response)
+            except (serial.SerialException, OSError) as e:
+                if self.stop_thread:
+                    return  # disconnect() closed the port under a blocking read
+                # The device is gone (e.g. unplugged) and every further read would fail at once
+                print(f"Error reading response, disconnecting: {str(e)}")
+                self.disconnect()
+                return
             except Exception as e:
                 print(f"Communication error: {str(e)}")
                 time.sleep(0.1)
-    
+
+    def _writer_loop(self):
+        """Background thread that sleeps until a command is queued, then sends it"""
+        while not self.stop_thread:
+            # Blocks until a command may go out (stop/land skip the command spacing)
+            # or until an acknowledgement is overdue
+            deadline = self.ack_tracker.next_deadline()
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            # Commands wait in the queue (where newer setpoints replace them) until both
+            # the command spacing and the link's byte budget allow another frame
+            ready_at = max(self.last_command_time + self.command_interval, self.bandwidth.ready_at())
+            command = self.command_queue.get(ready_at=ready_at, timeout=timeout)
+            if command is None:
+                if self.command_queue.closed:
+                    return
+                # Retries queue up like any command, so they respect the spacing and the link budget
+                for retry in self.ack_tracker.expired():
+                    self.command_queue.push_retry(retry)
+                continue
+
+            if command.get("type") == "pause":
+                # Hold back the next normal command; stop and land still go straight out
+                self.last_command_time = time.monotonic() + command["seconds"] - self.command_interval
+                continue
+
+            if "seq" in command and not self.ack_tracker.awaiting(command):
+                continue  # A retry that was acked, or cancelled by a stop or land, while it waited
+            self._transmit(self.ack_tracker.tag(command))
+
+    def _transmit(self, command):
+        """Send one command from the writer thread and start waiting for its ack"""
+        # Wait for the ack before writing: a fast drone can answer before write() returns
+        self.ack_tracker.sent(command)
+        try:
+            if not self._send_raw_command(command):
+                self.ack_tracker.forget(command)
+        except Exception as e:
+            print(f"Communication error: {str(e)}")
+        self.last_command_time = time.monotonic()
+
     def _send_raw_command(self, command):
         """Send a raw command to the drone"""
         if not self.connected or not self.serial_port:
             return False
         
         try:
-            # Convert command to JSON and add newline
-            command_str = json.dumps(command) + "\n"
-            self.serial_port.write(command_str.encode('utf-8'))
+            codec = self.codec
+            if command.get("type") == "protocol_request":
+                codec = JsonCodec()
+            try:
+                data = codec.encode(command)
+            except ValueError:
+                # No binary layout for this command, the firmware still accepts JSON lines
+                data = JsonCodec().encode(command)
+            self.serial_port.write(data)
             self.serial_port.flush()
+            self.bandwidth.spend(len(data))
             return True
         except Exception as e:
             print(f"Error sending command: {str(e)}")
             return False
     
     def send_command(self, command):
-        """Add a command to the sending queue"""
-        self.command_queue.append(command)
+        """Add a command to the sending queue. Returns False if the queue is full"""
+        if not self.command_queue.push(command):
+            print(f"Command queue full, dropped: {command.get('action', command.get('type'))}")
+            return False
+        return True
+
+    def send_batch(self, commands):
+        """Queue a plan of commands to be sent strictly in order. Returns False if it does not fit"""
+        if not self.command_queue.push_batch(commands):
+            print(f"Command queue full, dropped a plan of {len(commands)} steps")
+            return False
+        return True
+
+    def get_queue_stats(self):
+        """Get the command scheduler counters and queue depth, plus link throttling"""
+        stats = self.command_queue.get_stats()
+        stats["bytes_sent"] = self.bandwidth.stats["bytes"]
+        stats["throttled"] = self.bandwidth.stats["throttled"]
+        return stats
+    
+    def format_queue_report(self):
+        """Queue counters and link usage for the UI"""
+        stats = self.bandwidth.stats
+        return (f"{self.command_queue.format_report()}\n"
+                f"Link: {stats['bytes']} bytes sent at up to {self.bandwidth.rate:.0f} B/s, "
+                f"{stats['throttled']} frames throttled")
     
-    def _read_response(self):
-        """Read response from the drone"""
+    def _read_responses(self):
+        """Read whatever bytes the drone has sent and return the complete messages"""
         if not self.connected or not self.serial_port:
-            return None
-        
-        try:
-            # Read a line (assuming JSON responses end with newline)
-            response = self.serial_port.readline().decode('utf-8').strip()
-            if response:
-                return response
-        except Exception as e:
-            print(f"Error reading response: {str(e)}")
-        
-        return None
+            return []
+        
+        responses = []
+        # Blocks only while the port is idle; partial frames wait in the decoder.
+        # Port errors go to _reader_loop, malformed frames are dropped by decode_frame()
+        if self.decoder.fill(self.serial_port):
+            for frame in self.decoder.frames():
+                response = decode_frame(*frame)
+                if response is not None:
+                    responses.append(response)
+        
+        return responses
     
-    def _process_response(self, data):
-        """Process a response from the drone"""
+    def _process_response(self, response):
+        """Process a decoded response from the drone"""
         try:
-            # Parse JSON response
-            response = json.loads(data)
-            
             # Update telemetry if it's a telemetry response
             if response.get("type") == "telemetry":
-                self.telemetry.update(response.get("data", {}))
-        except json.JSONDecodeError:
-            print(f"Invalid JSON response: {data}")
+                self.telemetry = merge_telemetry(self.telemetry, response.get("data", {}))
+                now = time.time()
+                self.telemetry_history.append(now, self.telemetry)
+                recorder = self.recorder
+                if recorder is not None:
+                    recorder.record_telemetry(self.telemetry, now)
+            elif response.get("type") == "ack":
+                self.ack_tracker.acknowledge(response.get("seq"))
+            elif is_protocol_ack(response):
+                self.codec = BinaryCodec()
         except Exception as e:
             print(f"Error processing response: {str(e)}")
     
     def get_telemetry(self):
-        """Get the latest telemetry data"""
+        """Get the latest telemetry frame as a read-only, internally consistent snapshot"""
         return self.telemetry
+
+    def get_latency_stats(self):
+        """Per command type round-trip latency percentiles in milliseconds"""
+        return self.ack_tracker.latency_stats()
     
     def take_off(self, target_altitude=10):
         """Command the drone to take off"""
-        command = {
-            "type": "command",
-            "action": "takeoff",
-            "altitude": target_altitude
-        }
-        self.send_command(command)
+        return self.send_command(takeoff_command(target_altitude))
     
     def land(self):
         """Command the drone to land"""
-        command = {
-            "type": "command",
-            "action": "land"
-        }
-        self.send_command(command)
+        return self.send_command(land_command())
     
     def move(self, direction, speed):
         """Command the drone to move in a direction"""
-        # Map direction to velocity components
-        vx, vy = 0, 0
-        if direction == "forward":
-            vx = speed
-        elif direction == "backward":
-            vx = -speed
-        elif direction == "left":
-            vy = -speed
-        elif direction == "right":
-            vy = speed
-            
-        command = {
-            "type": "command",
-            "action": "move",
-            "velocity": {
-                "vx": vx,
-                "vy": vy
-            }
-        }
-        self.send_command(command)
+        return self.send_command(move_command(direction, speed))
     
     def change_altitude(self, target_altitude):
         """Command the drone to change altitude"""
-        command = {
-            "type": "command",
-            "action": "altitude",
-            "target": target_altitude
-        }
-        self.send_command(command)
+        return self.send_command(altitude_command(target_altitude))
     
     def stop(self):
         """Command the drone to stop moving"""
-        command = {
-            "type": "command",
-            "action": "stop"
-        }
-        self.send_command(command)
+        return self.send_command(stop_command())
 
 
-class DroneSimulator:
-    def __init__(self):
-        self.altitude = 0
-        self.is_flying = False
-        self.default_altitude = 10  # meters
-        self.max_altitude = 120  # meters
-        self.ascent_rate = 1  # meters per second
-        self.descent_rate = 0.7  # meters per second
-        self.is_moving = False
-        self.direction = None
-        self.speed = 0  # meters per second
-        self.x_position = 0  # relative x position
-        self.y_position = 0  # relative y position
-        self.battery = 100  # battery percentage
-        self.attitude = {"roll": 0, "pitch": 0, "yaw": 0}  # orientation
-        
-    def take_off(self):
-        """Command the drone to take off to default altitude"""
-        if not self.is_flying:
-            self.is_flying = True
-            return self._change_altitude(self.default_altitude)
-        else:
-            return "Drone is already flying!"
-    
-    def land(self):
-        """Command the drone to land"""
-        if self.is_flying:
-            self.is_flying = False
-            return self._change_altitude(0)
-        else:
-            return "Drone is already on the ground!"
-    
-    def ascend(self, target_altitude=None):
-        """Command the drone to ascend"""
-        if not self.is_flying:
-            return "Drone needs to take off first!"
-        
-        if target_altitude is None:
-            target_altitude = self.altitude + 5
-        
-        if target_altitude > self.max_altitude:
-            target_altitude = self.max_altitude
-            
-        return self._change_altitude(target_altitude)
-    
-    def descend(self, target_altitude=None):
-        """Command the drone to descend"""
-        if not self.is_flying:
-            return "Drone is not flying!"
-        
-        if target_altitude is None:
-            target_altitude = max(0, self.altitude - 5)
-            
-        return self._change_altitude(target_altitude)
-    
-    def _change_altitude(self, target_altitude):
-        """Simulate changing altitude with a progress report"""
-        if target_altitude == self.altitude:
-            return f"Already at {self.altitude}m altitude."
-        
-        start_altitude = self.altitude
-        message = []
-        
-        if target_altitude > start_altitude:
-            message.append(f"Ascending from {start_altitude}m to {target_altitude}m...")
-            rate = self.ascent_rate
-        else:
-            message.append(f"Descending from {start_altitude}m to {target_altitude}m...")
-            rate = self.descent_rate
-        
-        # Calculate time needed for altitude change
-        time_needed = abs(target_altitude - start_altitude) / rate
-        
-        # This would be where we'd actually send commands to a real drone
-        # For simulation, we'll just update the altitude
-        self.altitude = target_altitude
-        
-        if target_altitude == 0:
-            message.append(f"Landed safely after {time_needed:.1f} seconds.")
-        else:
-            message.append(f"Reached target altitude of {target_altitude}m in {time_needed:.1f} seconds.")
-        
-        return "\n".join(message)
-    
-    def move(self, direction, speed=5):
-        """Command the drone to move in a specific direction"""
-        if not self.is_flying:
-            return "Drone needs to take off first!"
-        
-        self.direction = direction
-        self.speed = speed
-        self.is_moving = True
-        
-        # Update position for visualization
-        if direction == "forward":
-            self.y_position -= speed
-            self.attitude["pitch"] = 10  # Pitch forward
-        elif direction == "backward":
-            self.y_position += speed
-            self.attitude["pitch"] = -10  # Pitch backward
-        elif direction == "left":
-            self.x_position -= speed
-            self.attitude["roll"] = -10  # Roll left
-        elif direction == "right":
-            self.x_position += speed
-            self.attitude["roll"] = 10  # Roll right
-        
-        return f"Moving {direction} at {speed} m/s"
-    
-    def stop(self):
-        """Command the drone to stop moving"""
-        if not self.is_flying:
-            return "Drone is not flying!"
-        
-        if not self.is_moving:
-            return "Drone is already stationary!"
-        
-        self.is_moving = False
-        previous_direction = self.direction
-        self.direction = None
-        self.speed = 0
-        
-        # Reset attitude
-        self.attitude = {"roll": 0, "pitch": 0, "yaw": 0}
-        
-        return f"Stopped moving {previous_direction}"
-    
-    def update_from_telemetry(self, telemetry):
-        """Update simulator state from telemetry data"""
-        if "altitude" in telemetry:
-            self.altitude = telemetry["altitude"]
-            self.is_flying = self.altitude > 0
-            
-        if "x_position" in telemetry:
-            self.x_position = telemetry["x_position"]
-            
-        if "y_position" in telemetry:
-            self.y_position = telemetry["y_position"]
-            
-        if "battery" in telemetry:
-            self.battery = telemetry["battery"]
-        
-        if "attitude" in telemetry:
-            self.attitude.update(telemetry["attitude"])
-    
-    def get_status(self):
-        """Get the current status of the drone"""
-        status = []
-        
-        if self.is_flying:
-            status.append(f"Status: Flying at {self.altitude}m altitude")
-        else:
-            status.append("Status: Landed")
-            
-        if self.is_moving and self.direction:
-            status.append(f"Movement: {self.direction} at {self.speed} m/s")
-        else:
-            status.append("Movement: Stationary")
-            
-        status.append(f"Position: X={self.x_position}m, Y={self.y_position}m")
-        status.append(f"Battery: {self.battery}%")
-        status.append(f"Attitude: Roll={self.attitude['roll']}°, Pitch={self.attitude['pitch']}°, Yaw={self.attitude['yaw']}°")
-            
-        return "\n".join(status)
+def plan_messages(plan, altitude=0, default_altitude=10):
+    """Turn a validated plan into protocol messages for DroneConnection.send_batch().
+
+    Relative altitude steps (up/down) are resolved against the altitude the
+    earlier steps will have reached, starting from `altitude`.
+    """
+    messages = []
+    for command in plan:
+        if command.name == "takeoff":
+            altitude = default_altitude
+            messages.append(takeoff_command(default_altitude))
+        elif command.name == "land":
+            altitude = 0
+            messages.append(land_command())
+        elif command.name in ("ascend", "descend"):
+            if command.altitude is not None:
+                altitude = command.altitude
+            elif command.name == "ascend":
+                altitude = altitude + 5
+            else:
+                altitude = max(0, altitude - 5)
+            messages.append(altitude_command(altitude))
+        elif command.name == "move":
+            messages.append(move_command(command.direction, command.speed))
+        elif command.name == "stop":
+            messages.append(stop_command())
+        elif command.name == "wait":
+            messages.append(pause_command(command.seconds))
+    return messages
 
 
 class DroneControlApp:
+    # First words of commands, which cannot double as fleet drone IDs
+    reserved_words = ("all",) + tuple(PARSERS)
+
     def __init__(self, root):
         self.root = root
         self.root.title("Advanced Drone Control System")
@@ -383,13 +332,51 @@ class DroneControlApp:
         
         self.drone = DroneSimulator()
         self.drone_connection = DroneConnection()
-        self.command_history = []
-        self.animation_speed = 50  # milliseconds between animation updates
+        self.command_history = deque(maxlen=1000)  # Recent prompts; the flight recorder keeps whole sessions
+        # Parsed command name -> handler
+        self.command_handlers = {
+            "help": lambda command: self.show_help(),
+            "takeoff": self.run_take_off,
+            "land": self.run_land,
+            "ascend": self.run_ascend,
+            "descend": self.run_descend,
+            "move": self.run_move,
+            "stop": self.run_stop,
+            "status": self.show_status,
+            "telemetry": self.show_telemetry,
+            "latency": self.show_latency,
+            "perf": self.run_perf,
+            "fleet": lambda command: self.manage_fleet(list(command.args)),
+            "run": self.run_mission,
+            "wait": self.run_wait,
+            "reset": self.reset_drone,
+            "record": self.run_record,
+            "replay": self.run_replay,
+            "search": lambda command: self.output_log.show_search(command.args[0]),
+            "exit": lambda command: self.root.quit(),
+        }
+        self.animation_speed = 33  # milliseconds between frames while the drone flies or moves
+        self.idle_animation_speed = 500  # milliseconds between checks while it sits still
         self.visualization_scale = 5  # pixels per meter
         self.using_real_drone = False
+        self.mirrored_telemetry = None  # Last telemetry snapshot copied into self.drone
+        self.fleet = FleetManager(DroneSimulator)
+        self.fleet_connecting = set()  # Drone IDs whose link is being opened
+        self.port_scanner = PortScanner()  # Device I/O runs on its worker pool, never on the Tk thread
+        self.connecting = False  # A connect or disconnect is in progress
+        self.recorder = None  # FlightRecorder while 'record' is on
+        self.replay_steps = None  # Generator of the replay in progress
+        self.output_prefix = ""  # Names the fleet member a message is about
+        self.intent_classifier = None  # Loaded on the first prompt the grammar does not know
+        self.suggestion = None  # Command guessed for the last unknown prompt, run only after 'yes'
+        self.instrumentation = Instrumentation()  # Off until 'perf on'
+        self.profiler = SamplingProfiler()
+        self.perf_panel_interval = 1000  # milliseconds between stats panel refreshes while 'perf on'
+        self.perf_panel_job = None  # after() id of the next refresh
         
         self._setup_ui()
         self.start_animation()
+        self._setup_instrumentation()
         
     def _setup_ui(self):
         # Create main frames
@@ -438,6 +425,7 @@ class DroneControlApp:
         self.output_display = scrolledtext.ScrolledText(self.output_frame, wrap=tk.WORD)
         self.output_display.pack(fill=tk.BOTH, expand=True)
         self.output_display.config(state=tk.DISABLED)
+        self.output_log = OutputLog(self.root, self.output_display)
         
         # Quick command buttons
         self.buttons_frame = tk.LabelFrame(self.left_frame, text="Quick Commands", padx=5, pady=5)
@@ -514,8 +502,7 @@ class DroneControlApp:
         self.ground = self.canvas.create_rectangle(0, 380, 400, 400, fill="green")
         
         # Create drone object
-        self.drone_size = 30
-        self.drone_obj = self.create_drone(200, 350)
+        self.renderer = DroneRenderer(self.canvas, 200, 350, size=30, indicator=True)
         
         # Altitude and position indicators
         self.status_frame = tk.Frame(self.right_frame, padx=5, pady=5)
@@ -544,165 +531,621 @@ class DroneControlApp:
         self.battery_var = tk.StringVar(value="Battery: 100%")
         self.battery_label = tk.Label(self.status_row2, textvariable=self.battery_var, font=("Arial", 10, "bold"))
         self.battery_label.pack(side=tk.LEFT, padx=10)
+        self.status_vars = (self.altitude_var, self.position_var, self.direction_var, self.battery_var)
+        self.status_text = None  # Last text shown, so unchanged labels are not reset
         
-        # Perform initial port scan
+        # Performance stats panel, refreshed while instrumentation is on
+        self.perf_frame = tk.LabelFrame(self.right_frame, text="Performance", padx=5, pady=5)
+        self.perf_frame.pack(fill=tk.X)
+        
+        self.perf_var = tk.StringVar(value="Instrumentation off. Type 'perf on' to start it.")
+        self.perf_label = tk.Label(self.perf_frame, textvariable=self.perf_var, font=("Courier", 8),
+                                   justify=tk.LEFT, anchor="w", wraplength=400)
+        self.perf_label.pack(fill=tk.X)
+        
+        # Perform initial port scan, then keep the list current as devices come and go
         self.scan_ports()
+        self.root.after(REFRESH_INTERVAL, self.refresh_ports)
         
         # Initial message
         self.update_output("Drone Control System initialized. Type 'help' for available commands.")
     
-    def create_drone(self, x, y):
-        # Create drone body
-        body = self.canvas.create_oval(x-self.drone_size/2, y-self.drone_size/2, 
-                                       x+self.drone_size/2, y+self.drone_size/2,
-                                       fill="gray", outline="black", width=2)
-        
-        # Create propellers
-        prop_size = self.drone_size/3
-        prop1 = self.canvas.create_line(x-self.drone_size/2, y-self.drone_size/2, 
-                                       x-self.drone_size/2-prop_size, y-self.drone_size/2-prop_size,
-                                       width=3)
-        prop2 = self.canvas.create_line(x+self.drone_size/2, y-self.drone_size/2, 
-                                       x+self.drone_size/2+prop_size, y-self.drone_size/2-prop_size,
-                                       width=3)
-        prop3 = self.canvas.create_line(x-self.drone_size/2, y+self.drone_size/2, 
-                                       x-self.drone_size/2-prop_size, y+self.drone_size/2+prop_size,
-                                       width=3)
-        prop4 = self.canvas.create_line(x+self.drone_size/2, y+self.drone_size/2, 
-                                       x+self.drone_size/2+prop_size, y+self.drone_size/2+prop_size,
-                                       width=3)
-        
-        # Add indicator for front direction
-        indicator = self.canvas.create_polygon(
-            x, y-self.drone_size/2-5,
-            x-5, y-self.drone_size/2+5,
-            x+5, y-self.drone_size/2+5,
-            fill="red"
-        )
-        
-        return [body, prop1, prop2, prop3, prop4, indicator]
-    
     def update_output(self, message):
-        self.output_display.config(state=tk.NORMAL)
-        self.output_display.insert(tk.END, message + "\n\n")
-        self.output_display.see(tk.END)
-        self.output_display.config(state=tk.DISABLED)
+        self.output_log.write(self.output_prefix + message)
     
     def scan_ports(self):
-        """Scan for available serial ports"""
-        ports = self.drone_connection.scan_ports()
-        self.port_combo['values'] = ports
+        """Scan for available serial ports on a worker thread"""
+        self.scan_button.config(state=tk.DISABLED)
+        when_done(self.root, self.port_scanner.scan_async(), self.show_ports)
+    
+    def show_ports(self, result):
+        """Show the result of a port scan started by scan_ports()"""
+        self.scan_button.config(state=tk.NORMAL)
+        if isinstance(result, Exception):
+            self.update_output(f"Error scanning ports: {str(result)}")
+            return
+        ports = result[0]
+        self.port_combo['values'] = [info.label for info in ports]
         
         if ports:
             self.port_combo.current(0)
-            self.update_output(f"Found {len(ports)} serial ports: {', '.join(ports)}")
+            self.update_output(f"Found {len(ports)} serial ports: {', '.join(info.label for info in ports)}")
         else:
             self.update_output("No serial ports found")
     
+    def refresh_ports(self):
+        """Rescan in the background so plugged in or removed devices show up"""
+        when_done(self.root, self.port_scanner.scan_async(), self.show_port_changes)
+        self.root.after(REFRESH_INTERVAL, self.refresh_ports)
+    
+    def show_port_changes(self, result):
+        if isinstance(result, Exception):
+            return
+        ports, added, removed = result
+        if not added and not removed:
+            return
+        selected = self.port_scanner.device_for(self.port_combo.get())
+        self.port_combo['values'] = [info.label for info in ports]
+        for info in ports:
+            if info.device in added:
+                self.update_output(f"Serial port added: {info.label}")
+        for device in removed:
+            self.update_output(f"Serial port removed: {device}")
+        if ports and (not selected or selected in removed):
+            self.port_combo.current(0)
+    
     def connect_drone(self):
-        """Connect or disconnect from the drone"""
-        if self.drone_connection.connected:
+        """Connect or disconnect from the drone on a worker thread"""
+        if self.connecting:
+            self.update_output("Still connecting or disconnecting, please wait")
+            return
+        connection = self.drone_connection
+        if connection.connected:
             # Disconnect if already connected
-            success, message = self.drone_connection.disconnect()
-            if success:
-                self.using_real_drone = False
-                self.connection_status_var.set("Status: Disconnected")
-                self.connection_status.config(fg="red")
-                self.connect_button.config(text="Connect")
-            self.update_output(message)
+            self.show_connecting("Status: Disconnecting...")
+            when_done(self.root, self.port_scanner.submit(connection.disconnect), self.finish_disconnect)
         else:
             # Connect to selected port
-            port = self.port_combo.get()
+            port = self.port_scanner.device_for(self.port_combo.get())
             if not port:
                 self.update_output("Please select a port first")
                 return
-                
-            success, message = self.drone_connection.connect(port)
-            if success:
-                self.using_real_drone = True
-                self.connection_status_var.set(f"Status: Connected to {port}")
-                self.connection_status.config(fg="green")
-                self.connect_button.config(text="Disconnect")
-            self.update_output(message)
+            
+            self.show_connecting(f"Status: Connecting to {port}...")
+            when_done(self.root, self.port_scanner.submit(connection.connect, port),
+                      lambda result: self.finish_connect(port, result))
+    
+    def show_connecting(self, status):
+        self.connecting = True
+        self.connection_status_var.set(status)
+        self.connection_status.config(fg="orange")
+        self.connect_button.config(state=tk.DISABLED)
+    
+    def finish_connect(self, port, result):
+        self.connecting = False
+        self.connect_button.config(state=tk.NORMAL)
+        success, message = (False, f"Unexpected error: {str(result)}") if isinstance(result, Exception) else result
+        if success:
+            self.using_real_drone = True
+            self.connection_status_var.set(f"Status: Connected to {port}")
+            self.connection_status.config(fg="green")
+            self.connect_button.config(text="Disconnect")
+        else:
+            self.connection_status_var.set("Status: Disconnected")
+            self.connection_status.config(fg="red")
+        self.update_output(message)
+    
+    def finish_disconnect(self, result):
+        self.connecting = False
+        self.connect_button.config(state=tk.NORMAL)
+        message = f"Unexpected error: {str(result)}" if isinstance(result, Exception) else result[1]
+        if not self.drone_connection.connected:
+            self.using_real_drone = False
+            self.connection_status_var.set("Status: Disconnected")
+            self.connection_status.config(fg="red")
+            self.connect_button.config(text="Connect")
+        else:
+            self.connection_status_var.set("Status: Connected")
+            self.connection_status.config(fg="green")
+        self.update_output(message)
+
+    def report_sent(self, sent, description):
+        """Report whether a command for the real drone was queued"""
+        if sent:
+            self.update_output(f"Command sent: {description}")
+        else:
+            self.update_output(f"Command queue full, dropped: {description}")
     
     def process_command(self, event=None):
-        command = self.command_entry.get().strip().lower()
+        command = self.command_entry.get().strip()  # Case is kept for file names
         if command:
             self.command_entry.delete(0, tk.END)
             self.update_output(f"> {command}")
             self.execute_command(command)
     
     def execute_command(self, command):
+        # A suggestion only stands until the next prompt
+        suggestion, self.suggestion = self.suggestion, None
+        
         # Add command to history
         self.command_history.append(command)
+        if self.recorder is not None and not self.output_prefix:
+            # Fleet members run the command again with a prefix set; record it once
+            self.recorder.record_command(command)
+        self.frames.wake()
+        
+        # Fleet addressing: "<drone id> <command>" or "all <command>"
+        target, _, fleet_command = command.partition(" ")
+        target = target.lower()
+        if fleet_command and (target == "all" or target in self.fleet):
+            self.execute_fleet_command(target, fleet_command)
+            return
         
         # Process commands
-        if command in ("help", "commands"):
-            self.show_help()
-        
-        elif command in ("take off", "takeoff"):
-            if self.using_real_drone:
-                self.drone_connection.take_off()
-                self.update_output("Command sent: Take off")
-            else:
-                response = self.drone.take_off()
-                self.update_output(response)
-        
-        elif command == "land":
-            if self.using_real_drone:
-                self.drone_connection.land()
-                self.update_output("Command sent: Land")
-            else:
-                response = self.drone.land()
-                self.update_output(response)
+        plan = parse_plan(command)
+        if len(plan) > 1:
+            self.run_plan(plan)
+            return
+        parsed = plan[0]
+        if parsed.name == "confirm":
+            if suggestion is None:
+                self.update_output("Nothing to confirm.")
+                return
+            parsed = suggestion
+        elif parsed.name == "unknown" and self.suggest_command(parsed):
+            return
+        if parsed.warning:
+            self.update_output(parsed.warning)
+        handler = self.command_handlers.get(parsed.name)
+        if handler is not None:
+            handler(parsed)
+        elif parsed.error:
+            self.update_output(parsed.error)
+        else:
+            self.update_output(f"Unknown command: '{command}'. Type 'help' for available commands.")
+    
+    def suggest_command(self, parsed):
+        """Offer the command a free text prompt probably meant. Returns True if there was one.
         
-        elif command in ("up", "ascend"):
-            if self.using_real_drone:
+        A fuzzy match is never run by itself: the operator confirms it with 'yes'.
+        """
+        try:
+            if self.intent_classifier is None:
+                self.intent_classifier = IntentClassifier()
+            interpreted, score = self.intent_classifier.interpret(parsed.text)
+        except (OSError, ValueError) as e:
+            print(f"Intent classifier unavailable: {str(e)}")
+            return False
+        if interpreted is None:
+            return False
+        self.suggestion = interpreted
+        self.update_output(f"Unknown command: '{parsed.text}'. Did you mean '{interpreted.text}'? "
+                           f"(confidence {score:.2f}) Type 'yes' to run it.")
+        return True
+    
+    def run_take_off(self, command):
+        if self.using_real_drone:
+            self.report_sent(self.drone_connection.take_off(), "Take off")
+        else:
+            self.update_output(self.drone.take_off())
+    
+    def run_land(self, command):
+        if self.using_real_drone:
+            self.report_sent(self.drone_connection.land(), "Land")
+        else:
+            self.update_output(self.drone.land())
+    
+    def run_ascend(self, command):
+        if self.using_real_drone:
+            altitude = command.altitude
+            if altitude is None:
                 # Increase altitude by 5m
-                current_alt = self.drone_connection.get_telemetry().get("altitude", 0)
-                self.drone_connection.change_altitude(current_alt + 5)
-                self.update_output(f"Command sent: Ascend to {current_alt + 5}m")
-            else:
-                response = self.drone.ascend()
-                self.update_output(response)
-        
-        elif command in ("down", "descend"):
-            if self.using_real_drone:
+                altitude = self.drone_connection.get_telemetry().get("altitude", 0) + 5
+            self.report_sent(self.drone_connection.change_altitude(altitude), f"Ascend to {altitude}m")
+        else:
+            self.update_output(self.drone.ascend(command.altitude))
+    
+    def run_descend(self, command):
+        if self.using_real_drone:
+            altitude = command.altitude
+            if altitude is None:
                 # Decrease altitude by 5m
-                current_alt = self.drone_connection.get_telemetry().get("altitude", 0)
-                self.drone_connection.change_altitude(max(0, current_alt - 5))
-                self.update_output(f"Command sent: Descend to {max(0, current_alt - 5)}m")
+                altitude = max(0, self.drone_connection.get_telemetry().get("altitude", 0) - 5)
+            self.report_sent(self.drone_connection.change_altitude(altitude), f"Descend to {altitude}m")
+        else:
+            self.update_output(self.drone.descend(command.altitude))
+    
+    def run_move(self, command):
+        if self.using_real_drone:
+            sent = self.drone_connection.move(command.direction, command.speed)
+            self.report_sent(sent, f"Move {command.direction} at {command.speed} m/s")
+        else:
+            self.update_output(self.drone.move(command.direction, command.speed))
+    
+    def run_stop(self, command):
+        if self.using_real_drone:
+            self.report_sent(self.drone_connection.stop(), "Stop")
+        else:
+            self.update_output(self.drone.stop())
+    
+    def show_status(self, command):
+        if self.using_real_drone:
+            self.drone.update_from_telemetry(self.drone_connection.get_telemetry())
+        reports = (self.drone.get_status(), parse_cache_report(), self.renderer.format_report(),
+                   self.frames.format_report())
+        self.update_output("\n".join(reports))
+    
+    def show_telemetry(self, command):
+        if self.drone_connection is None or not self.using_real_drone:
+            self.update_output("Telemetry history is only recorded for a connected drone.")
+        else:
+            self.update_output(self.drone_connection.telemetry_history.describe(command.seconds))
+    
+    def show_latency(self, command):
+        if self.drone_connection is None:
+            self.update_output("No drone link for this drone.")
+        else:
+            self.update_output(self.drone_connection.ack_tracker.format_report())
+            if isinstance(self.drone_connection, DroneConnection):
+                self.update_output(self.drone_connection.format_queue_report())
+    
+    def run_wait(self, command):
+        if self.using_real_drone:
+            self.report_sent(self.drone_connection.send_batch([pause_command(command.seconds)]),
+                             f"Wait {command.seconds:g} seconds")
+        else:
+            self.mission_step(self.plan_steps(self.drone, (command,)), self.output_prefix)
+    
+    def run_plan(self, plan):
+        """Check a compound command as a whole, then run every step"""
+        if self.using_real_drone:
+            self.drone.update_from_telemetry(self.drone_connection.get_telemetry())
+        error = validate_plan(plan, flying=self.drone.is_flying)
+        if error:
+            self.update_output(f"Plan rejected: {error}")
+            return
+        
+        self.update_output("Plan: " + " -> ".join(command.text for command in plan))
+        if self.using_real_drone:
+            # One batch, so the steps reach the drone back to back and in order
+            altitude = self.drone_connection.get_telemetry().get("altitude", 0)
+            sent = self.drone_connection.send_batch(plan_messages(plan, altitude))
+            self.report_sent(sent, f"Plan of {len(plan)} steps")
+        else:
+            self.mission_step(self.plan_steps(self.drone, plan), self.output_prefix)
+    
+    def plan_steps(self, drone, plan):
+        """Run plan steps on a simulator, stepping waits a chunk per Tk event"""
+        for command in plan:
+            if command.name == "wait":
+                for _ in drone.run_chunks(command.seconds):
+                    yield 0
+                self.update_output(f"Waited {command.seconds:g} simulated seconds")
             else:
-                response = self.drone.descend()
-                self.update_output(response)
-        
-        elif command.startswith("ascend to "):
+                self.update_output(SIMULATOR_ACTIONS[command.name](drone, command))
+    
+    def run_mission(self, command):
+        """Run a mission file, one line per Tk event so the UI stays responsive"""
+        target = self.drone_connection if self.using_real_drone else self.drone
+        runner = MissionRunner(target, output=self.update_output)
+        self.update_output(f"Running mission {command.args[0]}")
+        self.mission_step(runner.steps(command.args[0]), self.output_prefix)
+    
+    def mission_step(self, steps, output_prefix):
+        self.output_prefix = output_prefix  # Keep the fleet member's name on later lines
+        try:
+            delay = next(steps)
+        except StopIteration:
+            return
+        finally:
+            self.output_prefix = ""
+        self.root.after(int(delay * 1000), self.mission_step, steps, output_prefix)
+    
+    def run_record(self, command):
+        """'record [directory]' starts recording commands and telemetry, 'record stop' ends it"""
+        args = command.args
+        if args and args[0].lower() == "stop":
+            if self.recorder is None:
+                self.update_output("Not recording")
+                return
+            recorder, self.recorder = self.recorder, None
+            self.drone_connection.recorder = None
+            recorder.close()
+            self.update_output(f"Recording stopped. {recorder.describe()}")
+        elif self.recorder is not None:
+            self.update_output(self.recorder.describe())
+        else:
+            directory = args[0] if args else os.path.join("recordings", time.strftime("flight_%Y%m%d_%H%M%S"))
             try:
-                altitude = float(command.split("to ")[1])
-                if self.using_real_drone:
-                    self.drone_connection.change_altitude(altitude)
-                    self.update_output(f"Command sent: Ascend to {altitude}m")
-                else:
-                    response = self.drone.ascend(altitude)
-                    self.update_output(response)
-            except (ValueError, IndexError):
-                self.update_output("Invalid altitude. Please specify a number.")
-        
-        elif command.startswith("descend to "):
+                self.recorder = FlightRecorder(directory)
+            except OSError as e:
+                self.update_output(f"Error starting recording in {directory}: {str(e)}")
+                return
+            self.drone_connection.recorder = self.recorder
+            self.update_output(f"Recording to {directory}. Use 'record stop' to finish.")
+    
+    def run_replay(self, command):
+        """'replay <directory> [1x|10x|max]' plays a recording back, 'replay stop' ends it"""
+        args = command.args
+        if args[0].lower() == "stop":
+            self.update_output("Replay stopped" if self.replay_steps else "Not replaying")
+            self.replay_steps = None
+            return
+        if self.using_real_drone:
+            self.update_output("Disconnect the drone before replaying a recording")
+            return
+        
+        speed_text = args[1].lower() if len(args) > 1 else "1x"
+        try:
+            speed = None if speed_text == "max" else float(speed_text.rstrip("x"))
+            if speed is not None and speed <= 0:
+                raise ValueError
+        except ValueError:
+            self.update_output("Invalid replay speed. Use 1x, 10x or max.")
+            return
+        try:
+            log = FlightLog(args[0])
+        except (OSError, ValueError) as e:
+            self.update_output(f"Error opening recording: {str(e)}")
+            return
+        
+        first, last = log.time_range()
+        duration = last - first if first is not None else 0
+        self.update_output(f"Replaying {args[0]} ({duration:.1f} s recorded) at {speed_text}")
+        replay = FlightReplay(log, speed,
+                              on_telemetry=lambda telemetry: self.drone.update_from_telemetry(telemetry),
+                              on_command=lambda text: self.update_output(f"[replay] > {text}"))
+        self.replay_steps = replay.steps()
+        self.replay_step(self.replay_steps)
+    
+    def replay_step(self, steps):
+        if steps is not self.replay_steps:
+            return  # Stopped, or replaced by a newer replay
+        try:
+            delay = next(steps)
+        except StopIteration as finished:
+            self.replay_steps = None
+            records, seconds = finished.value
+            self.update_output(f"Replay finished: {records} records, {seconds:.1f} recorded seconds")
+            return
+        self.frames.wake()
+        self.root.after(int(delay * 1000), self.replay_step, steps)
+    
+    def _setup_instrumentation(self):
+        """Register what 'perf' times and reports"""
+        perf = self.instrumentation
+        connection = self.drone_connection
+        perf.probe(self, "execute_command")
+        perf.probe(self, "update_output")
+        perf.probe(self.frames, "draw", "animation frame")
+        perf.probe(sys.modules[__name__], "decode_frame", "decode_frame (reader)")
+        perf.probe(connection, "_process_response", "process_response (reader)")
+        perf.probe(connection, "_transmit", "transmit (writer)")
+        perf.gauge("queued commands", lambda: len(connection.command_queue))
+        perf.gauge("pending acks", lambda: len(connection.ack_tracker.pending))
+        perf.gauge("pending output", lambda: len(self.output_log.pending))
+        perf.gauge("bytes in", lambda: connection.decoder.bytes_received)
+        perf.gauge("bytes out", lambda: connection.bandwidth.stats["bytes"])
+        perf.gauge("frames parsed", lambda: connection.decoder.frames_decoded)
+        perf.gauge("bad frames", lambda: connection.decoder.bad_frames)
+        perf.gauge("fps", lambda: round(self.frames.fps(), 1))
+    
+    def run_perf(self, command):
+        """'perf [on|off|reset]' controls the timers, 'perf profile [seconds]' samples all threads"""
+        action = command.args[0] if command.args else ""
+        if action == "":
+            self.update_output(self.instrumentation.format_report())
+        elif action == "on":
+            if not self.instrumentation.enabled:
+                self.instrumentation.on()
+                self.refresh_perf_panel()
+            self.update_output("Instrumentation on. Use 'perf' for the report and 'perf off' to stop.")
+        elif action == "off":
+            self.instrumentation.off()
+            if self.perf_panel_job is not None:
+                self.root.after_cancel(self.perf_panel_job)
+                self.perf_panel_job = None
+            self.perf_var.set("Instrumentation off. Type 'perf on' to start it.")
+            self.update_output("Instrumentation off")
+        elif action == "reset":
+            self.instrumentation.reset()
+            self.update_output("Instrumentation timers reset")
+        elif action == "profile":
+            if self.profiler.running:
+                self.update_output("The profiler is already running")
+                return
             try:
-                altitude = float(command.split("to ")[1])
-                if self.using_real_drone:
-                    self.drone_connection.change_altitude(altitude)
-                    self.update_output(f"Command sent: Descend to {altitude}m")
-                else:
-                    response = self.drone.descend(altitude)
-                    self.update_output(response)
-            except (ValueError, IndexError):
-                self.update_output("Invalid altitude. Please specify a number.")
-        
-        elif command in ("forward", "backward", "left", "right"):
-            if self.using_real_drone:
-                self.drone_connection.move(command, 5)  # Default speed 5 m/s
-                self.update_output(f"Command sent: Move {command} at 5 m/s")
+                seconds = float(command.args[1]) if len(command.args) > 1 else 5.0
+            except ValueError:
+                seconds = None
+            # Checked before the profiler starts: after() needs a finite number of milliseconds
+            if seconds is None or not math.isfinite(seconds) or seconds <= 0:
+                self.update_output("Invalid duration. Use 'perf profile [seconds]' with more than 0 seconds.")
+                return
+            self.profiler.start()
+            self.update_output(f"Profiling all threads for {seconds:g} seconds...")
+            self.root.after(int(seconds * 1000), self.finish_profile)
+        else:
+            self.update_output("Usage: perf [on|off|reset|profile [seconds]]")
+    
+    def finish_profile(self):
+        self.profiler.stop()
+        try:
+            path = self.profiler.dump()
+        except OSError as e:
+            self.update_output(f"{self.profiler.summary()}\nError writing profile: {str(e)}")
+            return
+        self.update_output(f"{self.profiler.summary()}\nCollapsed stacks written to {path} "
+                           "(deleted when the app closes, copy it to keep it)")
+    
+    def refresh_perf_panel(self):
+        """Show the latest timings in the stats panel while instrumentation is on"""
+        if not self.instrumentation.enabled:
+            return
+        self.perf_var.set(self.instrumentation.format_panel())
+        self.perf_panel_job = self.root.after(self.perf_panel_interval, self.refresh_perf_panel)
+    
+    def reset_drone(self, command):
+        self.drone = DroneSimulator()
+        self.update_output("Drone reset to initial position.")
+    
+    def execute_fleet_command(self, target, command):
+        """Run a command against one fleet member or all of them"""
+        members = self.fleet.targets(target)
+        if not members:
+            self.update_output("Fleet is empty. Use 'fleet add <id> [port]' to add drones.")
+            return
+        
+        # Point the command handlers at each member in turn
+        saved = (self.drone, self.drone_connection, self.using_real_drone)
+        try:
+            for member in members:
+                self.drone = member.simulator
+                self.drone_connection = member.link
+                self.using_real_drone = member.using_real_drone
+                self.output_prefix = f"[{member.drone_id}] "
+                self.execute_command(command)
+                member.simulator = self.drone  # "reset" replaces the simulator
+        finally:
+            self.drone, self.drone_connection, self.using_real_drone = saved
+            self.output_prefix = ""
+    
+    def manage_fleet(self, args):
+        """Handle 'fleet', 'fleet add <id> [port]' and 'fleet remove <id>'"""
+        if not args:
+            self.update_output(self.fleet.describe())
+        elif args[0] == "add" and len(args) in (2, 3):
+            if args[1] in self.reserved_words:
+                self.update_output(f"'{args[1]}' cannot be used as a drone ID")
+            elif args[1] in self.fleet or args[1] in self.fleet_connecting:
+                self.update_output(f"{args[1]} is already in the fleet")
+            elif len(args) == 2:
+                self.update_output(self.fleet.add_simulator(args[1])[1])
+            else:
+                # Opening the port happens on the worker pool, like the main connection
+                drone_id, port = args[1], args[2]
+                self.fleet_connecting.add(drone_id)
+                self.update_output(f"Connecting {drone_id} on {port}...")
+                when_done(self.root, self.port_scanner.submit(self.fleet.open_link, drone_id, port),
+                          lambda result: self.finish_fleet_add(drone_id, port, result))
+        elif args[0] == "remove" and len(args) == 2:
+            member = self.fleet.detach(args[1])
+            if member is None:
+                self.update_output(f"No drone named {args[1]} in the fleet")
+            elif member.using_real_drone:
+                # The member stops getting commands now; its port closes on the worker pool
+                when_done(self.root, self.port_scanner.submit(member.link.disconnect),
+                          lambda result: self.finish_fleet_remove(member, result))
             else:
-                response = self.drone.move
\ No newline at end of file
+                self.update_output(f"Removed {member.drone_id} from the fleet")
+        else:
+            self.update_output("Usage: fleet | fleet add <id> [port] | fleet remove <id>")
+    
+    def finish_fleet_add(self, drone_id, port, result):
+        self.fleet_connecting.discard(drone_id)
+        if isinstance(result, Exception):
+            self.update_output(f"Error connecting {drone_id} on {port}: {str(result)}")
+            return
+        success, message, link = result
+        if success:
+            self.fleet.add_link(drone_id, link, port)
+        self.update_output(message)
+    
+    def finish_fleet_remove(self, member, result):
+        if isinstance(result, Exception):
+            self.update_output(f"Removed {member.drone_id} from the fleet, error disconnecting: {str(result)}")
+        else:
+            self.update_output(f"Removed {member.drone_id} from the fleet")
+    
+    def show_help(self):
+        help_text = """
+Available Commands:
+- take off: Take off to default altitude
+- land: Land the drone
+- up/ascend: Go up 5 meters
+- down/descend: Go down 5 meters
+- ascend to [altitude]: Ascend to specific altitude
+- descend to [altitude]: Descend to specific altitude
+- forward, backward, left, right: Move in that direction
+- go [direction] at [speed]: Move with specific speed
+- stop: Stop moving
+- status/info: Show drone status
+- telemetry [seconds]: Summarise recent telemetry (default last 10 seconds)
+- latency: Show command acknowledgement latency (p50/p95/p99)
+- perf on/off: Time commands, frames and the serial threads; perf: show the timings and counters
+- perf profile [seconds]: Sample every thread's stack and write a profile (default 5 seconds)
+- run [file]: Run a mission file, one command per line ('wait [seconds]' pauses)
+- Steps can be chained: take off, ascend to 30 then go forward at 4 and stop
+- fleet: List fleet drones; fleet add [id] [port]: add a drone (simulated without a port)
+- fleet remove [id]: Remove a drone from the fleet
+- [id] [command] / all [command]: Send a command to one fleet drone or all of them
+- reset: Reset drone to initial position
+- yes: Run the command suggested for an unrecognised prompt
+- record [directory]: Record commands and telemetry; record stop: finish the recording
+- replay [directory] [1x/10x/max]: Play a recording back; replay stop: end the replay
+- search [text]: Find earlier output, including lines no longer shown
+- help/commands: Show this help
+- exit/quit: Exit the program
+
+Use the Drone Connection panel to fly a real drone over USB.
+        """
+        self.update_output(help_text)
+    
+    def start_animation(self):
+        """Start the animation loop for drone visualization"""
+        self.frames = FrameScheduler(self.root, self.animate, self.animation_state,
+                                     self.animation_speed, self.idle_animation_speed)
+        self.frames.start()
+    
+    def animation_state(self):
+        """Version of the drawn state, and whether frames are needed continuously"""
+        # Mirror the real drone's telemetry in the simulator used for drawing,
+        # once per new snapshot (snapshots are replaced, never changed)
+        if self.using_real_drone:
+            telemetry = self.drone_connection.get_telemetry()
+            if telemetry is not self.mirrored_telemetry:
+                self.mirrored_telemetry = telemetry
+                self.drone.update_from_telemetry(telemetry)
+        return (self.drone, self.drone.version), self.drone.is_flying or self.drone.is_moving
+    
+    def animate(self):
+        """Update drone visualization based on current state"""
+        # Record what the simulator shows (a real drone's frames are recorded as they arrive)
+        if self.recorder is not None and not self.using_real_drone and self.replay_steps is None:
+            self.recorder.record_telemetry(self.drone.get_telemetry())
+        
+        # Move the drone, spinning the propellers while it flies
+        center_x, center_y = self.renderer.layout(self.drone.x_position, self.drone.altitude,
+                                                  self.drone.max_altitude, self.visualization_scale)
+        angle = time.time() * 10 if self.drone.is_flying else None  # Rotation angle based on time
+        self.renderer.draw(center_x, center_y, angle)
+        
+        # Update status indicators, only when their text changes
+        direction_text = self.drone.direction if self.drone.is_moving and self.drone.direction else "None"
+        status_text = (
+            f"Altitude: {self.drone.altitude}m",
+            f"Position: X={self.drone.x_position}m, Y={self.drone.y_position}m",
+            f"Direction: {direction_text}",
+            f"Battery: {self.drone.battery}%",
+        )
+        if status_text != self.status_text:
+            self.status_text = status_text
+            for variable, text in zip(self.status_vars, status_text):
+                variable.set(text)
+
+
+def main():
+    root = tk.Tk()
+    app = DroneControlApp(root)
+    root.mainloop()
+    app.drone_connection.disconnect()
+    app.fleet.close()
+    app.output_log.close()
+    app.profiler.close()
+    app.port_scanner.close()
+    if app.recorder is not None:
+        app.recorder.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+# Drone firmware emulator:
+# DroneEmulator opens a pseudo-terminal and answers on it like the drone
+# firmware does, so DroneConnection (or AsyncDroneConnection) can be run,
+# measured and regression-tested on any Linux box without hardware. It
+# understands the JSON command set and the binary framing switch, acks every
+# command that carries a sequence number and streams telemetry from a physics
+# DroneSimulator at a configurable rate.
+#
+# Link faults can be injected on the emulated side: response latency with
+# jitter, dropped frames (both directions) and corrupted bytes. The reader and
+# telemetry threads draw from their own seeded random generators, so a --seed
+# gives the same fault pattern on every run.
+#   python drone_emulator.py --rate 200 --latency 20 --jitter 5 --drop 0.01
+# then connect the control app to the printed /dev/pts/N port.
+import argparse
+import heapq
+import itertools
+import os
+import random
+import select
+import sys
+import threading
+import time
+import tty
+
+from protocol import JsonCodec, BinaryCodec, FrameDecoder, PROTOCOL_VERSION
+from simulation import DroneSimulator
+
+# Velocity setpoint axis and sign -> direction understood by DroneSimulator
+VELOCITY_DIRECTIONS = {
+    ("vx", 1): "forward",
+    ("vx", -1): "backward",
+    ("vy", -1): "left",
+    ("vy", 1): "right",
+}
+
+
+class DroneEmulator:
+    """Emulated drone firmware on a PTY.
+
+    rate is telemetry frames per second. latency and jitter are seconds
+    added to every response, drop is the probability of losing a frame in
+    either direction and corrupt the probability of flipping a byte in an
+    outgoing frame. binary=False emulates old firmware that ignores the
+    protocol_request and always talks JSON.
+    """
+    def __init__(self, rate=20.0, binary=True, latency=0.0, jitter=0.0, drop=0.0, corrupt=0.0, seed=None):
+        self.rate = rate
+        self.binary = binary
+        self.latency = latency
+        self.jitter = jitter
+        self.drop = drop
+        self.corrupt = corrupt
+        # One generator per thread: a shared one would interleave its draws differently on every run
+        self.command_random = random.Random(seed)
+        self.telemetry_random = random.Random(None if seed is None else seed + 1)
+        self.simulator = DroneSimulator(physics=True)
+        self.codec = JsonCodec()
+        self.decoder = FrameDecoder()
+        self.lock = threading.Lock()  # Guards the simulator and the codec
+        self.stats_lock = threading.Lock()  # Every thread updates the counters
+        self.outbox = []  # Heap of (due time, order, bytes) waiting to be written
+        self.order = itertools.count()
+        self.outbox_ready = threading.Condition()
+        self.stopped = threading.Event()
+        self.threads = []
+        self.stats = {
+            "commands": 0,
+            "acks": 0,
+            "telemetry": 0,
+            "dropped_in": 0,
+            "dropped_out": 0,
+            "corrupted": 0,
+            "bytes_out": 0,
+        }
+
+        # The emulator keeps the slave end open too, so the PTY survives clients reconnecting
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self.slave)
+
+    def start(self):
+        for target, name in ((self._reader_loop, "emulator-reader"), (self._telemetry_loop, "emulator-telemetry"),
+                             (self._writer_loop, "emulator-writer")):
+            thread = threading.Thread(target=target, name=name)
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        with self.outbox_ready:
+            self.outbox_ready.notify_all()
+        for thread in self.threads:
+            thread.join(timeout=1.0)
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _count(self, name, amount=1):
+        with self.stats_lock:
+            self.stats[name] += amount
+
+    def send(self, message, random_source):
+        """Queue a message to the ground station, applying the injected faults.
+
+        random_source is the calling thread's generator.
+        """
+        if self.drop and random_source.random() < self.drop:
+            self._count("dropped_out")
+            return
+        with self.lock:
+            data = self.codec.encode(message)
+        if self.corrupt and random_source.random() < self.corrupt:
+            data = bytearray(data)
+            data[random_source.randrange(len(data))] ^= 1 << random_source.randrange(8)
+            data = bytes(data)
+            self._count("corrupted")
+        delay = self.latency + (random_source.uniform(-self.jitter, self.jitter) if self.jitter else 0)
+        with self.outbox_ready:
+            heapq.heappush(self.outbox, (time.monotonic() + max(0.0, delay), next(self.order), data))
+            self.outbox_ready.notify()
+
+    def handle(self, message):
+        """Act on one decoded message from the ground station (reader thread)"""
+        random_source = self.command_random
+        if self.drop and random_source.random() < self.drop:
+            self._count("dropped_in")
+            return
+        self._count("commands")
+        kind = message.get("type")
+
+        if kind == "protocol_request":
+            if self.binary and message.get("protocol") == "binary" and message.get("version") == PROTOCOL_VERSION:
+                # The ack still goes out as JSON; everything after it is binary
+                self.send({"type": "protocol_ack", "protocol": "binary", "version": PROTOCOL_VERSION}, random_source)
+                with self.lock:
+                    self.codec = BinaryCodec()
+            return
+        if kind == "status_request":
+            self.send_telemetry(random_source)
+            return
+        if kind != "command":
+            return
+
+        with self.lock:
+            self._apply(message)
+        if "seq" in message:
+            self._count("acks")
+            self.send({"type": "ack", "seq": message["seq"]}, random_source)
+
+    def _apply(self, command):
+        drone = self.simulator
+        action = command.get("action")
+        if action == "takeoff":
+            drone.default_altitude = command.get("altitude", drone.default_altitude)
+            drone.take_off()
+        elif action == "land":
+            drone.land()
+        elif action == "stop":
+            drone.stop()
+        elif action == "altitude":
+            target = command.get("target", drone.altitude)
+            if target >= drone.altitude:
+                drone.ascend(target)
+            else:
+                drone.descend(target)
+        elif action == "move":
+            velocity = command.get("velocity", {})
+            axis = max(("vx", "vy"), key=lambda name: abs(velocity.get(name, 0)))
+            speed = velocity.get(axis, 0)
+            if speed:
+                drone.move(VELOCITY_DIRECTIONS[(axis, 1 if speed > 0 else -1)], abs(speed))
+            else:
+                drone.stop()
+
+    def send_telemetry(self, random_source):
+        with self.lock:
+            data = self.simulator.get_telemetry()
+        self._count("telemetry")
+        self.send({"type": "telemetry", "data": data}, random_source)
+
+    def _reader_loop(self):
+        while not self.stopped.is_set():
+            readable, _, _ = select.select([self.master], [], [], 0.1)
+            if not readable:
+                continue
+            try:
+                data = os.read(self.master, 4096)
+            except BlockingIOError:
+                continue
+            except OSError:
+                return
+            for message in self.decoder.decode(data):
+                self.handle(message)
+
+    def _telemetry_loop(self):
+        """Step the simulator and send a frame every 1/rate seconds, without drift"""
+        period = 1.0 / self.rate
+        last = next_frame = time.monotonic()
+        while not self.stopped.is_set():
+            now = time.monotonic()
+            with self.lock:
+                self.simulator.step(now - last)
+            last = now
+            self.send_telemetry(self.telemetry_random)
+            next_frame += period
+            if next_frame < now:
+                next_frame = now  # Fell behind; do not burst to catch up
+            self.stopped.wait(next_frame - now)
+
+    def _writer_loop(self):
+        while not self.stopped.is_set():
+            with self.outbox_ready:
+                while not self.outbox and not self.stopped.is_set():
+                    self.outbox_ready.wait()
+                if self.stopped.is_set():
+                    return
+                due, _, data = self.outbox[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self.outbox_ready.wait(wait)
+                    continue
+                heapq.heappop(self.outbox)
+            self._write(data)
+
+    def _write(self, data):
+        view = memoryview(data)
+        while view and not self.stopped.is_set():
+            try:
+                written = os.write(self.master, view)
+            except BlockingIOError:
+                # Nobody is reading fast enough; wait for the PTY buffer to drain
+                select.select([], [self.master], [], 0.1)
+                continue
+            except OSError:
+                return
+            view = view[written:]
+            self._count("bytes_out", written)
+
+    def format_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        return (f"{stats['commands']} commands in, {stats['acks']} acks and {stats['telemetry']} telemetry "
+                f"frames out ({stats['bytes_out']} bytes), dropped {stats['dropped_in']} in / "
+                f"{stats['dropped_out']} out, corrupted {stats['corrupted']}, "
+                f"{self.decoder.bad_frames} bad frames received")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Emulate drone firmware on a pseudo-terminal")
+    parser.add_argument("--rate", type=float, default=20.0, help="telemetry frames per second")
+    parser.add_argument("--json-only", action="store_true", help="emulate old firmware without binary framing")
+    parser.add_argument("--latency", type=float, default=0.0, help="milliseconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random +/- milliseconds on top of the latency")
+    parser.add_argument("--drop", type=float, default=0.0, help="probability of losing a frame (0-1)")
+    parser.add_argument("--corrupt", type=float, default=0.0, help="probability of corrupting a frame (0-1)")
+    parser.add_argument("--seed", type=int, help="random seed, for repeatable fault patterns")
+    parser.add_argument("--duration", type=float, help="seconds to run (default: until Ctrl+C)")
+    parser.add_argument("--stats-interval", type=float, default=5.0, help="seconds between statistics lines")
+    args = parser.parse_args(argv)
+
+    emulator = DroneEmulator(args.rate, binary=not args.json_only, latency=args.latency / 1000,
+                             jitter=args.jitter / 1000, drop=args.drop, corrupt=args.corrupt, seed=args.seed)
+    print(f"Emulated drone on {emulator.port}", flush=True)
+    emulator.start()
+    start = time.monotonic()
+    try:
+        while args.duration is None or time.monotonic() - start < args.duration:
+            remaining = args.stats_interval
+            if args.duration is not None:
+                remaining = min(remaining, args.duration - (time.monotonic() - start))
+            time.sleep(max(0.0, remaining))
+            print(emulator.format_stats(), flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
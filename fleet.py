@@ -0,0 +1,189 @@
+# Fleet mode:
+# One controller process flying several drones. Every real link is an
+# AsyncDroneConnection on a single shared event loop thread, so dozens of links
+# cost one thread rather than two per drone. Simulated members need no I/O at all.
+import asyncio
+import threading
+
+from async_connection import AsyncDroneConnection
+
+
+class FleetLink:
+    """Synchronous, thread-safe front end for an AsyncDroneConnection on the fleet loop.
+
+    It has the same command methods as DroneConnection, so the UI can drive a
+    fleet member exactly like the single USB link.
+    """
+    def __init__(self, loop, connection):
+        self.loop = loop
+        self.connection = connection
+
+    @property
+    def connected(self):
+        return self.connection.connected
+
+    @property
+    def ack_tracker(self):
+        return self.connection.ack_tracker
+
+    def _submit(self, coroutine):
+        """Schedule a coroutine on the fleet loop without waiting for it"""
+        if not self.connected:
+            coroutine.close()
+            return False
+        asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+        return True
+
+    def send_batch(self, commands):
+        return self._submit(self.connection.send_batch(commands))
+
+    def take_off(self, target_altitude=10):
+        return self._submit(self.connection.take_off(target_altitude))
+
+    def land(self):
+        return self._submit(self.connection.land())
+
+    def move(self, direction, speed):
+        return self._submit(self.connection.move(direction, speed))
+
+    def change_altitude(self, target_altitude):
+        return self._submit(self.connection.change_altitude(target_altitude))
+
+    def stop(self):
+        return self._submit(self.connection.stop())
+
+    def get_telemetry(self):
+        return self.connection.get_telemetry()
+
+    @property
+    def telemetry_history(self):
+        return self.connection.telemetry_history
+
+    def get_latency_stats(self):
+        return self.connection.get_latency_stats()
+
+    def disconnect(self, timeout=2.0):
+        future = asyncio.run_coroutine_threadsafe(self.connection.disconnect(), self.loop)
+        return future.result(timeout)
+
+
+class FleetMember:
+    """One drone in the fleet: a simulator for state/drawing and an optional real link"""
+    def __init__(self, drone_id, simulator, link=None, port=None):
+        self.drone_id = drone_id
+        self.simulator = simulator
+        self.link = link
+        self.port = port
+
+    @property
+    def using_real_drone(self):
+        return self.link is not None and self.link.connected
+
+    def describe(self):
+        if self.link is None:
+            return f"{self.drone_id}: simulated"
+        state = "connected" if self.link.connected else "disconnected"
+        return f"{self.drone_id}: {self.port} ({state})"
+
+
+class FleetManager:
+    """Owns the fleet members and the single event loop thread their links run on"""
+    def __init__(self, simulator_factory):
+        self.simulator_factory = simulator_factory
+        self.members = {}
+        self.loop = None
+        self.loop_thread = None
+        self.loop_lock = threading.Lock()  # Links may be opened from several worker threads
+
+    def __contains__(self, drone_id):
+        return drone_id in self.members
+
+    def _ensure_loop(self):
+        with self.loop_lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                self.loop_thread = threading.Thread(target=self.loop.run_forever, name="fleet-io")
+                self.loop_thread.daemon = True
+                self.loop_thread.start()
+            return self.loop
+
+    def add_simulator(self, drone_id):
+        """Add a simulated drone"""
+        if drone_id in self.members:
+            return False, f"{drone_id} is already in the fleet"
+        self.members[drone_id] = FleetMember(drone_id, self.simulator_factory())
+        return True, f"Added simulated drone {drone_id}"
+
+    def open_link(self, drone_id, port, baudrate=115200, timeout=5.0):
+        """Connect to a drone on a serial port (blocking, run it on a worker thread).
+
+        Returns (success, message, link); add the link with add_link().
+        """
+        loop = self._ensure_loop()
+        connection = AsyncDroneConnection()
+        future = asyncio.run_coroutine_threadsafe(connection.connect(port, baudrate), loop)
+        try:
+            success, message = future.result(timeout)
+        except Exception as e:
+            # Nothing will hold a link that opens after this, so cancel the attempt and close what it opened
+            future.cancel()
+            future.add_done_callback(
+                lambda _: asyncio.run_coroutine_threadsafe(connection.disconnect(), loop))
+            return False, f"Error connecting {drone_id} on {port}: {str(e) or type(e).__name__}", None
+        if not success:
+            return False, message, None
+        return True, f"{drone_id}: {message}", FleetLink(loop, connection)
+
+    def add_link(self, drone_id, link, port):
+        """Add a drone whose link open_link() connected"""
+        if drone_id in self.members:
+            return False, f"{drone_id} is already in the fleet"
+        self.members[drone_id] = FleetMember(drone_id, self.simulator_factory(), link, port)
+        return True, f"Added {drone_id} on {port}"
+
+    def add_drone(self, drone_id, port, baudrate=115200, timeout=5.0):
+        """Connect a real drone on a serial port and add it to the fleet (blocking)"""
+        if drone_id in self.members:
+            return False, f"{drone_id} is already in the fleet"
+        success, message, link = self.open_link(drone_id, port, baudrate, timeout)
+        if success:
+            self.add_link(drone_id, link, port)
+        return success, message
+
+    def detach(self, drone_id):
+        """Take a member out of the fleet without touching its link. Returns it, or None"""
+        return self.members.pop(drone_id, None)
+
+    def remove(self, drone_id):
+        """Take a member out of the fleet and disconnect it (blocking)"""
+        member = self.detach(drone_id)
+        if member is None:
+            return False, f"No drone named {drone_id} in the fleet"
+        if member.using_real_drone:
+            member.link.disconnect()
+        return True, f"Removed {drone_id} from the fleet"
+
+    def targets(self, name):
+        """Members addressed by a drone ID or 'all'"""
+        if name == "all":
+            return list(self.members.values())
+        member = self.members.get(name)
+        return [member] if member else []
+
+    def describe(self):
+        if not self.members:
+            return "Fleet is empty. Use 'fleet add <id> [port]' to add drones."
+        return "Fleet:\n" + "\n".join(member.describe() for member in self.members.values())
+
+    def close(self):
+        """Disconnect every real drone and stop the I/O thread"""
+        for member in self.members.values():
+            if member.using_real_drone:
+                try:
+                    member.link.disconnect()
+                except Exception:
+                    pass
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.loop_thread.join(timeout=1.0)
+            self.loop = None
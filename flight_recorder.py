@@ -0,0 +1,256 @@
+# Flight recorder:
+# FlightRecorder appends timestamped commands and telemetry frames to a
+# directory of fixed-size segment files. Each segment is preallocated and
+# memory-mapped, so recording a frame is a struct pack into the map under a
+# lock, with no system call. A full segment is trimmed to its used length and
+# the next one is started.
+#
+# Records are a small header (time, kind, payload length) followed by the
+# payload: the prompt text as UTF-8 for commands, seven float32 fields for
+# telemetry. Every INDEX_STRIDE-th record is also listed in index.bin, so
+# FlightLog can bisect to any timestamp and only scan a few records from there.
+# FlightReplay plays a recording back at a chosen speed.
+import bisect
+import mmap
+import os
+import struct
+import threading
+import time
+
+SEGMENT_SIZE = 4 * 1024 * 1024  # Bytes per segment file
+INDEX_STRIDE = 64  # Records between index entries
+
+KIND_COMMAND = 1
+KIND_TELEMETRY = 2
+
+HEADER = struct.Struct("<dBH")  # timestamp, kind, payload length
+TELEMETRY = struct.Struct("<7f")  # altitude, x, y, battery, roll, pitch, yaw
+INDEX_ENTRY = struct.Struct("<dII")  # timestamp, segment number, offset
+SEGMENT_NAME = "segment_{:06d}.rec"
+INDEX_NAME = "index.bin"
+
+
+def _segment_numbers(directory):
+    numbers = []
+    for name in os.listdir(directory):
+        if name.startswith("segment_") and name.endswith(".rec"):
+            try:
+                numbers.append(int(name[8:-4]))
+            except ValueError:
+                pass
+    return sorted(numbers)
+
+
+def pack_telemetry(telemetry):
+    attitude = telemetry.get("attitude") or {}
+    return TELEMETRY.pack(telemetry.get("altitude", 0), telemetry.get("x_position", 0),
+                          telemetry.get("y_position", 0), telemetry.get("battery", 0),
+                          attitude.get("roll", 0), attitude.get("pitch", 0), attitude.get("yaw", 0))
+
+
+def unpack_telemetry(payload):
+    altitude, x_position, y_position, battery, roll, pitch, yaw = TELEMETRY.unpack(payload)
+    return {
+        "altitude": round(altitude, 3),
+        "x_position": round(x_position, 3),
+        "y_position": round(y_position, 3),
+        "battery": round(battery, 3),
+        "attitude": {"roll": round(roll, 3), "pitch": round(pitch, 3), "yaw": round(yaw, 3)},
+    }
+
+
+class FlightRecorder:
+    """Thread-safe appender for one recording directory.
+
+    Recording into a directory that already holds segments continues
+    after the last one. Timestamps are kept non-decreasing so the index
+    stays sorted even if the wall clock steps back, also across sessions
+    appended to the same directory.
+    """
+    def __init__(self, directory, segment_size=SEGMENT_SIZE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.segment_size = segment_size
+        self.lock = threading.Lock()
+        self.records = 0
+        self.bytes = 0
+        self.last_time = 0.0
+        self.closed = False
+        self.index_file = open(os.path.join(directory, INDEX_NAME), "ab")
+        numbers = _segment_numbers(directory)
+        if numbers:
+            # Carry on from the end of the existing recording
+            self.last_time = FlightLog(directory).time_range()[1] or 0.0
+        self._open_segment(numbers[-1] + 1 if numbers else 1)
+
+    def _open_segment(self, number):
+        self.segment_number = number
+        self.segment_file = open(os.path.join(self.directory, SEGMENT_NAME.format(number)), "w+b")
+        self.segment_file.truncate(self.segment_size)
+        self.map = mmap.mmap(self.segment_file.fileno(), self.segment_size)
+        self.offset = 0
+
+    def _close_segment(self):
+        # Trim the unused tail so readers see the end of the segment as end of file
+        self.map.flush()
+        self.map.close()
+        self.segment_file.truncate(self.offset)
+        self.segment_file.close()
+
+    def _append(self, kind, payload, timestamp):
+        size = HEADER.size + len(payload)
+        with self.lock:
+            if self.closed:
+                return False
+            timestamp = max(timestamp, self.last_time)
+            if self.offset + size > self.segment_size:
+                self._close_segment()
+                self.index_file.flush()
+                self._open_segment(self.segment_number + 1)
+            if self.records % INDEX_STRIDE == 0 or self.offset == 0:
+                self.index_file.write(INDEX_ENTRY.pack(timestamp, self.segment_number, self.offset))
+            # Payload first: a reader of the live segment stops at a zero header
+            self.map[self.offset + HEADER.size:self.offset + size] = payload
+            HEADER.pack_into(self.map, self.offset, timestamp, kind, len(payload))
+            self.offset += size
+            self.records += 1
+            self.bytes += size
+            self.last_time = timestamp
+            return True
+
+    def record_command(self, text, timestamp=None):
+        """Record a prompt as typed (or clicked)"""
+        payload = text.encode("utf-8")[:0xFFFF]
+        return self._append(KIND_COMMAND, payload, time.time() if timestamp is None else timestamp)
+
+    def record_telemetry(self, telemetry, timestamp=None):
+        """Record a telemetry frame (a dict shaped like DroneConnection.telemetry)"""
+        return self._append(KIND_TELEMETRY, pack_telemetry(telemetry),
+                            time.time() if timestamp is None else timestamp)
+
+    def describe(self):
+        return (f"Recording to {self.directory}: {self.records} records, {self.bytes / 1024:.1f} KiB "
+                f"in {self.segment_number} segment(s)")
+
+    def close(self):
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._close_segment()
+            self.index_file.close()
+
+
+class FlightLog:
+    """Read access to a recording directory"""
+    def __init__(self, directory):
+        if not os.path.isdir(directory):
+            raise ValueError(f"No recording in {directory}")
+        self.directory = directory
+        self.segments = _segment_numbers(directory)
+        if not self.segments:
+            raise ValueError(f"No recording in {directory}")
+        self.index_times, self.index_positions = self._load_index()
+
+    def _load_index(self):
+        """Index entries as parallel lists, rebuilt from the segments if index.bin is missing"""
+        path = os.path.join(self.directory, INDEX_NAME)
+        entries = []
+        if os.path.exists(path):
+            with open(path, "rb") as index:
+                data = index.read()
+            usable = len(data) - len(data) % INDEX_ENTRY.size
+            entries = list(INDEX_ENTRY.iter_unpack(data[:usable]))
+        if not entries:
+            entries = [(timestamp, segment, offset)
+                       for count, (timestamp, _, _, segment, offset) in enumerate(self._scan(self.segments[0], 0))
+                       if count % INDEX_STRIDE == 0]
+        return [entry[0] for entry in entries], [(entry[1], entry[2]) for entry in entries]
+
+    def _scan(self, segment, offset):
+        """Yield (timestamp, kind, payload, segment, offset) from a position to the end"""
+        for number in self.segments:
+            if number < segment:
+                continue
+            path = os.path.join(self.directory, SEGMENT_NAME.format(number))
+            with open(path, "rb") as segment_file:
+                size = os.fstat(segment_file.fileno()).st_size
+                if size == 0:
+                    continue
+                with mmap.mmap(segment_file.fileno(), size, access=mmap.ACCESS_READ) as data:
+                    position = offset if number == segment else 0
+                    while position + HEADER.size <= size:
+                        timestamp, kind, length = HEADER.unpack_from(data, position)
+                        end = position + HEADER.size + length
+                        if kind == 0 or end > size:
+                            break  # Unwritten tail of a segment still being recorded
+                        yield timestamp, kind, data[position + HEADER.size:end], number, position
+                        position = end
+
+    def records(self, start=None):
+        """Yield (timestamp, kind, value) from the first record at or after start.
+
+        value is the prompt text for commands and a telemetry dict for frames.
+        Seeking bisects the index, so only up to INDEX_STRIDE records are
+        skipped before the first one returned.
+        """
+        segment, offset = self.segments[0], 0
+        if start is not None and self.index_times:
+            # Clamped timestamps make runs of equal index times; start before the first of them
+            slot = bisect.bisect_left(self.index_times, start) - 1
+            if slot >= 0:
+                segment, offset = self.index_positions[slot]
+        for timestamp, kind, payload, _, _ in self._scan(segment, offset):
+            if start is not None and timestamp < start:
+                continue
+            if kind == KIND_TELEMETRY:
+                yield timestamp, kind, unpack_telemetry(payload)
+            elif kind == KIND_COMMAND:
+                yield timestamp, kind, payload.decode("utf-8", "replace")
+
+    def time_range(self):
+        """(first, last) timestamps in the recording"""
+        first = last = None
+        for timestamp, _, _ in self.records():
+            first = timestamp
+            break
+        # Only the records after the last index entry need reading
+        for timestamp, _, _ in self.records(self.index_times[-1] if self.index_times else None):
+            last = timestamp
+        return first, last
+
+
+class FlightReplay:
+    """Plays a FlightLog back through callbacks at 1x, 10x or maximum speed.
+
+    steps() applies records and yields the seconds to wait before calling
+    it again, so the UI can schedule it with after(), like mission steps.
+    """
+    def __init__(self, log, speed=1.0, on_telemetry=None, on_command=None, batch=500):
+        self.log = log
+        self.speed = speed  # None replays as fast as possible
+        self.on_telemetry = on_telemetry
+        self.on_command = on_command
+        self.batch = batch  # Records applied per step at maximum speed
+
+    def steps(self, start=None):
+        """Replay from start (a timestamp) to the end. Returns (records, recorded seconds)"""
+        count = 0
+        first = previous = None
+        for timestamp, kind, value in self.log.records(start):
+            if first is None:
+                first = previous = timestamp
+            if self.speed is None:
+                if count and count % self.batch == 0:
+                    yield 0
+            else:
+                delay = (timestamp - previous) / self.speed
+                if delay >= 0.001:
+                    yield delay
+            previous = timestamp
+            count += 1
+            if kind == KIND_TELEMETRY and self.on_telemetry:
+                self.on_telemetry(value)
+            elif kind == KIND_COMMAND and self.on_command:
+                self.on_command(value)
+        return count, (previous - first) if first is not None else 0.0
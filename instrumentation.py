@@ -0,0 +1,231 @@
+# Opt-in performance instrumentation for the control app:
+# Instrumentation times chosen methods (execute_command, animation frames,
+# frame decoding, _process_response, ...) only while it is switched on: on()
+# replaces each probed attribute with a timing wrapper and off() puts the
+# original back, so the hot paths pay nothing while it is off. Timings go
+# into the same fixed-size LatencyHistograms the ack tracker uses.
+# Probed calls can come from the Tk thread and the link's I/O threads at once,
+# so recording into and reading the histograms happens under one lock.
+# Gauges are callables read only when a report is made (queue depths, bytes
+# in and out, frames parsed), so the counters behind them stay as they are.
+#
+# SamplingProfiler answers "where does the time go" without any probes: a
+# background thread samples every thread's stack with sys._current_frames()
+# and dump() writes them as collapsed stacks (one "a;b;c count" line each,
+# readable by flamegraph.pl and speedscope) next to a top-functions summary.
+# Dumps written to the default temp path are deleted by close() at shutdown.
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from ack_tracker import LatencyHistogram
+
+SAMPLE_INTERVAL = 0.005  # Seconds between profiler samples
+REPORT_LIMIT = 15  # Functions listed in a profile summary
+
+
+class Instrumentation:
+    """Toggleable timers around named attributes, plus read-on-demand gauges"""
+    def __init__(self):
+        self.enabled = False
+        self.probes = []  # (owner, attribute, timer name, original value or None if inherited)
+        self.timers = {}  # Timer name -> LatencyHistogram of call durations in ms
+        self.gauges = {}  # Gauge name -> callable returning a number
+        self.started = None  # time.monotonic() of the last on() or reset()
+        self.lock = threading.Lock()  # Guards the histograms against concurrent record() calls
+
+    def probe(self, owner, attribute, name=None):
+        """Time every call of owner.attribute (a method, bound method or module function)"""
+        name = name or attribute
+        original = vars(owner).get(attribute)
+        self.probes.append((owner, attribute, name, original))
+        self.timers.setdefault(name, self._histogram())
+        if self.enabled:
+            self._wrap(owner, attribute, name)
+
+    def gauge(self, name, read):
+        self.gauges[name] = read
+
+    def _histogram(self):
+        # Down to a microsecond: most probed calls are far shorter than a network round trip
+        return LatencyHistogram(min_ms=0.001)
+
+    def _wrap(self, owner, attribute, name):
+        function = getattr(owner, attribute)
+        histogram = self.timers[name]
+        clock = time.perf_counter
+        lock = self.lock
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = (clock() - start) * 1000
+                with lock:
+                    histogram.record(elapsed)
+
+        setattr(owner, attribute, timed)
+
+    def on(self):
+        if self.enabled:
+            return
+        self.enabled = True
+        self.started = time.monotonic()
+        for owner, attribute, name, _ in self.probes:
+            self._wrap(owner, attribute, name)
+
+    def off(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        for owner, attribute, _, original in self.probes:
+            if original is None:
+                delattr(owner, attribute)  # The class attribute shows through again
+            else:
+                setattr(owner, attribute, original)
+
+    def reset(self):
+        """Clear the timers. Gauges read live counters and are not affected"""
+        for name in self.timers:
+            self.timers[name] = self._histogram()
+        if self.enabled:
+            # Re-wrap so the wrappers record into the new histograms
+            self.off()
+            self.on()
+
+    def read_gauges(self):
+        values = {}
+        for name, read in self.gauges.items():
+            try:
+                values[name] = read()
+            except Exception as e:
+                values[name] = f"error: {str(e)}"
+        return values
+
+    def format_report(self):
+        """Timer percentiles and gauge values for the 'perf' command"""
+        if self.enabled:
+            lines = [f"Instrumentation on for {time.monotonic() - self.started:.1f}s (timings in ms):"]
+            with self.lock:
+                summaries = {name: histogram.summary() for name, histogram in self.timers.items()}
+            for name, summary in summaries.items():
+                if summary["count"]:
+                    lines.append(f"{name}: n={summary['count']} mean={summary['mean']:.3f} "
+                                 f"p50={summary['p50']:.3f} p95={summary['p95']:.3f} "
+                                 f"p99={summary['p99']:.3f} max={summary['max']:.3f}")
+                else:
+                    lines.append(f"{name}: not called")
+        else:
+            lines = ["Instrumentation is off ('perf on' starts the timers)"]
+        lines.extend(f"{name}: {value}" for name, value in self.read_gauges().items())
+        return "\n".join(lines)
+
+    def format_panel(self):
+        """A few short lines for the stats panel"""
+        lines = []
+        with self.lock:
+            for name, histogram in self.timers.items():
+                if histogram.count:
+                    lines.append(f"{name}: p95 {histogram.percentile(95):.2f} ms, max {histogram.max_ms:.2f} ms")
+        gauges = self.read_gauges()
+        lines.append(", ".join(f"{name} {value}" for name, value in gauges.items()))
+        return "\n".join(lines)
+
+
+def default_profile_path():
+    return os.path.join(tempfile.gettempdir(), f"drone_profile_{os.getpid()}_{time.strftime('%H%M%S')}.txt")
+
+
+class SamplingProfiler:
+    """Statistical profiler for all Python threads of the process"""
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self.stacks = Counter()  # "thread;outer;...;inner" -> samples
+        self.samples = 0
+        self.thread = None
+        self.stopped = threading.Event()
+        self.started = None
+        self.elapsed = 0.0
+        self.temporary_dumps = []  # Files written to default_profile_path(), deleted on close()
+
+    @property
+    def running(self):
+        return self.thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self.stacks.clear()
+        self.samples = 0
+        self.stopped.clear()
+        self.started = time.monotonic()
+        self.thread = threading.Thread(target=self._sample_loop, name="sampling-profiler")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def stop(self):
+        if not self.running:
+            return
+        self.stopped.set()
+        self.thread.join()
+        self.thread = None
+        self.elapsed = time.monotonic() - self.started
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def summary(self, limit=REPORT_LIMIT):
+        """Top functions by samples on top of the stack (self) and anywhere in it (total)"""
+        own = Counter()
+        total = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if frames:
+                own[frames[-1]] += count
+            for name in set(frames):
+                total[name] += count
+        thread_samples = sum(self.stacks.values()) or 1
+        lines = [f"{self.samples} samples over {self.elapsed:.1f}s, top functions (self% / total%):"]
+        for name, count in own.most_common(limit):
+            lines.append(f"{100 * count / thread_samples:5.1f}% {100 * total[name] / thread_samples:5.1f}%  {name}")
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        """Write the collapsed stacks to a file. Returns its path.
+
+        Without a path the file goes to the temp directory and is deleted by close().
+        """
+        if path is None:
+            path = default_profile_path()
+            self.temporary_dumps.append(path)
+        with open(path, "w", encoding="utf-8") as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+        return path
+
+    def close(self):
+        """Stop sampling and delete the temporary dumps"""
+        self.stop()
+        for path in self.temporary_dumps:
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Never written, or already moved away
+        self.temporary_dumps.clear()
@@ -0,0 +1,233 @@
+# Fuzzy prompt matching:
+# When a prompt is not in the command grammar ("go up a bit", "move ahead at
+# 3"), IntentClassifier guesses which command was meant. It runs locally on the
+# CPU: prompts become hashed character n-gram TF-IDF vectors and are compared
+# with paraphrases of every command (and the descriptions in
+# basic_commands.txt); the intent of the closest paraphrase wins. Numbers in
+# the prompt fill the altitude or speed of the matched command.
+# A match is only a suggestion for the operator to confirm: prompts with a
+# negation, weak matches and near ties between two commands give no match.
+#
+# The example vectors are precomputed into .npy files under intent_index/ and
+# opened with mmap_mode="r", so startup only maps the files instead of retraining.
+# They are rebuilt automatically whenever the training data changes.
+#   python intent_classifier.py --build     rebuild the index
+#   python intent_classifier.py go up a bit classify a prompt
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from command_parser import parse_command
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+INDEX_DIR = os.path.join(BASE_DIR, "intent_index")
+COMMANDS_FILE = os.path.join(BASE_DIR, "basic_commands.txt")
+
+BUCKETS = 1 << 13  # Hashed n-gram feature space
+NGRAM_SIZES = (3, 4, 5)
+MIN_SCORE = 0.5  # Lowest cosine similarity accepted as a match
+MIN_MARGIN = 0.15  # How much closer the best command must be than any other command
+
+NUMBER = re.compile(r"\d+(?:\.\d+)?")
+ABSOLUTE_WORDS = re.compile(r"\b(?:to|at)\b")
+NEGATION = re.compile(r"\b(?:not|no|never|dont|don't|do not|cancel|without)\b")
+
+# Intent -> (prompt without a number, prompt taking the number)
+INTENTS = {
+    "takeoff": ("take off", None),
+    "land": ("land", None),
+    "ascend": ("ascend", "ascend to {}"),
+    "descend": ("descend", "descend to {}"),
+    "move_forward": ("go forward", "go forward at {}"),
+    "move_backward": ("go backward", "go backward at {}"),
+    "move_left": ("go left", "go left at {}"),
+    "move_right": ("go right", "go right at {}"),
+    "stop": ("stop", None),
+    "status": ("status", None),
+}
+
+PARAPHRASES = {
+    "takeoff": ["take off", "takeoff", "lift off", "launch", "launch the drone", "start flying", "get airborne",
+                "take flight", "begin the flight", "leave the ground", "take off please", "go airborne",
+                "start the drone and take off", "lift up off the ground"],
+    "land": ["land", "land now", "touch down", "land the drone", "come down and land", "return to the ground",
+             "set down", "put it down", "landing", "bring it down to the ground", "finish the flight",
+             "land safely", "go down and land"],
+    "ascend": ["up", "ascend", "go up", "go up a bit", "climb", "climb higher", "gain altitude", "rise",
+               "higher", "move up", "increase altitude", "fly higher", "ascend to 40", "climb to 30 meters",
+               "go up to 50", "raise the altitude to 20", "get higher", "a little higher"],
+    "descend": ["down", "descend", "go down", "go down a bit", "lower", "drop lower", "lose altitude",
+                "decrease altitude", "fly lower", "sink", "descend to 5", "drop to 10 meters", "go down to 3",
+                "lower the altitude to 8", "get lower", "a little lower"],
+    "move_forward": ["forward", "go forward", "move ahead", "go ahead", "fly forward", "move forward", "advance",
+                     "go straight", "straight ahead", "forward at 3", "move ahead at 6 m/s", "head forward",
+                     "fly ahead"],
+    "move_backward": ["backward", "back", "go back", "move back", "reverse", "fly backward", "back up",
+                      "go backwards", "retreat", "move backward at 2", "fly back", "head back"],
+    "move_left": ["left", "go left", "turn left", "move left", "fly left", "strafe left", "slide left",
+                  "veer left", "head left at 4", "to the left"],
+    "move_right": ["right", "go right", "turn right", "move right", "fly right", "strafe right", "slide right",
+                   "veer right", "head right at 4", "to the right"],
+    "stop": ["stop", "halt", "hover", "freeze", "hold position", "stop moving", "stay put", "brake",
+             "stand still", "stay where you are", "hold it there", "stop right there"],
+    "status": ["status", "info", "show status", "what is your status", "status report", "give me a report",
+               "report your state", "where are you", "how high are you", "battery level", "how is the drone",
+               "what is the altitude", "current position"],
+}
+
+
+def _features(text):
+    """Hashed character n-gram counts of a prompt, numbers masked"""
+    text = " " + NUMBER.sub("#", " ".join(text.lower().split())) + " "
+    buckets = {}
+    for size in NGRAM_SIZES:
+        for start in range(len(text) - size + 1):
+            bucket = zlib.crc32(text[start:start + size].encode()) & (BUCKETS - 1)
+            buckets[bucket] = buckets.get(bucket, 0) + 1
+    return buckets
+
+
+def _intent_of(command):
+    if command.name == "move":
+        return "move_" + command.direction
+    return command.name if command.name in INTENTS else None
+
+
+def training_examples(commands_file=COMMANDS_FILE):
+    """(text, intent) pairs: the paraphrases plus both sides of basic_commands.txt"""
+    examples = [(text, intent) for intent, texts in PARAPHRASES.items() for text in texts]
+    if os.path.exists(commands_file):
+        with open(commands_file, encoding="utf-8") as commands:
+            for line in commands:
+                names, _, description = line.strip().partition(":")
+                if not description or names.startswith("#"):
+                    continue
+                for name in re.split(r"[/,]", names):
+                    intent = _intent_of(parse_command(name.replace("[number]", "10")))
+                    if intent:
+                        examples.append((name.replace("[number]", "10"), intent))
+                        examples.append((description.strip(), intent))
+                        break
+    return examples
+
+
+def build_index(index_dir=INDEX_DIR, examples=None):
+    """Vectorise the training examples and write the index to index_dir"""
+    examples = training_examples() if examples is None else examples
+    labels = list(INTENTS)
+    features = [_features(text) for text, _ in examples]
+
+    document_frequency = np.zeros(BUCKETS, dtype=np.float64)
+    for buckets in features:
+        document_frequency[list(buckets)] += 1
+    idf = np.log((1 + len(examples)) / (1 + document_frequency)) + 1
+
+    # One unit-length TF-IDF column per example, stored bucket-major so
+    # scoring a prompt reads one contiguous row per n-gram it contains
+    vectors = np.zeros((BUCKETS, len(examples)), dtype=np.float32)
+    for column, buckets in enumerate(features):
+        indices = np.fromiter(buckets, dtype=np.int64, count=len(buckets))
+        weights = np.fromiter(buckets.values(), dtype=np.float64, count=len(buckets)) * idf[indices]
+        vectors[indices, column] = weights / np.linalg.norm(weights)
+
+    os.makedirs(index_dir, exist_ok=True)
+    np.save(os.path.join(index_dir, "vectors.npy"), vectors)
+    np.save(os.path.join(index_dir, "intents.npy"),
+            np.array([labels.index(intent) for _, intent in examples], dtype=np.int16))
+    np.save(os.path.join(index_dir, "idf.npy"), idf.astype(np.float32))
+    with open(os.path.join(index_dir, "index.json"), "w", encoding="utf-8") as meta:
+        json.dump({"labels": labels, "fingerprint": _fingerprint(examples)}, meta)
+
+
+def _fingerprint(examples):
+    """Changes whenever the training data or feature settings change"""
+    digest = hashlib.sha1(repr((BUCKETS, NGRAM_SIZES, sorted(examples))).encode())
+    return digest.hexdigest()
+
+
+class IntentClassifier:
+    """Maps free text to a Command of the existing grammar"""
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        start = time.perf_counter()
+        if not self._index_current():
+            build_index(index_dir)
+        with open(os.path.join(index_dir, "index.json"), encoding="utf-8") as meta:
+            self.labels = json.load(meta)["labels"]
+        self.vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+        self.intents = np.load(os.path.join(index_dir, "intents.npy"), mmap_mode="r")
+        self.idf = np.load(os.path.join(index_dir, "idf.npy"), mmap_mode="r")
+        self.load_seconds = time.perf_counter() - start
+
+    def _index_current(self):
+        try:
+            with open(os.path.join(self.index_dir, "index.json"), encoding="utf-8") as meta:
+                fingerprint = json.load(meta)["fingerprint"]
+        except (OSError, ValueError, KeyError):
+            return False
+        return fingerprint == _fingerprint(training_examples())
+
+    def similarities(self, text):
+        """Cosine similarity of a prompt to every training example"""
+        buckets = _features(text)
+        indices = np.fromiter(buckets, dtype=np.int64, count=len(buckets))
+        weights = np.fromiter(buckets.values(), dtype=np.float32, count=len(buckets)) * self.idf[indices]
+        norm = np.linalg.norm(weights)
+        if not norm:
+            return np.zeros(len(self.intents), dtype=np.float32)
+        return weights @ self.vectors[indices] / norm
+
+    def classify(self, text):
+        """Intent of the closest example and its score.
+
+        The intent is None if the prompt is negated, nothing is close enough,
+        or another command's examples come within MIN_MARGIN of the best one.
+        """
+        similarities = self.similarities(text)
+        # Best score per intent, so the runner-up is a different command
+        scores = np.full(len(self.labels), -1.0, dtype=np.float32)
+        np.maximum.at(scores, np.asarray(self.intents), similarities)
+        runner_up, best = np.argsort(scores)[-2:]
+        score = float(scores[best])
+        if NEGATION.search(text.lower()) or score < MIN_SCORE or score - scores[runner_up] < MIN_MARGIN:
+            return None, score
+        return self.labels[best], score
+
+    def interpret(self, text):
+        """Turn free text into (Command, score). Command is None if no intent matched"""
+        intent, score = self.classify(text)
+        if intent is None:
+            return None, score
+        plain, with_number = INTENTS[intent]
+        number = NUMBER.search(text)
+        if number and with_number:
+            # Altitudes must be absolute ("climb to 40"); a bare number on a move is a speed
+            if intent.startswith("move_") or ABSOLUTE_WORDS.search(text):
+                return parse_command(with_number.format(number.group())), score
+        return parse_command(plain), score
+
+
+def main(argv):
+    if argv[:1] == ["--build"]:
+        build_index()
+        print(f"Built intent index in {INDEX_DIR}")
+        return 0
+    classifier = IntentClassifier()
+    text = " ".join(argv)
+    start = time.perf_counter()
+    command, score = classifier.interpret(text)
+    elapsed = time.perf_counter() - start
+    result = command.text if command else "no match"
+    print(f"{text!r} -> {result} (score {score:.2f}, {elapsed * 1e6:.0f} us, index loaded in "
+          f"{classifier.load_seconds * 1000:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
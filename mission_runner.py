@@ -0,0 +1,220 @@
+# Mission scripts:
+# A mission is a text file with one prompt per line, using the same commands
+# as the control apps. Blank lines and lines starting with '#' are skipped and
+# "wait <seconds>" pauses. MissionRunner reads the file lazily, one line at a
+# time, so a mission can be any length, and times every line it executes.
+#
+# Run a mission from the command line against the simulator or a drone:
+#   python mission_runner.py mission.txt
+#   python mission_runner.py mission.txt --physics --repeat 100 --quiet
+#   python mission_runner.py mission.txt --port /dev/ttyUSB0
+import argparse
+import sys
+import time
+
+from command_parser import parse_command
+from simulation import DroneSimulator
+
+SETTLE_LIMIT = 600  # Simulated seconds a physics drone gets to finish a command
+
+
+def _describe_sent(sent, description):
+    if sent:
+        return f"Command sent: {description}"
+    return f"Command queue full, dropped: {description}"
+
+
+def _link_ascend(link, command):
+    altitude = command.altitude
+    if altitude is None:
+        altitude = link.get_telemetry().get("altitude", 0) + 5
+    return _describe_sent(link.change_altitude(altitude), f"Ascend to {altitude}m")
+
+
+def _link_descend(link, command):
+    altitude = command.altitude
+    if altitude is None:
+        altitude = max(0, link.get_telemetry().get("altitude", 0) - 5)
+    return _describe_sent(link.change_altitude(altitude), f"Descend to {altitude}m")
+
+
+def _link_status(link, command):
+    telemetry = link.get_telemetry()
+    attitude = telemetry.get("attitude", {})
+    return (f"Altitude: {telemetry.get('altitude', 0)}m, "
+            f"Position: X={telemetry.get('x_position', 0)}m, Y={telemetry.get('y_position', 0)}m, "
+            f"Battery: {telemetry.get('battery', 0)}%, "
+            f"Attitude: Roll={attitude.get('roll', 0)}°, Pitch={attitude.get('pitch', 0)}°, Yaw={attitude.get('yaw', 0)}°")
+
+
+# Command name -> how to run it, for a DroneSimulator and for a DroneConnection
+SIMULATOR_ACTIONS = {
+    "takeoff": lambda drone, command: drone.take_off(),
+    "land": lambda drone, command: drone.land(),
+    "ascend": lambda drone, command: drone.ascend(command.altitude),
+    "descend": lambda drone, command: drone.descend(command.altitude),
+    "move": lambda drone, command: drone.move(command.direction, command.speed),
+    "stop": lambda drone, command: drone.stop(),
+    "status": lambda drone, command: drone.get_status(),
+}
+LINK_ACTIONS = {
+    "takeoff": lambda link, command: _describe_sent(link.take_off(), "Take off"),
+    "land": lambda link, command: _describe_sent(link.land(), "Land"),
+    "ascend": _link_ascend,
+    "descend": _link_descend,
+    "move": lambda link, command: _describe_sent(link.move(command.direction, command.speed),
+                                                 f"Move {command.direction} at {command.speed} m/s"),
+    "stop": lambda link, command: _describe_sent(link.stop(), "Stop"),
+    "status": _link_status,
+}
+
+
+class MissionRunner:
+    """Runs mission files against a DroneSimulator or a link (DroneConnection or FleetLink).
+
+    With a physics simulator each command is flown to completion in
+    simulated time (as fast as the CPU allows) before the next line, and
+    "wait" steps the simulation instead of sleeping. With a real drone the
+    runner only queues commands, so missions should use "wait" to give
+    the drone time to fly.
+    """
+    def __init__(self, target, output=print, verbose=True, stop_on_error=False):
+        self.target = target
+        self.output = output
+        self.verbose = verbose
+        self.stop_on_error = stop_on_error
+        # Anything that is not a simulator is a link: DroneConnection, FleetLink, ...
+        self.is_link = not isinstance(target, DroneSimulator)
+        self.actions = LINK_ACTIONS if self.is_link else SIMULATOR_ACTIONS
+
+    def read_lines(self, path):
+        """Yield (line number, prompt) for each command line, reading lazily"""
+        with open(path, encoding="utf-8") as mission:
+            for line_number, line in enumerate(mission, 1):
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line_number, line
+
+    def execute(self, command):
+        """Run one parsed command. Returns (response, seconds to wait before the next line)"""
+        if command.name == "wait":
+            if self.is_link:
+                return f"Waiting {command.seconds:g} seconds", command.seconds
+            self.target.run(command.seconds)
+            return f"Waited {command.seconds:g} simulated seconds", 0
+
+        action = self.actions.get(command.name)
+        if action is None:
+            if command.error:
+                raise ValueError(command.error)
+            if command.name == "unknown":
+                raise ValueError(f"Unknown command: '{command.text}'")
+            raise ValueError(f"Command not available in missions: '{command.text}'")
+        response = action(self.target, command)
+        if not self.is_link and self.target.physics:
+            self.target.run(SETTLE_LIMIT, until=DroneSimulator.settled)
+        return response, 0
+
+    def steps(self, path):
+        """Run a mission one line per iteration.
+
+        Yields the number of seconds to wait before the next line, so a UI
+        can schedule each line with after() and a script can sleep. A wait
+        on the simulator yields 0 between chunks of simulated time. Returns
+        the summary dict when the mission ends.
+        """
+        summary = {"lines": 0, "errors": 0, "seconds": 0.0, "slowest": None, "slowest_seconds": 0.0}
+        try:
+            for line_number, text in self.read_lines(path):
+                start = time.perf_counter()
+                elapsed = 0.0
+                command = parse_command(text)
+                if command.name == "wait" and not self.is_link:
+                    # Step the simulation a chunk per iteration, so a UI stays responsive through long waits
+                    for _ in self.target.run_chunks(command.seconds):
+                        elapsed += time.perf_counter() - start
+                        yield 0
+                        start = time.perf_counter()
+                    response, delay = f"Waited {command.seconds:g} simulated seconds", 0
+                else:
+                    try:
+                        response, delay = self.execute(command)
+                    except ValueError as e:
+                        response, delay = f"Error: {str(e)}", 0
+                        summary["errors"] += 1
+                elapsed += time.perf_counter() - start
+
+                summary["lines"] += 1
+                summary["seconds"] += elapsed
+                if elapsed > summary["slowest_seconds"]:
+                    summary["slowest"] = line_number
+                    summary["slowest_seconds"] = elapsed
+                if self.verbose or response.startswith("Error"):
+                    self.output(f"{line_number}: {text} ({elapsed * 1000:.3f} ms)\n{response}")
+
+                if summary["errors"] and self.stop_on_error:
+                    break
+                yield delay
+        except OSError as e:
+            self.output(f"Error reading mission {path}: {str(e)}")
+            summary["errors"] += 1
+        self.output(self.format_summary(path, summary))
+        return summary
+
+    def run(self, path):
+        """Run a whole mission, sleeping through waits. Returns the summary dict"""
+        steps = self.steps(path)
+        while True:
+            try:
+                delay = next(steps)
+            except StopIteration as finished:
+                return finished.value
+            if delay:
+                time.sleep(delay)
+
+    def format_summary(self, path, summary):
+        lines = summary["lines"]
+        text = (f"Mission {path}: {lines} lines, {summary['errors']} errors, "
+                f"{summary['seconds'] * 1000:.1f} ms executing")
+        if lines:
+            text += (f", {summary['seconds'] / lines * 1e6:.1f} us/line, slowest line "
+                     f"{summary['slowest']} ({summary['slowest_seconds'] * 1000:.3f} ms)")
+        if not self.is_link and self.target.physics:
+            text += f", {self.target.sim_time:.1f} s simulated"
+        return text
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a drone mission script")
+    parser.add_argument("mission", help="text file with one command per line")
+    parser.add_argument("--port", help="serial port of a real drone (default: simulator)")
+    parser.add_argument("--baudrate", type=int, default=115200)
+    parser.add_argument("--physics", action="store_true", help="fly the simulator with physics")
+    parser.add_argument("--repeat", type=int, default=1, help="run the mission this many times back to back")
+    parser.add_argument("--quiet", action="store_true", help="only print mission summaries and errors")
+    parser.add_argument("--stop-on-error", action="store_true")
+    args = parser.parse_args(argv)
+
+    connection = None
+    if args.port:
+        from connector import DroneConnection
+        connection = DroneConnection()
+        success, message = connection.connect(args.port, args.baudrate)
+        print(message)
+        if not success:
+            return 1
+
+    errors = 0
+    try:
+        for _ in range(args.repeat):
+            target = connection or DroneSimulator(physics=args.physics)
+            runner = MissionRunner(target, verbose=not args.quiet, stop_on_error=args.stop_on_error)
+            errors += runner.run(args.mission)["errors"]
+    finally:
+        if connection:
+            connection.disconnect()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
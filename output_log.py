@@ -0,0 +1,144 @@
+# Command output for the control apps:
+# OutputLog sits between update_output() and the ScrolledText widget. Messages
+# are queued (from any thread) and written to the widget in one insert per
+# flush, and the widget only keeps the newest max_lines lines so inserts and
+# see(END) stay fast however long the session runs. Every message is also
+# appended to a log file on disk, where search() finds older output without
+# loading it back into the widget. Search results are shown but not logged, so
+# one search never finds the output of another. The default log file lives in
+# the temp directory for one session and is deleted by close(); a path passed in
+# is kept.
+import os
+import tempfile
+import threading
+import time
+import tkinter as tk
+from collections import deque
+
+MAX_LINES = 5000  # Lines kept in the widget
+FLUSH_INTERVAL = 50  # Milliseconds a message may wait to be batched with others
+POLL_INTERVAL = 250  # Milliseconds between checks for messages from other threads
+SEARCH_LIMIT = 50  # Matches returned by search()
+
+
+def default_log_path():
+    return os.path.join(tempfile.gettempdir(), f"drone_output_{os.getpid()}.log")
+
+
+class OutputLog:
+    """Bounded, batched output widget backed by a searchable log file"""
+    def __init__(self, root, widget, max_lines=MAX_LINES, path=None):
+        self.root = root
+        self.widget = widget
+        self.max_lines = max_lines
+        self.path = path or default_log_path()
+        self.temporary = path is None  # Deleted on close()
+        self.log_file = open(self.path, "a", encoding="utf-8")
+        self.owner = threading.current_thread()  # Only this thread may touch Tk
+        self.lock = threading.Lock()
+        self.pending = deque()
+        self.flush_scheduled = False
+        self.lines = 0  # Lines currently in the widget
+        self.stats = {"messages": 0, "flushes": 0, "trimmed": 0}
+        self.root.after(POLL_INTERVAL, self._poll)
+
+    def write(self, message, log=True):
+        """Queue a message for the widget, and the log file unless log is False.
+
+        Safe to call from any thread.
+        """
+        with self.lock:
+            self.pending.append((time.strftime("%H:%M:%S"), message, log))
+            if self.flush_scheduled:
+                return
+            self.flush_scheduled = True
+        # Other threads leave the flush to _poll(), as Tk may only be used from its own thread
+        if threading.current_thread() is self.owner:
+            self.root.after(FLUSH_INTERVAL, self.flush)
+
+    def flush(self):
+        """Write every queued message to the log file and the widget at once"""
+        with self.lock:
+            messages = list(self.pending)
+            self.pending.clear()
+            self.flush_scheduled = False
+        if not messages:
+            return
+
+        self._write_log(messages)
+        text = "".join(message + "\n\n" for _, message, _ in messages)
+        self.widget.config(state=tk.NORMAL)
+        self.widget.insert(tk.END, text)
+        self.lines += text.count("\n")
+        if self.lines > self.max_lines:
+            # Older lines are still in the log file
+            excess = self.lines - self.max_lines
+            self.widget.delete("1.0", f"{excess + 1}.0")
+            self.lines -= excess
+            self.stats["trimmed"] += excess
+        self.widget.see(tk.END)
+        self.widget.config(state=tk.DISABLED)
+        self.stats["messages"] += len(messages)
+        self.stats["flushes"] += 1
+
+    def _write_log(self, messages):
+        try:
+            self.log_file.write("".join(f"{stamp} {line}\n" for stamp, message, log in messages if log
+                                        for line in message.splitlines() or [""]))
+            self.log_file.flush()
+        except (OSError, ValueError) as e:
+            print(f"Error writing output log: {str(e)}")
+
+    def _poll(self):
+        # Picks up messages queued by other threads, which cannot schedule a flush
+        if self.pending:
+            self.flush()
+        self.root.after(POLL_INTERVAL, self._poll)
+
+    def search(self, text, limit=SEARCH_LIMIT):
+        """Find logged lines containing text (case-insensitive).
+
+        Reads the log file line by line, so it works however long the
+        session has been. Returns the newest `limit` matches as
+        (line number, line) pairs.
+        """
+        text = text.lower()
+        matches = deque(maxlen=limit)
+        try:
+            self.log_file.flush()
+            with open(self.path, encoding="utf-8") as log:
+                for number, line in enumerate(log, 1):
+                    if text in line.lower():
+                        matches.append((number, line.rstrip("\n")))
+        except OSError as e:
+            print(f"Error searching output log: {str(e)}")
+        return list(matches)
+
+    def format_search(self, text):
+        """Search results as one message for the widget"""
+        matches = self.search(text)
+        if not matches:
+            return f"No output matching '{text}' in {self.path}"
+        lines = [f"{len(matches)} most recent lines matching '{text}' in {self.path}:"]
+        lines.extend(f"{number}: {line}" for number, line in matches)
+        return "\n".join(lines)
+
+    def show_search(self, text):
+        """Show search results in the widget without logging them"""
+        self.write(self.format_search(text), log=False)
+
+    def close(self):
+        """Write anything still queued to the log file (the widget may be gone) and close it.
+
+        The session's temporary log file is deleted.
+        """
+        with self.lock:
+            messages = list(self.pending)
+            self.pending.clear()
+        self._write_log(messages)
+        self.log_file.close()
+        if self.temporary:
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                print(f"Error removing output log: {str(e)}")
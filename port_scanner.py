@@ -0,0 +1,104 @@
+# Serial port discovery off the Tk thread:
+# Listing ports can take seconds on machines with many USB and Bluetooth
+# serial devices, and opening one can hang just as long. PortScanner runs
+# comports() on a small worker pool and keeps the result (device, VID/PID,
+# description) cached, so the UI always reads the last scan instantly and
+# periodic rescans pick up devices being plugged in or removed.
+# when_done() hands a worker's result back to the Tk thread with after().
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+import serial.tools.list_ports
+
+POLL_INTERVAL = 50  # Milliseconds between checks on a running job
+REFRESH_INTERVAL = 3000  # Milliseconds between hotplug rescans
+
+
+class PortInfo(NamedTuple):
+    """Metadata of one serial port, as reported by the OS"""
+    device: str
+    description: str = ""
+    vid: Optional[int] = None
+    pid: Optional[int] = None
+    serial_number: Optional[str] = None
+    manufacturer: Optional[str] = None
+
+    @property
+    def label(self):
+        """Text for the port list: device, description and USB IDs when known"""
+        label = self.device
+        if self.description and self.description != "n/a" and self.description != self.device:
+            label += f" - {self.description}"
+        if self.vid is not None and self.pid is not None:
+            label += f" ({self.vid:04X}:{self.pid:04X})"
+        return label
+
+
+class PortScanner:
+    """Cached serial port list, refreshed on a worker pool"""
+    def __init__(self, executor=None):
+        self.executor = executor or ThreadPoolExecutor(max_workers=2, thread_name_prefix="serial-io")
+        self.lock = threading.Lock()
+        self.ports = {}  # Device -> PortInfo from the last scan
+        self.scanning = None  # Future of the scan in progress
+
+    def cached(self):
+        """Ports found by the last scan, without touching any device"""
+        with self.lock:
+            return list(self.ports.values())
+
+    def device_for(self, text):
+        """Device name for a port list label, or the text itself if it was typed in"""
+        with self.lock:
+            for info in self.ports.values():
+                if info.label == text:
+                    return info.device
+        return text
+
+    def scan(self):
+        """List the ports now (blocking) and update the cache.
+
+        Returns (ports, added, removed), the last two being lists of device
+        names that appeared or disappeared since the previous scan.
+        """
+        found = {}
+        for port in serial.tools.list_ports.comports():
+            found[port.device] = PortInfo(port.device, port.description or "", port.vid, port.pid,
+                                          port.serial_number, port.manufacturer)
+        with self.lock:
+            added = [device for device in found if device not in self.ports]
+            removed = [device for device in self.ports if device not in found]
+            self.ports = found
+        return sorted(found.values()), added, removed
+
+    def scan_async(self):
+        """Start a scan on the worker pool, or return the one already running"""
+        with self.lock:
+            if self.scanning is None or self.scanning.done():
+                self.scanning = self.executor.submit(self.scan)
+            return self.scanning
+
+    def submit(self, function, *args):
+        """Run any other blocking device call (connect, disconnect) on the pool"""
+        return self.executor.submit(function, *args)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def when_done(root, future, callback, interval=POLL_INTERVAL):
+    """Call callback(result) on the Tk thread once a worker future finishes.
+
+    Polls with root.after(), so neither thread blocks. If the job raised,
+    callback gets the exception instead of a result.
+    """
+    def check():
+        if not future.done():
+            root.after(interval, check)
+            return
+        if future.cancelled():
+            return
+        error = future.exception()
+        callback(error if error is not None else future.result())
+    root.after(interval, check)
@@ -0,0 +1,355 @@
+# Wire protocol for the drone link:
+# Two framings share the same command dictionaries. JSON lines are understood by
+# every firmware; the compact binary framing is switched on after the firmware
+# acknowledges a protocol_request.
+#
+# Binary frame layout (little endian):
+#   sync (0xA5 0x5A) | message type (u8) | sequence (u16) | payload length (u16) | payload | CRC-16 (u16)
+# The CRC is CRC-16/CCITT-FALSE over everything after the sync bytes. A sequence
+# number of 0 means no acknowledgement is wanted. The sync byte 0xA5 can never
+# start a JSON line, so both framings can coexist on the port while the link
+# switches over.
+import binascii
+import json
+import struct
+
+PROTOCOL_VERSION = 1
+
+SYNC = b"\xa5\x5a"
+HEADER = struct.Struct("<2sBHH")
+CRC = struct.Struct("<H")
+MAX_PAYLOAD = 1024
+
+# Message types, commands from the ground station
+MSG_STATUS_REQUEST = 0x01
+MSG_TAKEOFF = 0x02
+MSG_LAND = 0x03
+MSG_MOVE = 0x04
+MSG_ALTITUDE = 0x05
+MSG_STOP = 0x06
+# Message types, replies from the drone
+MSG_TELEMETRY = 0x80
+MSG_ACK = 0x81
+
+# Fixed payload layouts
+TAKEOFF_LAYOUT = struct.Struct("<f")        # target altitude
+MOVE_LAYOUT = struct.Struct("<ff")          # vx, vy
+ALTITUDE_LAYOUT = struct.Struct("<f")       # target altitude
+TELEMETRY_LAYOUT = struct.Struct("<fffBfff")  # altitude, x, y, battery, roll, pitch, yaw
+
+
+def crc16(data, crc=0xFFFF):
+    """CRC-16/CCITT-FALSE"""
+    return binascii.crc_hqx(data, crc)
+
+
+# Command dictionaries shared by the threaded and asyncio links
+def takeoff_command(target_altitude=10):
+    return {
+        "type": "command",
+        "action": "takeoff",
+        "altitude": target_altitude
+    }
+
+
+def land_command():
+    return {
+        "type": "command",
+        "action": "land"
+    }
+
+
+def move_command(direction, speed):
+    """Map a direction and speed to a velocity setpoint command"""
+    vx, vy = 0, 0
+    if direction == "forward":
+        vx = speed
+    elif direction == "backward":
+        vx = -speed
+    elif direction == "left":
+        vy = -speed
+    elif direction == "right":
+        vy = speed
+
+    return {
+        "type": "command",
+        "action": "move",
+        "velocity": {
+            "vx": vx,
+            "vy": vy
+        }
+    }
+
+
+def altitude_command(target_altitude):
+    return {
+        "type": "command",
+        "action": "altitude",
+        "target": target_altitude
+    }
+
+
+def stop_command():
+    return {
+        "type": "command",
+        "action": "stop"
+    }
+
+
+def status_request():
+    return {"type": "status_request"}
+
+
+def protocol_request():
+    """Command asking the firmware to switch to binary framing"""
+    return {"type": "protocol_request", "protocol": "binary", "version": PROTOCOL_VERSION}
+
+
+def is_protocol_ack(response):
+    """True if a decoded response accepts the binary protocol_request"""
+    return (response.get("type") == "protocol_ack"
+            and response.get("protocol") == "binary"
+            and response.get("version") == PROTOCOL_VERSION)
+
+
+class JsonCodec:
+    """Newline-delimited JSON framing understood by all firmware versions"""
+    name = "json"
+
+    def encode(self, command):
+        return (json.dumps(command) + "\n").encode("utf-8")
+
+    def decode(self, line):
+        """Parse one line (bytes or a memoryview of it) into a message dictionary"""
+        return json.loads(str(line, "utf-8"))
+
+
+class BinaryCodec:
+    """Fixed-layout struct packets with a message type, length and CRC"""
+    name = "binary"
+
+    def encode(self, command):
+        msg_type, payload = self._encode_payload(command)
+        seq = command.get("seq", 0) & 0xFFFF
+        body = HEADER.pack(SYNC, msg_type, seq, len(payload)) + payload
+        return body + CRC.pack(crc16(body[2:]))
+
+    def _encode_payload(self, command):
+        if command.get("type") == "status_request":
+            return MSG_STATUS_REQUEST, b""
+        if command.get("type") == "ack":
+            return MSG_ACK, b""
+        if command.get("type") == "telemetry":
+            data = command.get("data", {})
+            attitude = data.get("attitude", {})
+            battery = max(0, min(255, int(round(data.get("battery", 0)))))
+            return MSG_TELEMETRY, TELEMETRY_LAYOUT.pack(
+                data.get("altitude", 0), data.get("x_position", 0), data.get("y_position", 0),
+                battery, attitude.get("roll", 0), attitude.get("pitch", 0), attitude.get("yaw", 0))
+
+        action = command.get("action")
+        if action == "takeoff":
+            return MSG_TAKEOFF, TAKEOFF_LAYOUT.pack(command.get("altitude", 10))
+        if action == "land":
+            return MSG_LAND, b""
+        if action == "move":
+            velocity = command.get("velocity", {})
+            return MSG_MOVE, MOVE_LAYOUT.pack(velocity.get("vx", 0), velocity.get("vy", 0))
+        if action == "altitude":
+            return MSG_ALTITUDE, ALTITUDE_LAYOUT.pack(command["target"])
+        if action == "stop":
+            return MSG_STOP, b""
+        raise ValueError(f"No binary encoding for command: {command}")
+
+    def decode(self, msg_type, payload, seq=0):
+        """Turn a binary payload back into the equivalent message dictionary"""
+        message = self._decode_payload(msg_type, payload)
+        if seq:
+            message["seq"] = seq
+        return message
+
+    def _decode_payload(self, msg_type, payload):
+        if msg_type == MSG_TELEMETRY:
+            altitude, x, y, battery, roll, pitch, yaw = TELEMETRY_LAYOUT.unpack_from(payload)
+            return {
+                "type": "telemetry",
+                "data": {
+                    "altitude": altitude,
+                    "x_position": x,
+                    "y_position": y,
+                    "battery": battery,
+                    "attitude": {"roll": roll, "pitch": pitch, "yaw": yaw}
+                }
+            }
+        if msg_type == MSG_ACK:
+            return {"type": "ack"}
+        if msg_type == MSG_STATUS_REQUEST:
+            return {"type": "status_request"}
+        if msg_type == MSG_TAKEOFF:
+            return {"type": "command", "action": "takeoff",
+                    "altitude": TAKEOFF_LAYOUT.unpack_from(payload)[0]}
+        if msg_type == MSG_LAND:
+            return {"type": "command", "action": "land"}
+        if msg_type == MSG_MOVE:
+            vx, vy = MOVE_LAYOUT.unpack_from(payload)
+            return {"type": "command", "action": "move", "velocity": {"vx": vx, "vy": vy}}
+        if msg_type == MSG_ALTITUDE:
+            return {"type": "command", "action": "altitude",
+                    "target": ALTITUDE_LAYOUT.unpack_from(payload)[0]}
+        if msg_type == MSG_STOP:
+            return {"type": "command", "action": "stop"}
+        raise ValueError(f"Unknown message type: 0x{msg_type:02x}")
+
+
+# Frame kinds yielded by FrameDecoder
+FRAME_JSON = 0
+FRAME_BINARY = 1
+
+_JSON_CODEC = JsonCodec()
+_BINARY_CODEC = BinaryCodec()
+
+
+def decode_frame(kind, msg_type, seq, frame):
+    """Decode a frame from FrameDecoder.frames(), or None if it is malformed"""
+    try:
+        if kind == FRAME_BINARY:
+            return _BINARY_CODEC.decode(msg_type, frame, seq)
+        return _JSON_CODEC.decode(frame)
+    except (ValueError, struct.error) as e:
+        # json.JSONDecodeError and UnicodeDecodeError are both ValueErrors
+        print(f"Invalid response frame: {str(e)}")
+        return None
+
+
+class FrameDecoder:
+    """Incremental decoder for a serial byte stream.
+
+    Bytes are appended to one preallocated bytearray and complete frames are
+    handed out as memoryview slices of it, so nothing is copied between the
+    read and the struct/JSON decode. JSON lines and binary frames may be mixed
+    in the same stream. Partial frames stay in the buffer until the rest
+    arrives; bytes that cannot start a frame are skipped and counted.
+    """
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.buffer = bytearray(capacity)
+        self.view = memoryview(self.buffer)
+        self.start = 0  # first unconsumed byte
+        self.end = 0    # one past the last received byte
+        self.frames_decoded = 0
+        self.bad_frames = 0
+        self.bytes_received = 0
+        self.dropped_bytes = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def free_space(self):
+        self._make_room()
+        return self.capacity - self.end
+
+    def feed(self, data):
+        """Append received bytes. Returns how many fitted; drain frames() and feed the rest"""
+        count = min(len(data), self.free_space())
+        self.buffer[self.end:self.end + count] = data[:count]
+        self.end += count
+        self.bytes_received += count
+        return count
+
+    def fill(self, port):
+        """Read what the port has waiting, blocking up to its timeout only when idle"""
+        count = 0
+        if not port.in_waiting:
+            first = port.read(1)
+            if not first:
+                return 0
+            count = self.feed(first)
+        waiting = port.in_waiting
+        if waiting:
+            count += self.feed(port.read(min(waiting, self.free_space())))
+        return count
+
+    def decode(self, data):
+        """Feed a chunk of bytes and yield every complete decoded message"""
+        data = memoryview(data)
+        while data:
+            count = self.feed(data)
+            data = data[count:]
+            for frame in self.frames():
+                message = decode_frame(*frame)
+                if message is not None:
+                    yield message
+
+    def frames(self):
+        """Yield (kind, msg_type, seq, view) for each complete frame in the buffer.
+
+        The views point into the shared buffer and are only valid until the
+        next feed() or fill().
+        """
+        buffer = self.buffer
+        while self.start < self.end:
+            start = self.start
+            available = self.end - start
+            first = buffer[start]
+
+            if first == SYNC[0]:
+                if available < 2:
+                    break
+                if buffer[start + 1] != SYNC[1]:
+                    self._skip(1)
+                    continue
+                if available < HEADER.size:
+                    break
+                _, msg_type, seq, length = HEADER.unpack_from(buffer, start)
+                if length > MAX_PAYLOAD:
+                    self.bad_frames += 1
+                    self._skip(1)
+                    continue
+                payload_end = start + HEADER.size + length
+                if self.end < payload_end + CRC.size:
+                    break
+                if CRC.unpack_from(buffer, payload_end)[0] != crc16(self.view[start + 2:payload_end]):
+                    # Resynchronise on the next sync byte
+                    self.bad_frames += 1
+                    self._skip(1)
+                    continue
+                self.start = payload_end + CRC.size
+                self.frames_decoded += 1
+                yield FRAME_BINARY, msg_type, seq, self.view[start + HEADER.size:payload_end]
+
+            elif first == 0x7B:  # "{" starts a JSON line
+                newline = buffer.find(b"\n", start, self.end)
+                if newline < 0:
+                    if available >= self.capacity:
+                        # A line longer than the buffer can never complete
+                        self.bad_frames += 1
+                        self._skip(available)
+                        continue
+                    break
+                self.start = newline + 1
+                self.frames_decoded += 1
+                yield FRAME_JSON, None, 0, self.view[start:newline]
+
+            else:
+                # Whitespace, text noise or line noise: skip to the next plausible frame start
+                nxt = self.end
+                for marker in (b"\n", b"{", SYNC[:1]):
+                    found = buffer.find(marker, start + 1, nxt)
+                    if found >= 0:
+                        nxt = found
+                if buffer[start] not in b"\r\n \t":
+                    self.dropped_bytes += nxt - start
+                self.start = nxt
+
+    def _skip(self, count):
+        self.dropped_bytes += count
+        self.start += count
+
+    def _make_room(self):
+        if self.start == self.end:
+            self.start = self.end = 0
+        elif self.end == self.capacity and self.start > 0:
+            # Move the partial frame to the front; copies only the unconsumed tail
+            remaining = self.end - self.start
+            self.buffer[:remaining] = bytes(self.view[self.start:self.end])
+            self.start, self.end = 0, remaining
@@ -0,0 +1,177 @@
+# Drone drawing for the control apps:
+# DroneRenderer creates the canvas items for the drone once and then only
+# moves them with canvas.coords(), instead of deleting and recreating the
+# propellers every frame and asking Tk for bounding boxes. A frame whose
+# geometry matches the last one drawn costs no Tk calls at all, so an idle
+# drone costs next to nothing, and every frame drawn is timed.
+#
+# FrameScheduler decides when to draw: fast while the drone flies or moves,
+# slowly while it sits still, and only when the drawn state has a new version.
+import math
+import time
+from collections import deque
+
+FRAME_SAMPLES = 120  # Recent frame times kept for the average
+ACTIVE_INTERVAL = 33  # Milliseconds between frames while the drone flies or moves
+IDLE_INTERVAL = 500  # Milliseconds between checks while it sits still
+PROPELLER_ANGLES = (45, 135, -45, -135)  # Rotation offset of each propeller
+PROPELLER_CORNERS = ((-1, -1), (1, -1), (-1, 1), (1, 1))  # Where each propeller sits on the body
+
+
+class DroneRenderer:
+    """Retained-mode drawing of one drone on a Tk canvas"""
+    def __init__(self, canvas, x, y, size=30, indicator=False):
+        self.canvas = canvas
+        self.size = size
+        self.prop_size = size / 3
+        self.position = (x, y)
+        self.angle = None  # None until the propellers first spin: drawn pointing outwards
+        self.frames_drawn = 0
+        self.frames_skipped = 0
+        self.frame_times = deque(maxlen=FRAME_SAMPLES)
+        self.slowest_frame = 0.0
+
+        # Create the items once; draw() only ever moves them
+        self.body = canvas.create_oval(*self._body_coords(x, y), fill="gray", outline="black", width=2)
+        self.propellers = [canvas.create_line(*coords, width=3) for coords in self._propeller_coords(x, y)]
+        self.indicator = canvas.create_polygon(*self._indicator_coords(x, y), fill="red") if indicator else None
+
+    def layout(self, x_position, altitude, max_altitude, scale):
+        """Canvas position of a drone at the given position and altitude"""
+        canvas_width = self.canvas.winfo_width() or 400
+        canvas_height = self.canvas.winfo_height() or 400
+
+        # Limit x position to stay on canvas
+        center_x = canvas_width / 2 + x_position * scale
+        center_x = max(self.size, min(canvas_width - self.size, center_x))
+
+        # Higher altitude is a lower y coordinate, leaving some space at the top
+        ground_y = canvas_height - 20
+        max_height_pixels = ground_y - 50
+        altitude_ratio = altitude / max_altitude
+        center_y = ground_y - max(0, min(1, altitude_ratio)) * max_height_pixels
+        return center_x, center_y
+
+    def draw(self, x, y, angle=None):
+        """Move the drone to (x, y), spinning the propellers to angle if given.
+
+        Returns False without touching the canvas if nothing would change.
+        """
+        if angle is None:
+            angle = self.angle
+        if (x, y) == self.position and angle == self.angle:
+            self.frames_skipped += 1
+            return False
+
+        start = time.perf_counter()
+        self.position = (x, y)
+        self.angle = angle
+        self.canvas.coords(self.body, *self._body_coords(x, y))
+        for item, coords in zip(self.propellers, self._propeller_coords(x, y)):
+            self.canvas.coords(item, *coords)
+        if self.indicator is not None:
+            self.canvas.coords(self.indicator, *self._indicator_coords(x, y))
+
+        elapsed = time.perf_counter() - start
+        self.frames_drawn += 1
+        self.frame_times.append(elapsed)
+        self.slowest_frame = max(self.slowest_frame, elapsed)
+        return True
+
+    def format_report(self):
+        """One line of frame statistics for the status output"""
+        average = sum(self.frame_times) / len(self.frame_times) if self.frame_times else 0
+        return (f"Renderer: {self.frames_drawn} frames drawn, {self.frames_skipped} skipped, "
+                f"{average * 1000:.3f} ms average, {self.slowest_frame * 1000:.3f} ms slowest")
+
+    def _body_coords(self, x, y):
+        radius = self.size / 2
+        return x - radius, y - radius, x + radius, y + radius
+
+    def _propeller_coords(self, x, y):
+        radius = self.size / 2
+        for (corner_x, corner_y), offset in zip(PROPELLER_CORNERS, PROPELLER_ANGLES):
+            start_x, start_y = x + corner_x * radius, y + corner_y * radius
+            if self.angle is None:
+                end_x, end_y = start_x + corner_x * self.prop_size, start_y + corner_y * self.prop_size
+            else:
+                prop_angle = math.radians(self.angle + offset)
+                end_x = start_x + self.prop_size * math.cos(prop_angle)
+                end_y = start_y + self.prop_size * math.sin(prop_angle)
+            yield start_x, start_y, end_x, end_y
+
+    def _indicator_coords(self, x, y):
+        tip = y - self.size / 2
+        return x, tip - 5, x - 5, tip + 5, x + 5, tip + 5
+
+
+class FrameScheduler:
+    """Drives an app's animation loop with root.after().
+
+    state() returns (version, active). draw() is only called when the
+    version differs from the last frame drawn, or on every tick while
+    active (spinning propellers change each frame). Ticks come every
+    active_interval ms while active and every idle_interval ms otherwise.
+    """
+    def __init__(self, root, draw, state, active_interval=ACTIVE_INTERVAL, idle_interval=IDLE_INTERVAL):
+        self.root = root
+        self.draw = draw
+        self.state = state
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.version = None
+        self.active = False
+        self.pending = None  # after() id of the next tick
+        self.due = None  # perf_counter() time the next tick was asked for
+        self.frames_drawn = 0
+        self.idle_ticks = 0
+        self.dropped = 0  # Frames lost because a tick came at least one interval late
+        self.draw_times = deque(maxlen=FRAME_SAMPLES)
+
+    def start(self):
+        self.tick()
+
+    def invalidate(self):
+        """Force a redraw on the next tick, e.g. after the drawn object was replaced"""
+        self.version = None
+
+    def wake(self):
+        """Tick as soon as the event loop is idle instead of waiting out an idle interval"""
+        if self.pending is not None and not self.active:
+            self.root.after_cancel(self.pending)
+            self.pending = self.root.after_idle(self.tick)
+            self.due = None
+
+    def tick(self):
+        now = time.perf_counter()
+        version, active = self.state()
+        self.active = active
+        interval = self.active_interval if active else self.idle_interval
+
+        if self.due is not None and active:
+            late = now - self.due
+            if late * 1000 >= interval:
+                self.dropped += int(late * 1000 // interval)
+
+        if active or version != self.version:
+            self.version = version
+            self.draw()
+            self.frames_drawn += 1
+            self.draw_times.append(now)
+        else:
+            self.idle_ticks += 1
+
+        self.due = time.perf_counter() + interval / 1000
+        self.pending = self.root.after(interval, self.tick)
+
+    def fps(self):
+        """Frames per second drawn over the recent frames"""
+        if len(self.draw_times) < 2:
+            return 0.0
+        span = time.perf_counter() - self.draw_times[0]
+        return (len(self.draw_times) - 1) / span if span > 0 else 0.0
+
+    def format_report(self):
+        """One line of frame rate statistics for the status output"""
+        return (f"Frames: {self.fps():.1f} fps (target {1000 / self.active_interval:.0f} while flying), "
+                f"{self.frames_drawn} drawn, {self.idle_ticks} idle ticks, {self.dropped} dropped")
@@ -0,0 +1,519 @@
+# Drone simulation engine:
+# DroneSimulator has no Tk dependency. By default commands take effect at once,
+# which is what the control app shows. With physics=True, commands only set
+# targets and step(dt) moves the drone towards them at the configured rates,
+# draining the battery as it flies. run() steps a fixed timestep as fast as the
+# CPU allows, so minutes of flight take milliseconds in tests and CI.
+# BatchDroneSimulator runs the same physics for N drones at once on NumPy arrays.
+import math
+
+import numpy as np
+
+# Unit vectors (x, y) for each direction; forward is towards negative y on screen
+DIRECTIONS = {
+    "forward": (0, -1),
+    "backward": (0, 1),
+    "left": (-1, 0),
+    "right": (1, 0),
+}
+RUN_CHUNK_STEPS = 1000  # Steps run_chunks() takes between yields, a few milliseconds of CPU
+
+
+class DroneSimulator:
+    def __init__(self, physics=False):
+        self.physics = physics  # False: commands jump to their result, True: step() flies there
+        self.altitude = 0
+        self.is_flying = False
+        self.default_altitude = 10  # meters
+        self.max_altitude = 120  # meters
+        self.ascent_rate = 1  # meters per second
+        self.descent_rate = 0.7  # meters per second
+        self.acceleration = 2.0  # meters per second squared, horizontal
+        self.hover_drain = 0.05  # battery percent per second while airborne
+        self.speed_drain = 0.01  # extra battery percent per second for each m/s of speed
+        self.is_moving = False
+        self.direction = None
+        self.speed = 0  # meters per second
+        self.x_position = 0  # relative x position
+        self.y_position = 0  # relative y position
+        self.battery = 100  # battery percentage
+        self.attitude = {"roll": 0, "pitch": 0, "yaw": 0}  # orientation
+        self.target_altitude = 0
+        self.velocity = [0.0, 0.0]  # current horizontal velocity (x, y), m/s
+        self.sim_time = 0.0  # simulated seconds stepped so far
+        self.version = 0  # Bumped on every state change, so viewers can skip redraws
+
+    def take_off(self):
+        """Command the drone to take off to default altitude"""
+        if not self.is_flying:
+            self.is_flying = True
+            return self._change_altitude(self.default_altitude)
+        else:
+            return "Drone is already flying!"
+
+    def land(self):
+        """Command the drone to land"""
+        if self.is_flying:
+            if not self.physics:
+                self.is_flying = False  # With physics the drone is flying until touchdown
+            return self._change_altitude(0)
+        else:
+            return "Drone is already on the ground!"
+
+    def ascend(self, target_altitude=None):
+        """Command the drone to ascend"""
+        if not self.is_flying:
+            return "Drone needs to take off first!"
+
+        if target_altitude is None:
+            target_altitude = self._commanded_altitude() + 5
+
+        if target_altitude > self.max_altitude:
+            target_altitude = self.max_altitude
+
+        return self._change_altitude(target_altitude)
+
+    def descend(self, target_altitude=None):
+        """Command the drone to descend"""
+        if not self.is_flying:
+            return "Drone is not flying!"
+
+        if target_altitude is None:
+            target_altitude = max(0, self._commanded_altitude() - 5)
+
+        return self._change_altitude(target_altitude)
+
+    def _commanded_altitude(self):
+        """Altitude the drone is at, or heading for when flying with physics"""
+        return self.target_altitude if self.physics else self.altitude
+
+    def _change_altitude(self, target_altitude):
+        """Simulate changing altitude with a progress report"""
+        if target_altitude == self._commanded_altitude():
+            return f"Already at {self.altitude}m altitude."
+
+        start_altitude = self.altitude
+        message = []
+
+        if target_altitude > start_altitude:
+            message.append(f"Ascending from {round(start_altitude, 1)}m to {target_altitude}m...")
+            rate = self.ascent_rate
+        else:
+            message.append(f"Descending from {round(start_altitude, 1)}m to {target_altitude}m...")
+            rate = self.descent_rate
+
+        # Calculate time needed for altitude change
+        time_needed = abs(target_altitude - start_altitude) / rate
+        self.target_altitude = target_altitude
+        self.version += 1
+
+        if self.physics:
+            # step() flies the drone there
+            message.append(f"Expected to take {time_needed:.1f} seconds.")
+            return "\n".join(message)
+
+        self.altitude = target_altitude
+
+        if target_altitude == 0:
+            message.append(f"Landed safely after {time_needed:.1f} seconds.")
+        else:
+            message.append(f"Reached target altitude of {target_altitude}m in {time_needed:.1f} seconds.")
+
+        return "\n".join(message)
+
+    def move(self, direction, speed=5):
+        """Command the drone to move in a specific direction"""
+        if not self.is_flying:
+            return "Drone needs to take off first!"
+
+        self.direction = direction
+        self.speed = speed
+        self.is_moving = True
+        self.version += 1
+
+        # Without physics, jump ahead for visualization
+        if not self.physics:
+            dx, dy = DIRECTIONS.get(direction, (0, 0))
+            self.x_position += dx * speed
+            self.y_position += dy * speed
+
+        if direction == "forward":
+            self.attitude["pitch"] = 10  # Pitch forward
+        elif direction == "backward":
+            self.attitude["pitch"] = -10  # Pitch backward
+        elif direction == "left":
+            self.attitude["roll"] = -10  # Roll left
+        elif direction == "right":
+            self.attitude["roll"] = 10  # Roll right
+
+        return f"Moving {direction} at {speed} m/s"
+
+    def stop(self):
+        """Command the drone to stop moving"""
+        if not self.is_flying:
+            return "Drone is not flying!"
+
+        if not self.is_moving:
+            return "Drone is already stationary!"
+
+        self.is_moving = False
+        previous_direction = self.direction
+        self.direction = None
+        self.speed = 0
+        self.version += 1
+
+        # Reset attitude
+        self.attitude = {"roll": 0, "pitch": 0, "yaw": 0}
+
+        return f"Stopped moving {previous_direction}"
+
+    def step(self, dt):
+        """Advance the simulation by dt seconds"""
+        airborne = self.is_flying or self.altitude > 0
+        if not airborne:
+            return
+
+        # Vertical: head for the target altitude at the climb or sink rate
+        error = self.target_altitude - self.altitude
+        if error > 0:
+            self.altitude = min(self.target_altitude, self.altitude + self.ascent_rate * dt)
+        elif error < 0:
+            self.altitude = max(self.target_altitude, self.altitude - self.descent_rate * dt)
+        if self.altitude <= 0 and self.target_altitude <= 0:
+            self.altitude = 0
+            self.is_flying = False
+            self.velocity = [0.0, 0.0]
+            self.is_moving = False
+            self.direction = None
+            self.speed = 0
+            self.attitude = {"roll": 0, "pitch": 0, "yaw": 0}
+
+        # Horizontal: accelerate towards the commanded velocity
+        if self.physics:
+            dx, dy = DIRECTIONS.get(self.direction, (0, 0)) if self.is_moving else (0, 0)
+            max_change = self.acceleration * dt
+            for axis, wanted in enumerate((dx * self.speed, dy * self.speed)):
+                change = wanted - self.velocity[axis]
+                self.velocity[axis] += max(-max_change, min(max_change, change))
+            self.x_position += self.velocity[0] * dt
+            self.y_position += self.velocity[1] * dt
+
+        # Battery: hovering costs a fixed rate, speed costs extra
+        ground_speed = math.hypot(self.velocity[0], self.velocity[1]) if self.physics else self.speed
+        self.battery = max(0, self.battery - (self.hover_drain + self.speed_drain * ground_speed) * dt)
+        if self.battery == 0 and self.target_altitude > 0:
+            # Flat battery: come straight down
+            self.target_altitude = 0
+            self.is_moving = False
+            self.direction = None
+            self.speed = 0
+
+        self.sim_time += dt
+        self.version += 1
+
+    def run(self, duration, dt=0.02, until=None):
+        """Step through `duration` simulated seconds as fast as possible.
+
+        Stops early once until(self) returns True. Returns the simulated
+        seconds actually stepped.
+        """
+        steps = int(round(duration / dt))
+        for index in range(steps):
+            self.step(dt)
+            if until is not None and until(self):
+                return (index + 1) * dt
+        return steps * dt
+
+    def run_chunks(self, duration, dt=0.02, until=None, chunk_steps=RUN_CHUNK_STEPS):
+        """Like run(), but yields after every chunk_steps steps.
+
+        A UI drives it one chunk per event, so long simulated waits do not
+        freeze it. Returns the simulated seconds actually stepped.
+        """
+        steps = int(round(duration / dt))
+        for index in range(steps):
+            self.step(dt)
+            if until is not None and until(self):
+                return (index + 1) * dt
+            if (index + 1) % chunk_steps == 0 and index + 1 < steps:
+                yield
+        return steps * dt
+
+    def settled(self):
+        """True when the drone is at its target altitude and flying at its commanded velocity"""
+        dx, dy = DIRECTIONS.get(self.direction, (0, 0)) if self.is_moving else (0, 0)
+        return (self.altitude == self.target_altitude
+                and self.velocity[0] == dx * self.speed and self.velocity[1] == dy * self.speed)
+
+    def update_from_telemetry(self, telemetry):
+        """Update simulator state from telemetry data"""
+        if "altitude" in telemetry:
+            self.altitude = telemetry["altitude"]
+            self.target_altitude = self.altitude
+            self.is_flying = self.altitude > 0
+
+        if "x_position" in telemetry:
+            self.x_position = telemetry["x_position"]
+
+        if "y_position" in telemetry:
+            self.y_position = telemetry["y_position"]
+
+        if "battery" in telemetry:
+            self.battery = telemetry["battery"]
+
+        if "attitude" in telemetry:
+            self.attitude.update(telemetry["attitude"])
+
+        self.version += 1
+
+    def get_telemetry(self):
+        """Current state as a telemetry frame, shaped like the ones a drone sends"""
+        return {
+            "altitude": self.altitude,
+            "x_position": self.x_position,
+            "y_position": self.y_position,
+            "battery": self.battery,
+            "attitude": dict(self.attitude),
+        }
+
+    def get_status(self):
+        """Get the current status of the drone"""
+        status = []
+
+        if self.is_flying:
+            status.append(f"Status: Flying at {round(self.altitude, 1)}m altitude")
+        else:
+            status.append("Status: Landed")
+
+        if self.is_moving and self.direction:
+            status.append(f"Movement: {self.direction} at {self.speed} m/s")
+        else:
+            status.append("Movement: Stationary")
+
+        status.append(f"Position: X={round(self.x_position, 1)}m, Y={round(self.y_position, 1)}m")
+        status.append(f"Battery: {round(self.battery, 1)}%")
+        status.append(f"Attitude: Roll={self.attitude['roll']}°, Pitch={self.attitude['pitch']}°, Yaw={self.attitude['yaw']}°")
+
+        return "\n".join(status)
+
+
+# Direction codes for the batch simulator
+DIRECTION_NAMES = tuple(DIRECTIONS)
+NO_DIRECTION = -1
+
+
+class BatchDroneSimulator:
+    """N physics-mode drones stepped together with vectorised NumPy math.
+
+    Every state variable and flight parameter is an array with one entry
+    per drone, so a parameter sweep passes arrays (e.g. one ascent_rate per
+    drone) where DroneSimulator takes scalars. Commands take a mask, either
+    a boolean array or drone indices (None means every drone), and return a
+    boolean array of the drones that accepted the command, following the
+    same rules as DroneSimulator.
+
+    Vector state is stored one row per axis (position[0] is every drone's
+    x), so the per-step math runs over contiguous rows.
+    """
+    def __init__(self, count, default_altitude=10, max_altitude=120, ascent_rate=1, descent_rate=0.7,
+                 acceleration=2.0, hover_drain=0.05, speed_drain=0.01):
+        self.count = count
+
+        def parameter(value):
+            return np.broadcast_to(np.asarray(value, dtype=np.float64), (count,)).copy()
+
+        self.default_altitude = parameter(default_altitude)
+        self.max_altitude = parameter(max_altitude)
+        self.ascent_rate = parameter(ascent_rate)
+        self.descent_rate = parameter(descent_rate)
+        self.acceleration = parameter(acceleration)
+        self.hover_drain = parameter(hover_drain)
+        self.speed_drain = parameter(speed_drain)
+
+        self.altitude = np.zeros(count)
+        self.target_altitude = np.zeros(count)
+        self.is_flying = np.zeros(count, dtype=bool)
+        self.is_moving = np.zeros(count, dtype=bool)
+        self.direction = np.full(count, NO_DIRECTION, dtype=np.int8)
+        self.speed = np.zeros(count)
+        self.heading = np.zeros((2, count))  # Unit vector of the commanded direction
+        self.position = np.zeros((2, count))  # x, y
+        self.velocity = np.zeros((2, count))
+        self.battery = np.full(count, 100.0)
+        self.attitude = np.zeros((3, count))  # roll, pitch, yaw
+        self.sim_time = 0.0
+        self.version = 0
+
+    @property
+    def x_position(self):
+        return self.position[0]
+
+    @property
+    def y_position(self):
+        return self.position[1]
+
+    def _mask(self, mask):
+        """Normalise a mask argument to a boolean array"""
+        if mask is None:
+            return np.ones(self.count, dtype=bool)
+        mask = np.asarray(mask)
+        if mask.dtype == bool:
+            return mask
+        selected = np.zeros(self.count, dtype=bool)
+        selected[mask] = True
+        return selected
+
+    def take_off(self, mask=None):
+        """Take off to each drone's default altitude"""
+        accepted = self._mask(mask) & ~self.is_flying
+        self.is_flying[accepted] = True
+        self.target_altitude[accepted] = self.default_altitude[accepted]
+        self.version += 1
+        return accepted
+
+    def land(self, mask=None):
+        """Descend to the ground; drones count as flying until touchdown"""
+        accepted = self._mask(mask) & self.is_flying
+        self.target_altitude[accepted] = 0
+        self.version += 1
+        return accepted
+
+    def ascend(self, target_altitude=None, mask=None):
+        """Climb to target_altitude (scalar or per-drone array), or 5m above the current target"""
+        accepted = self._mask(mask) & self.is_flying
+        if target_altitude is None:
+            target = self.target_altitude + 5
+        else:
+            target = np.broadcast_to(np.asarray(target_altitude, dtype=np.float64), (self.count,))
+        target = np.minimum(target, self.max_altitude)
+        self.target_altitude[accepted] = target[accepted]
+        self.version += 1
+        return accepted
+
+    def descend(self, target_altitude=None, mask=None):
+        """Sink to target_altitude (scalar or per-drone array), or 5m below the current target"""
+        accepted = self._mask(mask) & self.is_flying
+        if target_altitude is None:
+            target = np.maximum(0, self.target_altitude - 5)
+        else:
+            target = np.broadcast_to(np.asarray(target_altitude, dtype=np.float64), (self.count,))
+        self.target_altitude[accepted] = target[accepted]
+        self.version += 1
+        return accepted
+
+    def move(self, direction, speed=5, mask=None):
+        """Fly in a direction at speed (scalar or per-drone array)"""
+        accepted = self._mask(mask) & self.is_flying
+        self.direction[accepted] = DIRECTION_NAMES.index(direction)
+        self.heading[:, accepted] = np.array(DIRECTIONS[direction], dtype=np.float64)[:, None]
+        self.speed[accepted] = np.broadcast_to(speed, (self.count,))[accepted]
+        self.is_moving[accepted] = True
+        if direction == "forward":
+            self.attitude[1, accepted] = 10
+        elif direction == "backward":
+            self.attitude[1, accepted] = -10
+        elif direction == "left":
+            self.attitude[0, accepted] = -10
+        elif direction == "right":
+            self.attitude[0, accepted] = 10
+        self.version += 1
+        return accepted
+
+    def stop(self, mask=None):
+        """Stop moving and level out"""
+        accepted = self._mask(mask) & self.is_flying & self.is_moving
+        self._halt(accepted)
+        self.attitude[:, accepted] = 0
+        self.version += 1
+        return accepted
+
+    def _halt(self, selected):
+        self.is_moving[selected] = False
+        self.direction[selected] = NO_DIRECTION
+        self.heading[:, selected] = 0
+        self.speed[selected] = 0
+
+    def step(self, dt):
+        """Advance every drone by dt seconds"""
+        airborne = self.is_flying | (self.altitude > 0)
+
+        # Vertical: head for the target altitude at the climb or sink rate
+        climb = self.target_altitude - self.altitude
+        np.clip(climb, -self.descent_rate * dt, self.ascent_rate * dt, out=climb)
+        climb *= airborne
+        self.altitude += climb
+        landed = airborne & (self.altitude <= 0) & (self.target_altitude <= 0)
+        if landed.any():
+            self.altitude[landed] = 0
+            self.is_flying[landed] = False
+            self.velocity[:, landed] = 0
+            self.attitude[:, landed] = 0
+            self._halt(landed)
+
+        # Horizontal: accelerate towards the commanded velocity. Grounded
+        # drones have zero velocity and no command, so they stay put.
+        change = self.heading * self.speed
+        change -= self.velocity
+        max_change = self.acceleration * dt
+        np.minimum(change, max_change, out=change)
+        np.maximum(change, -max_change, out=change)
+        self.velocity += change
+        self.position += self.velocity * dt
+
+        # Battery: hovering costs a fixed rate, speed costs extra
+        vx, vy = self.velocity
+        drain = np.sqrt(vx * vx + vy * vy)
+        drain *= self.speed_drain
+        drain += self.hover_drain
+        drain *= airborne * dt
+        self.battery -= drain
+        np.maximum(self.battery, 0, out=self.battery)
+        if self.battery.min() == 0:
+            flat = airborne & (self.battery == 0) & (self.target_altitude > 0)
+            # Flat battery: come straight down
+            self.target_altitude[flat] = 0
+            self._halt(flat)
+
+        self.sim_time += dt
+        self.version += 1
+
+    def run(self, duration, dt=0.02, until=None):
+        """Step through `duration` simulated seconds as fast as possible.
+
+        Stops early once until(self) returns True. Returns the simulated
+        seconds actually stepped.
+        """
+        steps = int(round(duration / dt))
+        for index in range(steps):
+            self.step(dt)
+            if until is not None and until(self):
+                return (index + 1) * dt
+        return steps * dt
+
+    def settled(self):
+        """Per-drone mask of drones at their target altitude and commanded velocity"""
+        return ((self.altitude == self.target_altitude)
+                & (self.velocity == self.heading * self.speed).all(axis=0))
+
+    def state(self, index):
+        """One drone's state as a telemetry style dict"""
+        roll, pitch, yaw = self.attitude[:, index].tolist()
+        return {
+            "altitude": float(self.altitude[index]),
+            "x_position": float(self.position[0, index]),
+            "y_position": float(self.position[1, index]),
+            "battery": float(self.battery[index]),
+            "attitude": {"roll": roll, "pitch": pitch, "yaw": yaw},
+            "is_flying": bool(self.is_flying[index]),
+        }
+
+    def summary(self):
+        """Fleet-wide figures for a sweep report"""
+        return {
+            "drones": self.count,
+            "flying": int(self.is_flying.sum()),
+            "sim_time": self.sim_time,
+            "battery_min": float(self.battery.min()),
+            "battery_mean": float(self.battery.mean()),
+            "altitude_mean": float(self.altitude.mean()),
+        }
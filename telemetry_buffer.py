@@ -0,0 +1,201 @@
+# Telemetry history:
+# A fixed-capacity ring buffer of telemetry samples stored column by column in a
+# preallocated NumPy structured array. Appending a sample writes one slot in
+# each column and never allocates; window queries are vectorised over views.
+#
+# The latest frame is published separately as an immutable snapshot: the I/O
+# thread builds a new read-only mapping per frame and swaps the reference, so
+# the UI thread never sees a half-applied update and neither side takes a lock.
+import time
+from types import MappingProxyType
+
+import numpy as np
+
+TELEMETRY_DTYPE = np.dtype([
+    ("time", "f8"),
+    ("altitude", "f4"),
+    ("x_position", "f4"),
+    ("y_position", "f4"),
+    ("battery", "f4"),
+    ("roll", "f4"),
+    ("pitch", "f4"),
+    ("yaw", "f4"),
+])
+FIELDS = TELEMETRY_DTYPE.names[1:]
+
+EMPTY_TELEMETRY = MappingProxyType({
+    "version": 0,
+    "altitude": 0,
+    "x_position": 0,
+    "y_position": 0,
+    "battery": 100,
+    "attitude": MappingProxyType({"roll": 0, "pitch": 0, "yaw": 0}),
+})
+
+
+def merge_telemetry(snapshot, update):
+    """Return a new read-only snapshot with a telemetry update applied.
+
+    Missing fields (and missing attitude axes) keep their previous values and
+    "version" counts the frames applied. The old snapshot is left untouched,
+    so a reader holding it keeps a consistent frame.
+    """
+    merged = dict(snapshot)
+    merged.update(update)
+    attitude = update.get("attitude")
+    if attitude is not None:
+        merged["attitude"] = MappingProxyType({**snapshot["attitude"], **attitude})
+    merged["version"] = snapshot["version"] + 1
+    return MappingProxyType(merged)
+
+
+class TelemetryRingBuffer:
+    """Fixed-capacity, columnar telemetry history.
+
+    One thread appends while others query. Like a seqlock, readers note the
+    sample count before reading and check it afterwards; a copy the writer
+    may have overwritten meanwhile is simply taken again. One slot is never
+    read so that the sample being written is always outside a window.
+    """
+    def __init__(self, capacity=32768):
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=TELEMETRY_DTYPE)
+        # Column views are created once so append() only does scalar stores
+        self.columns = {name: self.data[name] for name in TELEMETRY_DTYPE.names}
+        self.count = 0  # Total samples ever appended
+
+    def __len__(self):
+        return min(self.count, self.capacity - 1)
+
+    def append(self, timestamp, telemetry):
+        """Store one telemetry dict (as kept by DroneConnection.telemetry)"""
+        index = self.count % self.capacity
+        columns = self.columns
+        columns["time"][index] = timestamp
+        columns["altitude"][index] = telemetry.get("altitude", 0)
+        columns["x_position"][index] = telemetry.get("x_position", 0)
+        columns["y_position"][index] = telemetry.get("y_position", 0)
+        columns["battery"][index] = telemetry.get("battery", 0)
+        attitude = telemetry.get("attitude") or {}
+        columns["roll"][index] = attitude.get("roll", 0)
+        columns["pitch"][index] = attitude.get("pitch", 0)
+        columns["yaw"][index] = attitude.get("yaw", 0)
+        # Publish the sample only once every column has been written
+        self.count += 1
+
+    def latest(self):
+        """The newest sample as a dict, or None if the buffer is empty"""
+        if not self.count:
+            return None
+        while True:
+            count = self.count
+            row = self.data[(count - 1) % self.capacity]
+            sample = {name: row[name].item() for name in TELEMETRY_DTYPE.names}
+            if self._unchanged(count, 1):
+                return sample
+
+    def segments(self, seconds=None, last_n=None, now=None):
+        """Oldest-first read-only views covering a window, without copying.
+
+        The window is the last `last_n` samples, the samples newer than
+        `now - seconds`, or the whole history. Because the buffer wraps, the
+        window can span two views. The views alias the live buffer, so use
+        them straight away; window() and stats() return stable results.
+        """
+        return self._segments(self.count, seconds, last_n, now)
+
+    def _segments(self, count, seconds, last_n, now):
+        size = min(count, self.capacity - 1)
+        head = count % self.capacity
+        start = (count - size) % self.capacity
+        if start < head or size == 0:
+            parts = [self.data[start:head]]
+        else:
+            parts = [self.data[start:], self.data[:head]]
+
+        if last_n is not None:
+            skip = max(0, size - last_n)
+        elif seconds is not None:
+            cutoff = (time.time() if now is None else now) - seconds
+            # Each part is sorted by time, so binary search both
+            skip = 0
+            for part in parts:
+                position = int(np.searchsorted(part["time"], cutoff, side="left"))
+                skip += position
+                if position < len(part):
+                    break
+        else:
+            skip = 0
+
+        views = []
+        for part in parts:
+            if skip >= len(part):
+                skip -= len(part)
+                continue
+            view = part[skip:]
+            skip = 0
+            if len(view):
+                view = view.view()
+                view.flags.writeable = False
+                views.append(view)
+        return views
+
+    def _unchanged(self, count, size):
+        """True if no append since `count` could have overwritten the `size` newest samples"""
+        return self.count - count < self.capacity - size
+
+    def window(self, seconds=None, last_n=None, now=None):
+        """Copy of the samples in a window as one contiguous structured array"""
+        while True:
+            count = self.count
+            views = self._segments(count, seconds, last_n, now)
+            if not views:
+                return np.empty(0, dtype=TELEMETRY_DTYPE)
+            samples = views[0].copy() if len(views) == 1 else np.concatenate(views)
+            if self._unchanged(count, len(samples)):
+                return samples
+
+    def stats(self, field, seconds=None, last_n=None, now=None):
+        """min/max/mean of one field over a window"""
+        while True:
+            count = self.count
+            views = self._segments(count, seconds, last_n, now)
+            size = sum(len(view) for view in views)
+            if not size:
+                return {"count": 0, "min": None, "max": None, "mean": None}
+            columns = [view[field] for view in views]
+            result = {
+                "count": size,
+                "min": float(min(column.min() for column in columns)),
+                "max": float(max(column.max() for column in columns)),
+                "mean": float(sum(column.sum(dtype=np.float64) for column in columns) / size),
+            }
+            if self._unchanged(count, size):
+                return result
+
+    def rate_of_change(self, field, seconds=None, last_n=None, now=None):
+        """Least-squares slope of a field over a window, in units per second"""
+        samples = self.window(seconds, last_n, now)
+        if len(samples) < 2:
+            return 0.0
+        t = samples["time"] - samples["time"][0]
+        values = samples[field].astype(np.float64)
+        t_centered = t - t.mean()
+        denominator = np.dot(t_centered, t_centered)
+        if denominator == 0:
+            return 0.0
+        return float(np.dot(t_centered, values - values.mean()) / denominator)
+
+    def describe(self, seconds=10):
+        """Short text summary of the recent window for the UI"""
+        altitude = self.stats("altitude", seconds)
+        if not altitude["count"]:
+            return f"No telemetry in the last {seconds:g} seconds"
+        battery = self.stats("battery", seconds)
+        return "\n".join([
+            f"Telemetry, last {seconds:g}s ({altitude['count']} samples):",
+            f"Altitude: min={altitude['min']:.1f}m max={altitude['max']:.1f}m mean={altitude['mean']:.1f}m "
+            f"rate={self.rate_of_change('altitude', seconds):+.2f}m/s",
+            f"Battery: {battery['min']:.0f}-{battery['max']:.0f}% "
+            f"rate={self.rate_of_change('battery', seconds) * 60:+.2f}%/min",
+        ])
@@ -0,0 +1,77 @@
+from ack_tracker import AckTracker, LatencyHistogram
+from protocol import move_command, stop_command, takeoff_command
+
+
+def send(tracker, command, now):
+    command = tracker.tag(command)
+    tracker.sent(command, now)
+    return command
+
+
+def test_ack_records_latency():
+    tracker = AckTracker(timeout=0.5)
+    command = send(tracker, takeoff_command(10), now=0.0)
+    assert tracker.acknowledge(command["seq"], now=0.02) is command
+    assert tracker.latency_stats()["takeoff"]["count"] == 1
+    assert not tracker.pending
+
+
+def test_retry_then_expiry():
+    tracker = AckTracker(timeout=0.5, max_retries=2)
+    tracker.acks_supported = True
+    command = send(tracker, takeoff_command(10), now=0.0)
+    assert tracker.expired(now=0.4) == []
+    assert tracker.expired(now=0.5) == [command]
+    # The clock restarts with each retry, so it is not handed out twice
+    assert tracker.expired(now=0.6) == []
+    assert tracker.expired(now=1.0) == [command]
+    assert tracker.expired(now=1.5) == []
+    assert not tracker.pending
+    stats = tracker.get_stats()
+    assert (stats["retried"], stats["failed"]) == (2, 1)
+
+
+def test_no_retries_before_first_ack():
+    tracker = AckTracker(timeout=0.5)
+    send(tracker, takeoff_command(10), now=0.0)
+    assert tracker.expired(now=1.0) == []
+    assert tracker.get_stats()["unacked"] == 1
+
+
+def test_late_ack_after_retry_is_not_sampled():
+    tracker = AckTracker(timeout=0.5)
+    tracker.acks_supported = True
+    command = send(tracker, takeoff_command(10), now=0.0)
+    tracker.expired(now=0.5)
+    tracker.acknowledge(command["seq"], now=0.6)
+    assert tracker.latency_stats() == {}
+
+
+def test_newer_setpoint_supersedes_older():
+    tracker = AckTracker()
+    old = send(tracker, move_command("left", 2), now=0.0)
+    new = tracker.tag(move_command("left", 4))
+    assert tracker.sent(new, now=0.1) == [old["seq"]]
+    assert not tracker.awaiting(old)
+    assert tracker.awaiting(new)
+
+
+def test_stop_cancels_flight_commands():
+    tracker = AckTracker()
+    takeoff = send(tracker, takeoff_command(10), now=0.0)
+    move = send(tracker, move_command("left", 2), now=0.0)
+    stop = tracker.tag(stop_command())
+    assert sorted(tracker.sent(stop, now=0.1)) == sorted([takeoff["seq"], move["seq"]])
+    assert list(tracker.pending) == [stop["seq"]]
+    assert tracker.get_stats()["cancelled"] == 2
+
+
+def test_histogram_percentiles():
+    histogram = LatencyHistogram()
+    for latency in range(1, 101):
+        histogram.record(latency)
+    summary = histogram.summary()
+    assert summary["count"] == 100
+    assert 45 <= summary["p50"] <= 55
+    assert 93 <= summary["p95"] <= 100
+    assert summary["max"] == 100
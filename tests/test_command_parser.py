@@ -0,0 +1,67 @@
+import pytest
+
+from command_parser import parse_command, parse_plan, validate_plan
+
+
+def names(plan):
+    return [command.name for command in plan]
+
+
+def test_compound_prompt_is_split():
+    plan = parse_plan("take off, ascend to 30 then go forward at 4 and stop")
+    assert names(plan) == ["takeoff", "ascend", "move", "stop"]
+    assert plan[1].altitude == 30
+    assert (plan[2].direction, plan[2].speed) == ("forward", 4)
+
+
+def test_single_command_is_not_split():
+    assert parse_plan("go left at 3") == (parse_command("go left at 3"),)
+
+
+def test_only_flight_prompts_are_split():
+    plan = parse_plan("search take off, land")
+    assert names(plan) == ["search"]
+    assert plan[0].args == ("take off, land",)
+    assert names(parse_plan("run Missions/a,b.txt")) == ["run"]
+
+
+def test_wait_steps():
+    plan = parse_plan("take off; wait 2.5; land")
+    assert names(plan) == ["takeoff", "wait", "land"]
+    assert plan[1].seconds == 2.5
+
+
+def test_validate_plan_accepts_a_flight():
+    assert validate_plan(parse_plan("take off then go left then land")) is None
+    assert validate_plan(parse_plan("go left then land"), flying=True) is None
+
+
+def test_validate_plan_rejects_bad_steps():
+    assert validate_plan(parse_plan("go left then land")) == "Step 1 'go left': drone needs to take off first"
+    assert validate_plan(parse_plan("take off, take off")) == "Step 2 'take off': drone is already flying"
+    assert validate_plan(parse_plan("take off, status")) == "Step 2 'status': not a flight step"
+    assert validate_plan(parse_plan("take off, banana")) == "Step 2 'banana': unknown command"
+    assert validate_plan(parse_plan("ascend to abc, land"), flying=True) == (
+        "Step 1 'ascend to abc': Invalid altitude. Please specify a number of meters, 0 or more.")
+
+
+@pytest.mark.parametrize("prompt", ["wait inf", "wait nan", "wait -1", "wait 1e400", "ascend to nan", "descend to -5",
+                                    "ascend to inf", "go left at -3", "go left at nan", "go forward at inf"])
+def test_unusable_numbers_are_invalid(prompt):
+    command = parse_command(prompt)
+    assert command.name == "invalid"
+    assert command.error
+    assert validate_plan(parse_plan(f"take off, {prompt}")) == f"Step 2 '{prompt}': {command.error}"
+
+
+def test_usable_numbers():
+    assert parse_command("wait 0").seconds == 0
+    assert parse_command("descend to 0").altitude == 0
+    assert parse_command("go right at 2.5").speed == 2.5
+    assert parse_command("go right at fast").warning
+    assert parse_command("telemetry inf").seconds == 10
+
+
+def test_fleet_port_keeps_its_case():
+    assert parse_command("Fleet ADD D1 /dev/ttyUSB0").args == ("add", "d1", "/dev/ttyUSB0")
+    assert parse_command("fleet remove D1").args == ("remove", "d1")
@@ -0,0 +1,72 @@
+from command_scheduler import CommandScheduler, TokenBucket, pause_command
+from protocol import altitude_command, land_command, move_command, stop_command, takeoff_command
+
+
+def drain(scheduler):
+    commands = []
+    while True:
+        command = scheduler.get(timeout=0)
+        if command is None:
+            return commands
+        commands.append(command)
+
+
+def test_setpoints_coalesce():
+    scheduler = CommandScheduler()
+    for speed in (1, 2, 3):
+        assert scheduler.push(move_command("forward", speed))
+    assert drain(scheduler) == [move_command("forward", 3)]
+    assert scheduler.get_stats()["coalesced"] == 2
+
+
+def test_control_commands_go_before_setpoints():
+    scheduler = CommandScheduler()
+    scheduler.push(move_command("left", 2))
+    scheduler.push(altitude_command(20))
+    assert [command["action"] for command in drain(scheduler)] == ["altitude", "move"]
+
+
+def test_stop_preempts_setpoints_and_plan():
+    scheduler = CommandScheduler()
+    scheduler.push(move_command("left", 2))
+    scheduler.push_batch([altitude_command(20), pause_command(1), move_command("right", 1)])
+    scheduler.push(stop_command())
+    assert drain(scheduler) == [stop_command()]
+    assert scheduler.get_stats()["preempted"] == 4
+
+
+def test_land_drops_pending_takeoff_and_altitude():
+    scheduler = CommandScheduler()
+    scheduler.push(takeoff_command(10))
+    scheduler.push(altitude_command(30))
+    scheduler.push(land_command())
+    assert drain(scheduler) == [land_command()]
+
+
+def test_emergency_evicts_when_full():
+    scheduler = CommandScheduler(max_depth=2)
+    assert scheduler.push(move_command("left", 2))
+    assert scheduler.push(altitude_command(30))
+    assert not scheduler.push(takeoff_command(10))
+    assert scheduler.push(land_command())
+    assert drain(scheduler) == [land_command()]
+    stats = scheduler.get_stats()
+    assert stats["rejected"] == 1
+    assert stats["preempted"] == 2
+
+
+def test_retry_goes_to_front_of_its_lane():
+    scheduler = CommandScheduler(max_depth=1)
+    scheduler.push(altitude_command(30))
+    retry = dict(takeoff_command(10), seq=4)
+    scheduler.push_retry(retry)
+    assert drain(scheduler) == [retry, altitude_command(30)]
+
+
+def test_token_bucket_throttles():
+    bucket = TokenBucket(rate=100, capacity=50)
+    bucket.updated = 0.0
+    bucket.spend(150, now=0.0)
+    assert bucket.ready_at(now=0.0) == 1.0
+    assert bucket.ready_at(now=1.0) == 1.0
+    assert bucket.stats == {"bytes": 150, "throttled": 1}
@@ -0,0 +1,105 @@
+import asyncio
+import contextlib
+import time
+
+from async_connection import AsyncDroneConnection
+from connector import DroneConnection
+from drone_emulator import DroneEmulator
+
+
+def wait_for(condition, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+@contextlib.contextmanager
+def emulated_link(rate=200, **faults):
+    """A DroneConnection to a DroneEmulator, disconnected before the emulator closes its PTY"""
+    with DroneEmulator(rate, **faults) as emulator:
+        connection = DroneConnection()
+        try:
+            assert connection.connect(emulator.port)[0]
+            yield emulator, connection
+        finally:
+            connection.disconnect()
+
+
+def test_binary_link_flies():
+    with emulated_link() as (emulator, connection):
+        assert wait_for(lambda: connection.codec.name == "binary")
+        assert connection.take_off(12)
+        assert wait_for(lambda: connection.get_telemetry()["altitude"] > 1)
+        assert wait_for(lambda: connection.ack_tracker.get_stats()["acked"] == 1)
+        assert len(connection.telemetry_history) > 0
+
+
+def test_json_only_firmware():
+    with emulated_link(binary=False) as (emulator, connection):
+        assert connection.take_off(12)
+        assert wait_for(lambda: connection.get_telemetry()["altitude"] > 1)
+        assert connection.codec.name == "json"
+
+
+def test_corrupted_frames_are_skipped():
+    with emulated_link(500, corrupt=0.2, seed=1) as (emulator, connection):
+        assert wait_for(lambda: connection.decoder.bad_frames > 0 and connection.get_telemetry()["version"] > 50)
+
+
+def test_lost_commands_are_retried():
+    with emulated_link() as (emulator, connection):
+        connection.ack_tracker.timeout = 0.1
+        assert connection.take_off(12)
+        assert wait_for(lambda: connection.ack_tracker.get_stats()["acked"] == 1)
+        emulator.drop = 1.0
+        assert connection.move("left", 2)
+        assert wait_for(lambda: connection.ack_tracker.get_stats()["retried"] >= 1)
+        emulator.drop = 0.0
+        assert wait_for(lambda: connection.get_telemetry()["x_position"] < 0)
+
+
+def test_async_link_acks():
+    async def fly(port):
+        link = AsyncDroneConnection()
+        assert (await link.connect(port))[0]
+        try:
+            ack = await link.take_off(12)
+            response = await asyncio.wait_for(ack, 2.0)
+            assert response["type"] == "ack"
+        finally:
+            await link.disconnect()
+        return link
+
+    with DroneEmulator(200) as emulator:
+        link = asyncio.run(fly(emulator.port))
+    assert link.ack_tracker.get_stats()["acked"] == 1
+    assert link.codec.name == "binary"
+
+
+def test_seed_repeats_the_fault_pattern():
+    runs = []
+    for _ in range(2):
+        emulator = DroneEmulator(drop=0.3, corrupt=0.3, seed=5)
+        for _ in range(50):
+            emulator.send_telemetry(emulator.telemetry_random)
+        runs.append(([data for _, _, data in sorted(emulator.outbox)], emulator.stats))
+        emulator.stop()
+    assert runs[0] == runs[1]
+    assert runs[0][1]["dropped_out"] > 0 and runs[0][1]["corrupted"] > 0
+
+
+def test_link_drops_when_the_device_goes_away():
+    emulator = DroneEmulator(200).start()
+    connection = DroneConnection()
+    try:
+        assert connection.connect(emulator.port)[0]
+        assert wait_for(lambda: connection.get_telemetry()["version"] > 0)
+        reader = connection.reader_thread
+        emulator.stop()  # Like pulling the USB cable
+        assert wait_for(lambda: not connection.connected and not reader.is_alive())
+    finally:
+        connection.disconnect()
+        emulator.stop()
@@ -0,0 +1,41 @@
+import time
+
+import fleet
+from async_connection import AsyncDroneConnection
+from drone_emulator import DroneEmulator
+from fleet import FleetManager
+from simulation import DroneSimulator
+
+
+def test_simulated_members():
+    manager = FleetManager(DroneSimulator)
+    assert manager.add_simulator("d1")[0]
+    assert not manager.add_simulator("d1")[0]
+    manager.add_simulator("d2")
+    assert [member.drone_id for member in manager.targets("all")] == ["d1", "d2"]
+    assert manager.targets("d3") == []
+    assert manager.remove("d1") == (True, "Removed d1 from the fleet")
+    assert manager.describe() == "Fleet:\nd2: simulated"
+
+
+def test_link_that_opens_after_the_timeout_is_closed(monkeypatch):
+    opened = []
+
+    class RecordingConnection(AsyncDroneConnection):
+        async def connect(self, port, baudrate=115200):
+            opened.append(self)
+            return await super().connect(port, baudrate)
+
+    monkeypatch.setattr(fleet, "AsyncDroneConnection", RecordingConnection)
+    manager = FleetManager(DroneSimulator)
+    with DroneEmulator(50) as emulator:
+        try:
+            success, message, link = manager.open_link("d1", emulator.port, timeout=0)
+            assert (success, link) == (False, None)
+            assert message.startswith("Error connecting d1")
+            deadline = time.monotonic() + 2
+            while (not opened or opened[0].connected) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert opened and not opened[0].connected
+        finally:
+            manager.close()
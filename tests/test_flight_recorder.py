@@ -0,0 +1,104 @@
+import math
+import os
+
+import pytest
+
+from flight_recorder import INDEX_STRIDE, KIND_COMMAND, KIND_TELEMETRY, FlightLog, FlightRecorder, FlightReplay
+
+
+def record(directory, start, count, segment_size=4096):
+    recorder = FlightRecorder(str(directory), segment_size=segment_size)
+    for number in range(start, start + count):
+        if number % 10 == 0:
+            recorder.record_command(f"move {number}", timestamp=float(number))
+        else:
+            recorder.record_telemetry({"altitude": number}, timestamp=float(number))
+    recorder.close()
+    return recorder
+
+
+def test_records_round_trip(tmp_path):
+    record(tmp_path, 0, 20)
+    records = list(FlightLog(str(tmp_path)).records())
+    assert len(records) == 20
+    assert records[0] == (0.0, KIND_COMMAND, "move 0")
+    assert records[1][1:] == (KIND_TELEMETRY, {"altitude": 1.0, "x_position": 0.0, "y_position": 0.0,
+                                               "battery": 0.0, "attitude": {"roll": 0.0, "pitch": 0.0, "yaw": 0.0}})
+
+
+def test_seek_across_segments(tmp_path):
+    recorder = record(tmp_path, 0, INDEX_STRIDE * 20)
+    assert recorder.segment_number > 1
+    log = FlightLog(str(tmp_path))
+    for start in (0.0, 63.5, 500.0, 1000.0, INDEX_STRIDE * 20 - 1.0):
+        first = next(log.records(start))
+        assert first[0] == math.ceil(start)
+    assert list(log.records(INDEX_STRIDE * 20.0)) == []
+    assert log.time_range() == (0.0, INDEX_STRIDE * 20 - 1.0)
+
+
+def test_seek_into_equal_timestamps(tmp_path):
+    recorder = FlightRecorder(str(tmp_path))
+    for _ in range(200):
+        recorder.record_telemetry({"altitude": 1}, timestamp=100.0)
+    recorder.record_command("land", timestamp=101.0)
+    recorder.close()
+    log = FlightLog(str(tmp_path))
+    assert len(list(log.records(100.0))) == 201
+    assert len(list(log.records(100.5))) == 1
+
+
+def test_seek_without_index(tmp_path):
+    record(tmp_path, 0, 300)
+    os.remove(os.path.join(tmp_path, "index.bin"))
+    log = FlightLog(str(tmp_path))
+    assert next(log.records(150.0))[0] == 150.0
+
+
+def test_append_continues_after_last_segment(tmp_path):
+    first = record(tmp_path, 0, 10)
+    second = record(tmp_path, 10, 10)
+    assert second.segment_number == first.segment_number + 1
+    log = FlightLog(str(tmp_path))
+    assert [timestamp for timestamp, _, _ in log.records()] == [float(number) for number in range(20)]
+    assert next(log.records(12.0))[0] == 12.0
+
+
+def test_append_keeps_timestamps_in_order(tmp_path):
+    record(tmp_path, 100, 10)
+    record(tmp_path, 0, 5)
+    log = FlightLog(str(tmp_path))
+    timestamps = [timestamp for timestamp, _, _ in log.records()]
+    assert timestamps == sorted(timestamps)
+    assert timestamps[-5:] == [109.0] * 5
+    assert log.time_range() == (100.0, 109.0)
+
+
+def test_timestamps_never_go_back(tmp_path):
+    recorder = FlightRecorder(str(tmp_path))
+    recorder.record_command("take off", timestamp=5.0)
+    recorder.record_command("land", timestamp=3.0)
+    recorder.close()
+    assert [timestamp for timestamp, _, _ in FlightLog(str(tmp_path)).records()] == [5.0, 5.0]
+
+
+def test_replay_as_fast_as_possible(tmp_path):
+    record(tmp_path, 0, 30)
+    commands = []
+    frames = []
+    replay = FlightReplay(FlightLog(str(tmp_path)), speed=None, on_telemetry=frames.append,
+                          on_command=commands.append, batch=10)
+    steps = replay.steps(5.0)
+    delays = []
+    with pytest.raises(StopIteration) as finished:
+        while True:
+            delays.append(next(steps))
+    assert finished.value.value == (25, 24.0)
+    assert delays == [0, 0]
+    assert commands == ["move 10", "move 20"]
+    assert len(frames) == 23
+
+
+def test_missing_recording():
+    with pytest.raises(ValueError):
+        FlightLog("/nonexistent/recording")
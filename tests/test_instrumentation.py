@@ -0,0 +1,55 @@
+import threading
+
+from instrumentation import Instrumentation
+
+
+class Worker:
+    def work(self, value):
+        return value * 2
+
+
+def test_probe_only_while_on():
+    worker = Worker()
+    perf = Instrumentation()
+    perf.probe(worker, "work")
+    assert worker.work(2) == 4
+    perf.on()
+    assert worker.work(3) == 6
+    perf.off()
+    worker.work(4)
+    assert "work" not in vars(worker)
+    assert perf.timers["work"].count == 1
+
+
+def test_concurrent_calls_are_all_counted():
+    worker = Worker()
+    perf = Instrumentation()
+    perf.probe(worker, "work")
+    perf.on()
+
+    def hammer():
+        for value in range(5000):
+            worker.work(value)
+
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    perf.off()
+    histogram = perf.timers["work"]
+    assert histogram.count == sum(histogram.counts) == 40000
+
+
+def test_report_lists_timers_and_gauges():
+    worker = Worker()
+    perf = Instrumentation()
+    perf.probe(worker, "work", "doubling")
+    perf.gauge("queue", lambda: 3)
+    perf.on()
+    worker.work(1)
+    report = perf.format_report()
+    assert "doubling: n=1" in report
+    assert "queue: 3" in report
+    perf.reset()
+    assert "doubling: not called" in perf.format_report()
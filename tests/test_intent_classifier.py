@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+from intent_classifier import IntentClassifier
+
+
+@pytest.fixture(scope="module")
+def classifier(tmp_path_factory):
+    return IntentClassifier(str(tmp_path_factory.mktemp("intent_index")))
+
+
+@pytest.mark.parametrize("prompt, command", [
+    ("go up a bit", "ascend"),
+    ("lift off", "take off"),
+    ("please land the drone", "land"),
+    ("hold position", "stop"),
+    ("what is the battery level", "status"),
+])
+def test_paraphrases_match(classifier, prompt, command):
+    assert classifier.interpret(prompt)[0].text == command
+
+
+@pytest.mark.parametrize("prompt, command", [
+    ("climb to 40", "ascend to 40"),
+    ("go up 40", "ascend"),  # A bare number is not an altitude
+    ("move ahead at 3", "go forward at 3"),
+    ("fly left at 4", "go left at 4"),
+])
+def test_numbers_fill_the_command(classifier, prompt, command):
+    assert classifier.interpret(prompt)[0].text == command
+
+
+@pytest.mark.parametrize("prompt", ["do not land", "don't take off", "xyzzy quux", ""])
+def test_negated_and_unknown_prompts_do_not_match(classifier, prompt):
+    assert classifier.interpret(prompt)[0] is None
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    IntentClassifier(str(tmp_path))
+    meta_path = tmp_path / "index.json"
+    meta_path.write_text(json.dumps(dict(json.loads(meta_path.read_text()), fingerprint="stale")))
+    classifier = IntentClassifier(str(tmp_path))
+    assert classifier._index_current()
+    assert classifier.interpret("lift off")[0].text == "take off"
@@ -0,0 +1,69 @@
+import time
+
+import pytest
+
+from drone_emulator import DroneEmulator
+from fleet import FleetManager
+from mission_runner import MissionRunner
+from simulation import DroneSimulator
+
+
+@pytest.fixture
+def mission(tmp_path):
+    def write(text):
+        path = tmp_path / "mission.txt"
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+    return write
+
+
+def test_simulator_mission(mission):
+    drone = DroneSimulator()
+    output = []
+    summary = MissionRunner(drone, output=output.append).run(
+        mission("# survey\ntake off\n\nascend to 30\ngo left at 3\nwait 10\nstatus\n"))
+    assert (summary["lines"], summary["errors"]) == (5, 0)
+    assert drone.altitude == 30
+    assert drone.x_position == -3
+    assert "Status: Flying at 30.0m altitude" in output[-2]
+
+
+def test_errors_are_counted(mission):
+    output = []
+    runner = MissionRunner(DroneSimulator(), output=output.append, verbose=False)
+    summary = runner.run(mission("banana\nascend to abc\nhelp\ntake off\n"))
+    assert (summary["lines"], summary["errors"]) == (4, 3)
+    assert output[0].endswith("Error: Unknown command: 'banana'")
+
+    runner = MissionRunner(DroneSimulator(), output=output.append, verbose=False, stop_on_error=True)
+    assert runner.run(mission("banana\ntake off\n"))["lines"] == 1
+
+
+def test_long_simulated_wait_yields_between_chunks(mission):
+    drone = DroneSimulator(physics=True)
+    steps = MissionRunner(drone, output=lambda message: None).steps(mission("take off\nwait 600\n"))
+    delays = list(steps)
+    assert len(delays) > 10
+    assert set(delays) == {0}
+    assert drone.altitude == 10
+
+
+def test_mission_on_a_fleet_link(mission):
+    path = mission("take off\nwait 0.5\nforward\nwait 0.3\nstop\nstatus\n")
+    fleet = FleetManager(DroneSimulator)
+    with DroneEmulator(100) as emulator:
+        try:
+            assert fleet.add_drone("d1", emulator.port)[0]
+            link = fleet.members["d1"].link
+            output = []
+            summary = MissionRunner(link, output=output.append).run(path)
+            assert summary["errors"] == 0
+            assert output[0].endswith("\nCommand sent: Take off")
+            deadline = time.monotonic() + 2
+            while link.get_telemetry()["y_position"] >= 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            with emulator.lock:
+                assert emulator.simulator.altitude > 0
+                assert emulator.simulator.y_position < 0
+        finally:
+            fleet.close()
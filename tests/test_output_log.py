@@ -0,0 +1,115 @@
+import os
+import threading
+
+from output_log import OutputLog
+
+
+class FakeRoot:
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, delay, callback, *args):
+        self.callbacks.append((callback, args))
+
+
+class FakeText:
+    """Keeps the text of a ScrolledText as a list of lines"""
+    def __init__(self):
+        self.lines = [""]
+        self.inserts = 0
+
+    def config(self, **options):
+        pass
+
+    def insert(self, index, text):
+        self.inserts += 1
+        parts = text.split("\n")
+        self.lines[-1] += parts[0]
+        self.lines.extend(parts[1:])
+
+    def delete(self, start, end):
+        assert start == "1.0"
+        del self.lines[:int(end.split(".")[0]) - 1]
+
+    def see(self, index):
+        pass
+
+
+def make_log(tmp_path, max_lines=5000):
+    widget = FakeText()
+    return OutputLog(FakeRoot(), widget, max_lines=max_lines, path=str(tmp_path / "output.log")), widget
+
+
+def test_messages_are_batched(tmp_path):
+    log, widget = make_log(tmp_path)
+    for number in range(10):
+        log.write(f"message {number}")
+    log.flush()
+    assert widget.inserts == 1
+    assert widget.lines[:3] == ["message 0", "", "message 1"]
+    assert log.stats["messages"] == 10
+    log.close()
+
+
+def test_other_threads_leave_the_flush_to_poll(tmp_path):
+    log, widget = make_log(tmp_path)
+    thread = threading.Thread(target=log.write, args=("from a worker",))
+    thread.start()
+    thread.join()
+    assert widget.inserts == 0
+    log._poll()
+    assert widget.lines[0] == "from a worker"
+    log.close()
+
+
+def test_widget_keeps_the_newest_lines(tmp_path):
+    log, widget = make_log(tmp_path, max_lines=10)
+    for number in range(20):
+        log.write(f"message {number}")
+        log.flush()
+    assert log.lines == 10
+    assert "message 19" in widget.lines
+    assert "message 0" not in widget.lines
+    assert [number for number, _ in log.search("message 0")] == [1]
+    log.close()
+
+
+def test_search_does_not_find_earlier_results(tmp_path):
+    log, widget = make_log(tmp_path)
+    log.write("Drone altitude: 30m")
+    log.write("Battery: 90%")
+    log.flush()
+    for _ in range(3):
+        log.show_search("altitude")
+        log.flush()
+    assert [number for number, _ in log.search("altitude")] == [1]
+    assert widget.lines.count(f"1 most recent lines matching 'altitude' in {log.path}:") == 3
+    assert log.format_search("missing").startswith("No output matching 'missing'")
+    log.close()
+
+
+def test_search_limit_keeps_the_newest(tmp_path):
+    log, widget = make_log(tmp_path)
+    for number in range(100):
+        log.write(f"line {number}")
+    log.flush()
+    matches = log.search("LINE", limit=5)
+    assert [number for number, _ in matches] == [96, 97, 98, 99, 100]
+    assert matches[-1][1].endswith(" line 99")
+    log.close()
+
+
+def test_close_writes_queued_messages(tmp_path):
+    log, widget = make_log(tmp_path)
+    log.write("last words")
+    log.close()
+    with open(log.path, encoding="utf-8") as saved:
+        assert saved.read().endswith(" last words\n")
+
+
+def test_close_removes_the_temporary_log():
+    log = OutputLog(FakeRoot(), FakeText())
+    log.write("session output")
+    log.close()
+    assert log.temporary
+    assert not os.path.exists(log.path)
@@ -0,0 +1,78 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+import serial.tools.list_ports
+
+from port_scanner import PortInfo, PortScanner, when_done
+
+
+def fake_port(device, description="n/a", vid=None, pid=None):
+    return SimpleNamespace(device=device, description=description, vid=vid, pid=pid,
+                           serial_number=None, manufacturer=None)
+
+
+@pytest.fixture
+def ports(monkeypatch):
+    found = []
+    monkeypatch.setattr(serial.tools.list_ports, "comports", lambda: list(found))
+    return found
+
+
+@pytest.fixture
+def scanner():
+    scanner = PortScanner()
+    yield scanner
+    scanner.close()
+
+
+class FakeRoot:
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, delay, callback):
+        self.callbacks.append(callback)
+
+    def run(self):
+        while self.callbacks:
+            self.callbacks.pop(0)()
+
+
+def test_scan_reports_hotplug(ports, scanner):
+    ports.append(fake_port("/dev/ttyUSB0", "CP2102 USB to UART", 0x10C4, 0xEA60))
+    found, added, removed = scanner.scan()
+    assert (added, removed) == (["/dev/ttyUSB0"], [])
+    assert found[0].label == "/dev/ttyUSB0 - CP2102 USB to UART (10C4:EA60)"
+
+    ports[:] = [fake_port("/dev/ttyS0")]
+    found, added, removed = scanner.scan()
+    assert (added, removed) == (["/dev/ttyS0"], ["/dev/ttyUSB0"])
+    assert scanner.cached() == [PortInfo("/dev/ttyS0", "n/a")]
+    assert found[0].label == "/dev/ttyS0"
+
+
+def test_device_for_labels_and_typed_ports(ports, scanner):
+    ports.append(fake_port("COM3", "Flight Controller", 0x0483, 0x5740))
+    scanner.scan()
+    assert scanner.device_for("COM3 - Flight Controller (0483:5740)") == "COM3"
+    assert scanner.device_for("/dev/ttyACM7") == "/dev/ttyACM7"
+
+
+def test_scan_async_reuses_a_running_scan(monkeypatch, scanner):
+    release = threading.Event()
+    monkeypatch.setattr(serial.tools.list_ports, "comports", lambda: release.wait(5) and [])
+    first = scanner.scan_async()
+    assert scanner.scan_async() is first
+    release.set()
+    assert first.result(5) == ([], [], [])
+    assert scanner.scan_async() is not first
+
+
+def test_when_done_hands_results_to_the_tk_thread(scanner):
+    root = FakeRoot()
+    results = []
+    when_done(root, scanner.submit(lambda: "connected"), results.append, interval=0)
+    when_done(root, scanner.submit(lambda: 1 / 0), results.append, interval=0)
+    root.run()  # Polls until both jobs finish
+    assert "connected" in results
+    assert any(isinstance(result, ZeroDivisionError) for result in results)
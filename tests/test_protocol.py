@@ -0,0 +1,67 @@
+import json
+
+from protocol import (BinaryCodec, FrameDecoder, JsonCodec, HEADER, MAX_PAYLOAD, SYNC, takeoff_command,
+                      move_command, stop_command)
+
+
+def telemetry(altitude):
+    return {"type": "telemetry", "data": {"altitude": altitude, "x_position": 1.5, "y_position": -2.0,
+                                          "battery": 80, "attitude": {"roll": 0, "pitch": 10, "yaw": 0}}}
+
+
+def test_binary_round_trip():
+    codec = BinaryCodec()
+    frame = codec.encode(dict(move_command("left", 3), seq=7))
+    messages = list(FrameDecoder().decode(frame))
+    assert messages == [{"type": "command", "action": "move", "velocity": {"vx": 0.0, "vy": -3.0}, "seq": 7}]
+
+
+def test_frames_split_across_reads():
+    data = BinaryCodec().encode(telemetry(12.5)) + JsonCodec().encode(stop_command())
+    decoder = FrameDecoder()
+    messages = []
+    for index in range(len(data)):
+        messages.extend(decoder.decode(data[index:index + 1]))
+    assert [message["type"] for message in messages] == ["telemetry", "command"]
+    assert messages[0]["data"]["altitude"] == 12.5
+    assert decoder.bad_frames == 0
+
+
+def test_resync_after_bad_crc():
+    codec = BinaryCodec()
+    bad = bytearray(codec.encode(telemetry(1.0)))
+    bad[-1] ^= 0xFF
+    decoder = FrameDecoder()
+    messages = list(decoder.decode(bytes(bad) + codec.encode(telemetry(2.0))))
+    assert [message["data"]["altitude"] for message in messages] == [2.0]
+    assert decoder.bad_frames == 1
+
+
+def test_resync_after_corrupted_length():
+    codec = BinaryCodec()
+    bad = bytearray(codec.encode(telemetry(1.0)))
+    HEADER.pack_into(bad, 0, SYNC, bad[2], 0, MAX_PAYLOAD + 1)
+    decoder = FrameDecoder()
+    messages = list(decoder.decode(bytes(bad) + codec.encode(telemetry(2.0))))
+    assert [message["data"]["altitude"] for message in messages] == [2.0]
+    assert decoder.bad_frames == 1
+
+
+def test_noise_and_mixed_framings():
+    codec = BinaryCodec()
+    data = (b"boot noise\r\n" + JsonCodec().encode({"type": "protocol_ack", "protocol": "binary", "version": 1})
+            + codec.encode(dict(takeoff_command(15), seq=3)) + b"\xa5\x00" + codec.encode({"type": "ack", "seq": 3}))
+    decoder = FrameDecoder()
+    messages = list(decoder.decode(data))
+    assert [message["type"] for message in messages] == ["protocol_ack", "command", "ack"]
+    assert messages[1]["altitude"] == 15
+    assert messages[2]["seq"] == 3
+    assert decoder.dropped_bytes > 0
+
+
+def test_overlong_json_line_is_dropped():
+    decoder = FrameDecoder(capacity=64)
+    line = b'{"pad": "' + b"x" * 100
+    messages = list(decoder.decode(line + b'"}\n' + json.dumps({"type": "ack", "seq": 1}).encode() + b"\n"))
+    assert messages == [{"type": "ack", "seq": 1}]
+    assert decoder.bad_frames == 1
@@ -0,0 +1,148 @@
+import pytest
+
+from renderer import DroneRenderer, FrameScheduler
+
+
+class FakeCanvas:
+    """Counts item creation and coords() calls"""
+    def __init__(self, width=400, height=400):
+        self.width = width
+        self.height = height
+        self.items = {}
+        self.coords_calls = 0
+
+    def _create(self, *coords, **options):
+        item = len(self.items) + 1
+        self.items[item] = coords
+        return item
+
+    create_oval = create_line = create_polygon = _create
+
+    def coords(self, item, *coords):
+        self.coords_calls += 1
+        self.items[item] = coords
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+
+class FakeRoot:
+    """Records after() callbacks instead of running an event loop"""
+    def __init__(self):
+        self.scheduled = {}
+        self.next_id = 0
+
+    def after(self, delay, callback):
+        self.next_id += 1
+        self.scheduled[self.next_id] = (delay, callback)
+        return self.next_id
+
+    def after_idle(self, callback):
+        return self.after("idle", callback)
+
+    def after_cancel(self, after_id):
+        del self.scheduled[after_id]
+
+    def run_next(self):
+        """Run the one pending callback, returning the delay it was scheduled with"""
+        (after_id, (delay, callback)), = self.scheduled.items()
+        del self.scheduled[after_id]
+        callback()
+        return delay
+
+
+def test_items_are_created_once_and_moved():
+    canvas = FakeCanvas()
+    renderer = DroneRenderer(canvas, 200, 300, indicator=True)
+    assert len(canvas.items) == 6  # Body, four propellers and the indicator
+    assert renderer.draw(210, 280, angle=30)
+    assert len(canvas.items) == 6
+    assert canvas.coords_calls == 6
+    assert canvas.items[renderer.body] == (195, 265, 225, 295)
+
+
+def test_unchanged_frames_skip_the_canvas():
+    canvas = FakeCanvas()
+    renderer = DroneRenderer(canvas, 200, 300)
+    assert not renderer.draw(200, 300)
+    renderer.draw(200, 300, angle=10)
+    assert not renderer.draw(200, 300)  # Keeps the last angle
+    assert canvas.coords_calls == 5
+    assert (renderer.frames_drawn, renderer.frames_skipped) == (1, 2)
+    assert renderer.format_report().startswith("Renderer: 1 frames drawn, 2 skipped")
+
+
+def test_propellers_spin_about_their_corner():
+    canvas = FakeCanvas()
+    renderer = DroneRenderer(canvas, 0, 0, size=30)
+    renderer.draw(0, 0, angle=0)
+    start_x, start_y, end_x, end_y = canvas.items[renderer.propellers[0]]
+    assert (start_x, start_y) == (-15, -15)
+    assert (end_x - start_x) ** 2 + (end_y - start_y) ** 2 == pytest.approx(renderer.prop_size ** 2)
+
+
+def test_layout_keeps_the_drone_on_the_canvas():
+    renderer = DroneRenderer(FakeCanvas(400, 400), 200, 380)
+    assert renderer.layout(0, 0, 120, 10) == (200, 380)
+    assert renderer.layout(0, 120, 120, 10) == (200, 50)
+    assert renderer.layout(0, 500, 120, 10) == (200, 50)
+    assert renderer.layout(1000, 60, 120, 10) == (370, 215)
+    assert renderer.layout(-1000, 60, 120, 10)[0] == 30
+
+
+class DrawnState:
+    def __init__(self):
+        self.version = 0
+        self.active = False
+        self.draws = 0
+
+    def state(self):
+        return self.version, self.active
+
+    def draw(self):
+        self.draws += 1
+
+
+def test_idle_ticks_draw_only_new_versions():
+    root = FakeRoot()
+    drawn = DrawnState()
+    frames = FrameScheduler(root, drawn.draw, drawn.state, active_interval=33, idle_interval=500)
+    frames.start()
+    assert drawn.draws == 1
+    assert [root.run_next() for _ in range(3)] == [500, 500, 500]
+    assert drawn.draws == 1
+    drawn.version += 1
+    root.run_next()
+    assert drawn.draws == 2
+    assert (frames.frames_drawn, frames.idle_ticks) == (2, 3)
+
+
+def test_active_ticks_draw_every_frame():
+    root = FakeRoot()
+    drawn = DrawnState()
+    frames = FrameScheduler(root, drawn.draw, drawn.state, active_interval=33, idle_interval=500)
+    drawn.active = True
+    frames.start()
+    assert [root.run_next() for _ in range(3)] == [33, 33, 33]
+    assert drawn.draws == 4
+    drawn.active = False
+    root.run_next()
+    assert list(root.scheduled.values())[0][0] == 500
+    assert "4 drawn" in frames.format_report()
+
+
+def test_wake_skips_the_idle_wait():
+    root = FakeRoot()
+    drawn = DrawnState()
+    frames = FrameScheduler(root, drawn.draw, drawn.state)
+    frames.start()
+    drawn.version += 1
+    frames.wake()
+    assert root.run_next() == "idle"
+    assert drawn.draws == 2
+    frames.invalidate()
+    root.run_next()
+    assert drawn.draws == 3
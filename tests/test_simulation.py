@@ -0,0 +1,130 @@
+import numpy as np
+import pytest
+
+from simulation import BatchDroneSimulator, DroneSimulator
+
+
+def test_commands_jump_without_physics():
+    drone = DroneSimulator()
+    assert drone.take_off() == "Ascending from 0m to 10m...\nReached target altitude of 10m in 10.0 seconds."
+    assert drone.altitude == 10
+    drone.move("right", speed=3)
+    assert (drone.x_position, drone.y_position) == (3, 0)
+    assert drone.attitude["roll"] == 10
+    drone.stop()
+    drone.land()
+    assert drone.altitude == 0
+    assert not drone.is_flying
+
+
+def test_physics_flies_to_the_target_altitude():
+    drone = DroneSimulator(physics=True)
+    assert drone.take_off().endswith("Expected to take 10.0 seconds.")
+    assert drone.altitude == 0
+    assert drone.run(60, until=lambda d: d.settled()) == pytest.approx(10.0, abs=0.02)  # Within a step
+    assert drone.altitude == 10
+    drone.land()
+    assert drone.is_flying  # Flying until touchdown
+    drone.run(20)
+    assert drone.altitude == 0
+    assert not drone.is_flying
+
+
+def test_physics_accelerates_to_the_commanded_speed():
+    drone = DroneSimulator(physics=True)
+    drone.take_off()
+    drone.run(10)
+    drone.move("forward", speed=4)
+    assert drone.run(10, until=lambda d: d.settled()) == pytest.approx(2.0, abs=0.02)
+    assert drone.velocity == [0.0, -4.0]
+    assert drone.y_position == pytest.approx(-4.0, abs=0.1)
+
+
+def test_flat_battery_lands_the_drone():
+    drone = DroneSimulator(physics=True)
+    drone.hover_drain = 10.0
+    drone.take_off()
+    drone.move("left", speed=5)
+    drone.run(30)
+    assert drone.battery == 0
+    assert drone.altitude == 0
+    assert not drone.is_flying
+    assert not drone.is_moving
+
+
+def test_grounded_drone_does_not_change():
+    drone = DroneSimulator(physics=True)
+    drone.run(100)
+    assert (drone.battery, drone.sim_time, drone.version) == (100, 0.0, 0)
+
+
+# Per-drone parameters for the parity test; the last drone's battery goes flat mid-flight
+PARAMETERS = {
+    "ascent_rate": [1.0, 0.5, 2.0, 1.5],
+    "descent_rate": [0.7, 1.0, 0.3, 0.7],
+    "acceleration": [2.0, 1.0, 4.0, 0.5],
+    "hover_drain": [0.05, 0.1, 0.05, 4.0],
+}
+
+# (step, command, arguments, drones) in the order they are given
+SCRIPT = [
+    (0, "take_off", (), [0, 1, 2, 3]),
+    (100, "move", ("forward", 4), [0, 1, 3]),
+    (300, "ascend", (25,), [0, 2, 3]),
+    (400, "move", ("right", 6), [1, 2]),
+    (600, "stop", (), [0, 1, 2, 3]),
+    (700, "descend", (), [0, 1, 2, 3]),
+    (900, "move", ("left", 2), [0, 2]),
+    (1200, "land", (), [0, 1, 2, 3]),
+    (1300, "take_off", (), [0, 1]),
+]
+
+
+def flat_state(state):
+    """A state dict without the nested attitude, which approx() cannot compare"""
+    state = dict(state)
+    state.update(state.pop("attitude"))
+    return state
+
+
+def test_batch_matches_scalar_step_for_step():
+    count = len(PARAMETERS["ascent_rate"])
+    batch = BatchDroneSimulator(count, **PARAMETERS)
+    drones = []
+    for index in range(count):
+        drone = DroneSimulator(physics=True)
+        for name, values in PARAMETERS.items():
+            setattr(drone, name, values[index])
+        drones.append(drone)
+
+    script = list(SCRIPT)
+    for step in range(2500):
+        while script and script[0][0] == step:
+            _, command, arguments, selected = script.pop(0)
+            accepted = getattr(batch, command)(*arguments, mask=selected)
+            for index in selected:
+                was = drones[index].version
+                getattr(drones[index], command)(*arguments)
+                # A command the scalar drone accepts changes its state
+                assert accepted[index] == (drones[index].version != was), (step, command, index)
+        batch.step(0.02)
+        for drone in drones:
+            drone.step(0.02)
+        for index, drone in enumerate(drones):
+            expected = flat_state(dict(drone.get_telemetry(), is_flying=drone.is_flying))
+            assert flat_state(batch.state(index)) == pytest.approx(expected, abs=1e-9), (step, index)
+
+    assert batch.battery[3] == 0
+    assert batch.is_flying.tolist() == [drone.is_flying for drone in drones]
+    assert batch.sim_time == pytest.approx(drones[0].sim_time)
+
+
+def test_masks_select_drones():
+    batch = BatchDroneSimulator(3)
+    assert batch.take_off(mask=np.array([True, False, True])).tolist() == [True, False, True]
+    assert batch.take_off().tolist() == [False, True, False]
+    assert batch.move("backward", speed=[1, 2, 3], mask=[1]).tolist() == [False, True, False]
+    batch.run(20)
+    assert batch.settled().all()
+    assert batch.velocity[1].tolist() == [0.0, 2.0, 0.0]
+    assert batch.summary()["flying"] == 3
@@ -0,0 +1,70 @@
+import pytest
+
+from telemetry_buffer import EMPTY_TELEMETRY, TelemetryRingBuffer, merge_telemetry
+
+
+def fill(buffer, start, count):
+    for value in range(start, start + count):
+        buffer.append(float(value), {"altitude": value, "battery": 100 - value})
+
+
+def test_wraparound_keeps_newest_samples():
+    buffer = TelemetryRingBuffer(8)
+    fill(buffer, 0, 20)
+    # One slot is never read, so a full buffer holds capacity - 1 samples
+    assert len(buffer) == 7
+    assert list(buffer.window()["altitude"]) == list(range(13, 20))
+    assert buffer.latest()["altitude"] == 19
+
+
+def test_window_spans_the_wrap():
+    buffer = TelemetryRingBuffer(8)
+    fill(buffer, 0, 12)
+    assert len(buffer.segments()) == 2
+    assert list(buffer.window(last_n=5)["altitude"]) == [7, 8, 9, 10, 11]
+    assert list(buffer.window(seconds=3, now=11.0)["altitude"]) == [8, 9, 10, 11]
+    stats = buffer.stats("altitude", last_n=4)
+    assert (stats["count"], stats["min"], stats["max"], stats["mean"]) == (4, 8, 11, 9.5)
+
+
+def test_rate_of_change():
+    buffer = TelemetryRingBuffer(16)
+    fill(buffer, 0, 10)
+    assert buffer.rate_of_change("altitude") == pytest.approx(1.0)
+    assert buffer.rate_of_change("battery") == pytest.approx(-1.0)
+
+
+def test_segments_are_read_only():
+    buffer = TelemetryRingBuffer(8)
+    fill(buffer, 0, 3)
+    with pytest.raises(ValueError):
+        buffer.segments()[0]["altitude"][0] = 99
+
+
+def test_window_retries_when_the_writer_laps_it():
+    buffer = TelemetryRingBuffer(8)
+    fill(buffer, 0, 20)
+    segments = buffer._segments
+    counts = []
+
+    def racing(count, *args):
+        views = segments(count, *args)
+        if not counts:
+            fill(buffer, 20, 8)  # The writer overwrites the views before they are copied
+        counts.append(count)
+        return views
+
+    buffer._segments = racing
+    samples = buffer.window(last_n=3)
+    assert counts == [20, 28]
+    assert list(samples["altitude"]) == [25, 26, 27]
+
+
+def test_merge_telemetry_leaves_old_snapshot():
+    first = merge_telemetry(EMPTY_TELEMETRY, {"altitude": 5, "attitude": {"roll": 3}})
+    second = merge_telemetry(first, {"attitude": {"pitch": 1}})
+    assert dict(first["attitude"]) == {"roll": 3, "pitch": 0, "yaw": 0}
+    assert dict(second["attitude"]) == {"roll": 3, "pitch": 1, "yaw": 0}
+    assert (first["version"], second["version"], second["altitude"]) == (1, 2, 5)
+    with pytest.raises(TypeError):
+        second["altitude"] = 0